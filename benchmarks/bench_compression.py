@@ -0,0 +1,64 @@
+"""
+Response compression: CPU time against bytes saved, per content coding and level.
+
+Compresses a JSON body typical of our backends (a list of records) with every coding
+available here (gzip always, brotli and zstd when installed) at several levels, in the
+64 KiB chunks the relay uses, and reports throughput and compression ratio.
+
+Usage: python -m benchmarks.bench_compression
+"""
+
+import json
+import timeit
+from dracan.core.compression import available_encoders
+from dracan.core.proxy import DEFAULT_CHUNK_SIZE
+
+LEVELS = {
+    "gzip": (1, 4, 6, 9),
+    "br": (1, 4, 6, 11),
+    "zstd": (1, 3, 9, 19),
+}
+
+BODY = json.dumps(
+    [
+        {
+            "id": i,
+            "name": f"customer {i}",
+            "email": f"customer{i}@example.com",
+            "active": i % 3 != 0,
+            "balance": round(i * 13.37, 2),
+            "tags": ["standard", "newsletter"] if i % 2 else ["premium"],
+        }
+        for i in range(5000)
+    ]
+).encode()
+
+CHUNKS = [BODY[i : i + DEFAULT_CHUNK_SIZE] for i in range(0, len(BODY), DEFAULT_CHUNK_SIZE)]
+
+
+def compress_chunks(encoder_class, level):
+    def run():
+        encoder = encoder_class(level)
+        size = sum(len(encoder.compress(chunk)) for chunk in CHUNKS)
+        return size + len(encoder.finish())
+
+    return run
+
+
+def main():
+    print(f"body: {len(BODY):,} bytes in {len(CHUNKS)} chunks")
+    print(f"{'coding':<8}{'level':>6}{'ratio':>8}{'MB/s':>10}{'ms/body':>10}")
+    for coding, encoder_class in available_encoders().items():
+        for level in LEVELS[coding]:
+            run = compress_chunks(encoder_class, level)
+            size = run()
+            number, elapsed = timeit.Timer(run).autorange()
+            per_body = elapsed / number
+            print(
+                f"{coding:<8}{level:>6}{len(BODY) / size:>8.1f}"
+                f"{len(BODY) / per_body / 1e6:>10.1f}{per_body * 1000:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+JSON validation throughput on the sample schema from rules_config.json.
+
+Compares per-request jsonschema.validate() (previous behaviour) with the schema compiled
+once by CompiledSchema, with and without the generated fast path.
+
+Usage: python -m benchmarks.bench_json_validator
+"""
+
+import json
+import os
+import timeit
+from jsonschema import validate, ValidationError
+from dracan.validators.json_validator import CompiledSchema
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAYLOADS = {
+    "valid": {"name": "John", "age": 30},
+    "invalid": {"name": "John"},
+}
+
+
+def per_request_validate(schema):
+    def run(data):
+        try:
+            validate(instance=data, schema=schema)
+        except ValidationError:
+            pass
+
+    return run
+
+
+def compiled_validate(compiled):
+    def run(data):
+        try:
+            compiled.validate(data)
+        except ValidationError:
+            pass
+
+    return run
+
+
+def main():
+    with open(os.path.join(ROOT, "rules_config.json"), "r") as f:
+        schema = json.load(f)["json_schema"]
+
+    candidates = {
+        "jsonschema.validate per request": per_request_validate(schema),
+        "compiled validator": compiled_validate(CompiledSchema(schema)),
+        "compiled + fast path": compiled_validate(CompiledSchema(schema, fast_path=True)),
+    }
+
+    print(f"{'variant':<34}{'payload':<10}{'validations/s':>15}")
+    for name, run in candidates.items():
+        for payload_name, payload in PAYLOADS.items():
+            number, elapsed = timeit.Timer(lambda: run(payload)).autorange()
+            print(f"{name:<34}{payload_name:<10}{number / elapsed:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Rate limiter overhead per request for the memory, shm and (if installed) Redis stand-in storages.
+
+"hit" is the cost of one FixedWindowRateLimiter.hit() on a hot key, "hit, 10k keys" cycles
+through 10,000 client keys. "request" is a full Flask request through Flask-Limiter, next to
+the same request without a limiter.
+
+Usage: python -m benchmarks.bench_limiter
+"""
+
+import os
+import tempfile
+import timeit
+import itertools
+from flask import Flask
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from dracan.middleware.limiter import create_limiter
+
+
+def redis_stand_in():
+    try:
+        import redis
+        import fakeredis
+        import lupa  # noqa: F401
+    except ImportError:
+        return None
+    pool = redis.ConnectionPool(
+        connection_class=fakeredis.FakeRedisConnection, server=fakeredis.FakeServer()
+    )
+    return "redis://localhost", {"connection_pool": pool}
+
+
+def create_app(storage):
+    app = Flask(__name__)
+    if storage is not None:
+        uri, options = storage
+        os.environ["RATE_LIMIT_STORAGE_URI"] = uri
+        create_limiter(
+            app, {"limiting_enabled": True, "rate_limit": "1000000 per minute"}, options
+        )
+
+    @app.route("/")
+    def index():
+        return "ok"
+
+    return app
+
+
+def measure(func):
+    number, elapsed = timeit.Timer(func).autorange()
+    return elapsed / number * 1e6
+
+
+def main():
+    table = os.path.join(tempfile.mkdtemp(), "rate-limit")
+    storages = {"memory": ("memory://", {}), "shm": (f"shm://{table}", {})}
+    if redis_stand_in() is not None:
+        storages["redis (stand-in)"] = redis_stand_in()
+
+    item = parse("1000000 per minute")
+    client = create_app(None).test_client()
+    baseline = measure(lambda: client.get("/"))
+
+    print(f"{'storage':<18}{'hit us':>10}{'hit, 10k keys us':>20}{'request us':>14}")
+    print(f"{'(no limiter)':<18}{'':>10}{'':>20}{baseline:>14.2f}")
+    for name, (uri, options) in storages.items():
+        limiter = FixedWindowRateLimiter(storage_from_string(uri, **options))
+        keys = itertools.cycle([f"10.0.{i // 256}.{i % 256}" for i in range(10000)])
+        hot = measure(lambda: limiter.hit(item, "127.0.0.1"))
+        spread = measure(lambda: limiter.hit(item, next(keys)))
+
+        client = create_app((uri, options)).test_client()
+        request = measure(lambda: client.get("/"))
+        print(f"{name:<18}{hot:>10.2f}{spread:>20.2f}{request:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
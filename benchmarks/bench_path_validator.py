@@ -0,0 +1,59 @@
+"""
+URI matching cost for 10 / 100 / 1000 allowed URI rules.
+
+Compares the previous list lookup + re.match loop with the compiled UriMatcher. Half of the
+rules are exact URIs, a quarter literal prefixes ("^/svcN/.*") and a quarter other patterns.
+Paths hitting the last rule and paths matching no rule are the worst case for the loop.
+
+Usage: python -m benchmarks.bench_path_validator
+"""
+
+import re
+import timeit
+from dracan.validators.path_validator import UriMatcher
+
+
+def build_rules(count):
+    exact = [f"/resource{i}" for i in range(count // 2)]
+    prefixes = [f"^/svc{i}/.*" for i in range(count // 4)]
+    patterns = [f"^/items{i}/[0-9]+$" for i in range(count - len(exact) - len(prefixes))]
+    return exact, prefixes + patterns
+
+
+def legacy_matcher(allowed_uris, allowed_uri_patterns):
+    def match(path):
+        if path in allowed_uris:
+            return path
+        for pattern in allowed_uri_patterns:
+            if re.match(pattern, path):
+                return pattern
+        return None
+
+    return match
+
+
+def main():
+    print(f"{'rules':>6}  {'path':<22}{'legacy us':>12}{'compiled us':>14}")
+    for count in (10, 100, 1000):
+        allowed_uris, allowed_uri_patterns = build_rules(count)
+        legacy = legacy_matcher(allowed_uris, allowed_uri_patterns)
+        compiled = UriMatcher(allowed_uris, allowed_uri_patterns).match
+
+        last_pattern = allowed_uri_patterns[-1]
+        paths = {
+            "last exact": allowed_uris[-1],
+            "last prefix": f"/svc{count // 4 - 1}/a/b",
+            "last pattern": last_pattern[1:].replace("[0-9]+$", "42"),
+            "no match": "/forbidden/path",
+        }
+        for name, path in paths.items():
+            assert (legacy(path) is None) is (compiled(path) is None)
+            results = []
+            for match in (legacy, compiled):
+                number, elapsed = timeit.Timer(lambda: match(path)).autorange()
+                results.append(elapsed / number * 1e6)
+            print(f"{count:>6}  {name:<22}{results[0]:>12.2f}{results[1]:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
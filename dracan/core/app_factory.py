@@ -2,15 +2,24 @@ import os
 import sys
 import logging
 from flask import Flask
-from .proxy import handle_proxy
+from .proxy import handle_proxy, create_response_relay
+from .upstream import create_upstream_client
+from .balancer import create_load_balancer
+from .response_cache import create_response_cache
+from .compression import create_response_compressor, register_compression
+from .cors import create_cors_policy, register_cors
+from .pipeline import create_validation_pipeline
 from ..utils.config_compliance_check import check_env_config_conflicts
 from ..middleware.limiter import create_limiter
-from ..validators.json_validator import create_json_validator
-from ..validators.method_validator import create_method_validator
-from ..validators.path_validator import create_path_validator
-from ..validators.headers_validator import create_header_validator
-from ..middleware.payload_limiter import create_payload_size_limiter
-from ..utils.metrics import start_metrics_server, register_metrics
+from ..middleware.payload_limiter import apply_payload_limit
+from ..utils.metrics import (
+    start_metrics_server,
+    register_metrics,
+    multiprocess_mode_enabled,
+    register_phase_timing,
+    observe_validation_stage,
+)
+from ..utils.request_log import register_request_logging
 from ..utils.config_load import (
     load_proxy_config,
     load_rules_config,
@@ -39,13 +48,31 @@ def create_app():
     setup_logging(app)
 
     # Ensure metrics server only starts if explicitly enabled
-    if os.getenv("ALLOW_METRICS_ENDPOINT", "false").lower() == "true":
+    metrics_enabled = os.getenv("ALLOW_METRICS_ENDPOINT", "false").lower() == "true"
+    if metrics_enabled:
         metrics_port = int(os.getenv("METRICS_PORT", 9100))
-        start_metrics_server(port=metrics_port)
-        register_metrics(app)  # Register the metrics request handlers
-        app.logger.info(
-            f"Metrics endpoint is enabled and running on port {metrics_port}, path /metrics."
-        )
+        max_endpoints = int(os.getenv("METRICS_MAX_ENDPOINTS", 100))
+        register_metrics(app, max_endpoints)  # Register the metrics request handlers
+        if multiprocess_mode_enabled():
+            # Workers only write metric files, the gunicorn master serves them all
+            app.logger.info(
+                f"Metrics are collected in multiprocess mode, served on port {metrics_port}, path /metrics."
+            )
+        else:
+            start_metrics_server(port=metrics_port)
+            app.logger.info(
+                f"Metrics endpoint is enabled and running on port {metrics_port}, path /metrics."
+            )
+
+    # Latency breakdown per validation stage and upstream phase
+    server_timing_enabled = (
+        os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+    )
+    phase_timing_enabled = metrics_enabled or server_timing_enabled
+    if phase_timing_enabled:
+        register_phase_timing(app, server_timing_enabled)
+        if server_timing_enabled:
+            app.logger.info("Server-Timing response header is enabled.")
 
     # Read allowed HTTP methods from rules_config or use defaults if not specified
     allowed_methods = rules_config.get(
@@ -70,73 +97,90 @@ def create_app():
         os.getenv("PAYLOAD_LIMITING_ENABLED", "true").lower() == "true"
     )
 
-    # Create validators and pass the app logger
-    validate_method = (
-        create_method_validator(rules_config, app.logger)
-        if method_validation_enabled
-        else lambda: (True, None)
-    )
-    validate_json = (
-        create_json_validator(rules_config, app.logger)
-        if json_validation_enabled
-        else lambda: (True, None)
-    )
-    validate_path = (
-        create_path_validator(rules_config, app.logger)
-        if uri_validation_enabled
-        else lambda: (True, None)
-    )
-    validate_payload_size = (
-        create_payload_size_limiter(rules_config, app.logger)
-        if payload_limiting_enabled
-        else lambda: (True, None)
+    # Build one validation pipeline holding only the enabled stages, cheapest first
+    enabled_stages = {
+        stage
+        for stage, enabled in [
+            ("method", method_validation_enabled),
+            ("payload", payload_limiting_enabled),
+            ("path", uri_validation_enabled),
+            ("headers", header_validation_enabled),
+            ("json", json_validation_enabled),
+        ]
+        if enabled
+    }
+
+    # Reject oversized payloads before their body is read, the pipeline stage is then redundant
+    max_payload_size = (
+        apply_payload_limit(app, rules_config) if payload_limiting_enabled else None
     )
-    validate_headers = (
-        create_header_validator(rules_config, app.logger)
-        if header_validation_enabled
-        else lambda: (True, None)
+    if max_payload_size is not None:
+        enabled_stages.discard("payload")
+
+    validate_request = create_validation_pipeline(
+        rules_config,
+        app.logger,
+        enabled_stages,
+        observer=observe_validation_stage if phase_timing_enabled else None,
     )
 
     # Apply rate limiter if enabled
     if rate_limiting_enabled:
         create_limiter(app, rules_config)
 
+    # Preflight requests answered at the edge, before the validations they could not pass
+    cors_policy = create_cors_policy(rules_config, app.logger)
+    if cors_policy is not None:
+        register_cors(app, cors_policy)
+
+    # Pooled keep-alive client reused by every request handled in this worker
+    # Several destinations are load balanced, each with its own pooled client
+    balancer = create_load_balancer(proxy_config, app.logger)
+    upstream_client = create_upstream_client(app.logger) if balancer is None else None
+    relay_response = create_response_relay(app.logger)
+    response_cache = create_response_cache(app.logger)
+    compressor = create_response_compressor(app.logger, response_cache)
+    if compressor is not None:
+        register_compression(app, compressor)
+
+    # Shared with alternative engines (see dracan.core.asgi) serving the same rules
+    app.extensions["dracan"] = {
+        "proxy_config": proxy_config,
+        "rules_config": rules_config,
+        "validate_request": validate_request,
+        "max_payload_size": max_payload_size,
+        "balancer": balancer,
+        "response_cache": response_cache,
+    }
+
     # Route handling
     @app.route("/", methods=allowed_methods)
     def proxy_route_without_sub():
-        app.logger.info("Proxying request without sub-path")
-
-        # Validate path before handling proxy
-        is_valid, validation_response = validate_path()
-        if not is_valid:
-            return validation_response
+        app.logger.debug("Proxying request without sub-path")
 
         # Call handle_proxy without sub
         return handle_proxy(
             proxy_config,
-            validate_method,
-            validate_json,
-            validate_headers,
-            validate_payload_size,
+            validate_request,
+            client=upstream_client,
+            relay_response=relay_response,
+            balancer=balancer,
+            cache=response_cache,
         )
 
     @app.route("/<path:sub>", methods=allowed_methods)
     def proxy_route(sub):
-        app.logger.info(f"Proxying request to sub-path: {sub}")
-
-        # Validate path before handling proxy
-        is_valid, validation_response = validate_path()
-        if not is_valid:
-            return validation_response
+        app.logger.debug("Proxying request to sub-path: %s", sub)
 
         # Call handle_proxy with sub as a keyword argument
         return handle_proxy(
             proxy_config,
-            validate_method,
-            validate_json,
-            validate_headers,
-            validate_payload_size,
+            validate_request,
             sub=sub,
+            client=upstream_client,
+            relay_response=relay_response,
+            balancer=balancer,
+            cache=response_cache,
         )
 
     return app
@@ -162,3 +206,11 @@ def setup_logging(app):
     # Override Flask's default logger with the configured one
     app.logger.setLevel(log_level)
     app.logger.info("Logger setup complete.")
+
+    # One summary line per request instead of a line per validation stage
+    if os.getenv("LOG_REQUEST_SUMMARY", "true").lower() == "true":
+        sample_rate = min(max(float(os.getenv("LOG_SAMPLE_RATE", 1.0)), 0.0), 1.0)
+        register_request_logging(app, sample_rate)
+        app.logger.info(
+            f"Request summary logging is enabled with sample rate: {sample_rate}"
+        )
@@ -0,0 +1,379 @@
+import io
+import os
+import sys
+import time
+from http.cookiejar import DefaultCookiePolicy
+from flask import Response, request, jsonify, g
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+from .app_factory import create_app
+from .proxy import (
+    DEFAULT_CHUNK_SIZE,
+    build_destination_url,
+    filter_hop_by_hop_headers,
+    has_request_body,
+    revalidation_headers,
+)
+from .upstream import load_upstream_settings
+from .balancer import FAILURE_STATUSES
+from ..utils.metrics import record_relayed_size, record_phase
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - only needed by the ASGI engine
+    httpx = None
+
+
+def build_environ(scope, body_stream):
+    """
+    Build a WSGI environ from an ASGI HTTP scope, so the Flask request context (and with it
+    the validators, rate limiter and request hooks) works unchanged.
+
+    :param scope: The ASGI connection scope.
+    :param body_stream: File-like object exposed as wsgi.input.
+    :return: WSGI environ dict.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": "",
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body_stream,
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    client = scope.get("client")
+    if client:
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = client[0], str(client[1])
+
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+        value = value.decode("latin-1")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def receive_body(receive, max_size=None):
+    """
+    Yield the request body as it arrives, aborting with 413 once it exceeds max_size.
+    """
+    received = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnected()
+        chunk = message.get("body", b"")
+        received += len(chunk)
+        if max_size is not None and received > max_size:
+            raise RequestEntityTooLarge()
+        if chunk:
+            yield chunk
+        if not message.get("more_body", False):
+            return
+
+
+def create_async_upstream_client(settings):
+    """
+    Create the non-blocking pooled upstream client.
+
+    Connections are not capped, so every concurrent request gets one, while at most
+    pool_size idle keep-alive connections are kept per destination.
+
+    :param settings: Upstream settings as returned by load_upstream_settings().
+    :return: httpx.AsyncClient instance.
+    """
+    client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=settings["pool_size"],
+            keepalive_expiry=settings["idle_timeout"],
+        ),
+        timeout=httpx.Timeout(
+            settings["read_timeout"], connect=settings["connect_timeout"]
+        ),
+        follow_redirects=False,
+    )
+    # Only the headers of the proxied request go upstream, no client defaults or cookies
+    client.headers.clear()
+    client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return client
+
+
+class AsgiProxy:
+    """
+    ASGI engine proxying requests with a non-blocking, pooled HTTP client.
+
+    Requests are routed, rate limited and validated by the same Flask app (and so the same
+    rules_config.json and proxy_config.json) the WSGI engine serves. Only the upstream call
+    is asynchronous, so a slow destination holds a coroutine instead of a worker.
+    """
+
+    def __init__(self, flask_app, upstream_settings, chunk_size=DEFAULT_CHUNK_SIZE):
+        state = flask_app.extensions["dracan"]
+        self.flask_app = flask_app
+        self.proxy_config = state["proxy_config"]
+        self.validate_request = state["validate_request"]
+        self.max_payload_size = state["max_payload_size"]
+        self.balancer = state.get("balancer")
+        self.cache = state.get("response_cache")
+        # JSON validation reads the body, so it has to be received before validating the
+        # requests it picks a schema for, other bodies are streamed to the destination
+        json_validator = dict(self.validate_request.stages).get("json")
+        self.select_schema = getattr(json_validator, "select_schema", None)
+        self.upstream_settings = upstream_settings
+        self.chunk_size = chunk_size
+        self.client = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self.handle_http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type '{scope['type']}'")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.client = create_async_upstream_client(self.upstream_settings)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.client is not None:
+                    await self.client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle_http(self, scope, receive, send):
+        if self.client is None:
+            # Server without lifespan support
+            self.client = create_async_upstream_client(self.upstream_settings)
+
+        body_stream = io.BytesIO()
+        environ = build_environ(scope, body_stream)
+
+        app = self.flask_app
+        upstream_response = None
+        encoder = None
+        rv = None
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        if request.routing_exception is not None:
+                            app.raise_routing_exception(request)
+                        rv, upstream_response = await self.proxy(receive, body_stream)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.process_response(app.make_response(rv))
+                encoder = g.get("relay_encoder")  # Set by compression for relayed bodies
+            except Exception as e:
+                if upstream_response is not None:
+                    await upstream_response.aclose()
+                    upstream_response = None
+                    rv.close()  # Runs the close callbacks of the proxied response
+                response = app.make_response(app.handle_exception(e))
+
+        if upstream_response is None:
+            # Same headers and empty bodies (e.g. 304 Not Modified) as a WSGI server would send
+            app_iter, _, headers = response.get_wsgi_response(environ)
+        else:
+            app_iter, headers = None, response.headers.items()
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers
+                ],
+            }
+        )
+
+        if app_iter is not None:
+            try:
+                await send({"type": "http.response.body", "body": b"".join(app_iter)})
+            finally:
+                app_iter.close()  # Runs the response's close callbacks
+            return
+
+        # Relay the upstream body exactly as received, chunk by chunk
+        relayed = 0
+        reading = 0.0  # Time spent waiting for the upstream, not for the client
+        chunks = upstream_response.aiter_raw(self.chunk_size)
+        try:
+            while True:
+                started = time.perf_counter()
+                chunk = await anext(chunks, None)
+                reading += time.perf_counter() - started
+                if chunk is None:
+                    break
+                if encoder is not None:
+                    chunk = encoder.compress(chunk)
+                    if not chunk:
+                        continue
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+                relayed += len(chunk)
+            tail = encoder.finish() if encoder is not None else b""
+            await send({"type": "http.response.body", "body": tail})
+            relayed += len(tail)
+        finally:
+            await upstream_response.aclose()
+            record_phase("upstream_body", reading)
+            record_relayed_size(response, relayed)
+            response.close()
+
+    async def proxy(self, receive, body_stream):
+        """
+        Validate the request and forward it to the destination.
+        :return: Tuple (flask response value, streamed upstream response or None).
+        """
+        method = request.method
+        has_body = has_request_body(request)
+
+        validated_body = self.select_schema is not None and self.select_schema() is not None
+        content = None
+        if validated_body or not has_body:
+            body = b"".join(
+                [chunk async for chunk in receive_body(receive, self.max_payload_size)]
+            )
+            body_stream.write(body)
+            body_stream.seek(0)
+            content = body if has_body else None
+        else:
+            content = receive_body(receive, self.max_payload_size)
+
+        is_valid, validation_response = self.validate_request()
+        if not is_valid:
+            return validation_response, None
+
+        cache_key = self.cache.request_key(request) if self.cache is not None else None
+        stale = None
+        if cache_key is not None:
+            cached = self.cache.lookup(cache_key, request.headers)
+            if cached is not None and cached.fresh:
+                return cached.response(request), None
+            stale = cached
+
+        sub = (request.view_args or {}).get("sub")
+        upstream = self.balancer.acquire() if self.balancer is not None else None
+        if upstream is not None:
+            destination_url = upstream.url(sub)
+        else:
+            destination_url = build_destination_url(self.proxy_config, sub)
+        query_string = request.environ.get("QUERY_STRING")
+        if query_string:
+            destination_url = f"{destination_url}?{query_string}"
+
+        self.flask_app.logger.debug(
+            "Forwarding %s request to %s", method, destination_url
+        )
+        headers = filter_hop_by_hop_headers(request.headers)
+        if stale is not None:
+            headers = revalidation_headers(headers, stale.validators())
+        upstream_request = self.client.build_request(
+            method,
+            destination_url,
+            headers=headers,
+            content=content,
+        )
+        started = time.perf_counter()
+        try:
+            upstream_response = await self.client.send(upstream_request, stream=True)
+            record_phase("upstream_ttfb", time.perf_counter() - started)
+        except Exception as e:
+            if upstream is not None:
+                # Connection errors and timeouts count towards passive ejection
+                self.balancer.release(upstream, failed=isinstance(e, httpx.HTTPError))
+            if not isinstance(e, httpx.HTTPError):
+                raise
+            self.flask_app.logger.error(
+                "Error forwarding request to %s: %s", destination_url, e
+            )
+            return (jsonify({"error": str(e)}), 500), None
+
+        self.flask_app.logger.debug(
+            "Received %s from %s", upstream_response.status_code, destination_url
+        )
+        status = upstream_response.status_code
+        response_headers = Headers(
+            filter_hop_by_hop_headers(upstream_response.headers.multi_items())
+        )
+        entry = None
+        if stale is not None and status == 304:
+            # Unchanged: only headers were transferred, the stored body is served again
+            await upstream_response.aclose()
+            entry = self.cache.revalidated(
+                cache_key, request.headers, stale, response_headers
+            )
+        elif cache_key is not None:
+            lifetime = self.cache.lifetime(status, response_headers, request.headers)
+            if lifetime is not None:
+                # Cacheable: read the (size bounded) body in full and answer from the new entry
+                started = time.perf_counter()
+                try:
+                    # Raw bytes, the entry keeps the upstream Content-Encoding
+                    body = b"".join(
+                        [
+                            chunk
+                            async for chunk in upstream_response.aiter_raw(self.chunk_size)
+                        ]
+                    )
+                finally:
+                    await upstream_response.aclose()
+                    record_phase("upstream_body", time.perf_counter() - started)
+                entry = self.cache.store(
+                    cache_key, request.headers, status, response_headers, body, lifetime
+                )
+
+        if entry is not None:
+            response = entry.response(request)
+        else:
+            # Headers only, the body is streamed to the client after the request hooks ran
+            response = Response(status=status, headers=response_headers)
+        if upstream is not None:
+            # The upstream stays in flight until its body has been relayed
+            failed = upstream_response.status_code in FAILURE_STATUSES
+            response.call_on_close(lambda: self.balancer.release(upstream, failed))
+        if entry is not None:
+            return response, None
+        g.relayed_upstream = True  # The body is relayed by handle_http, after the hooks
+        return response, upstream_response
+
+
+def create_asgi_app(flask_app=None):
+    """
+    Factory function to create the ASGI engine based on environment settings.
+
+    :param flask_app: Optional Flask app built by create_app(), created if omitted.
+    :return: AsgiProxy instance.
+    """
+    if httpx is None:
+        raise RuntimeError("The ASGI engine requires the 'httpx' package.")
+
+    flask_app = flask_app or create_app()
+    settings = load_upstream_settings()
+    chunk_size = int(os.getenv("PROXY_STREAM_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+
+    flask_app.logger.info(
+        f"ASGI engine enabled: keep-alive pool size={settings['pool_size']}, "
+        f"idle_timeout={settings['idle_timeout']}s, "
+        f"connect_timeout={settings['connect_timeout']}s, "
+        f"read_timeout={settings['read_timeout']}s"
+    )
+    return AsgiProxy(flask_app, settings, chunk_size=chunk_size)
@@ -0,0 +1,14 @@
+from uvicorn_worker import UvicornWorker
+
+
+class DracanUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker for gunicorn relaying the Server and Date headers of the destination
+    instead of adding its own next to them.
+    """
+
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        "server_header": False,
+        "date_header": False,
+    }
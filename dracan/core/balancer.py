@@ -0,0 +1,198 @@
+import random
+import threading
+import time
+from itertools import count
+from .upstream import UpstreamClient, load_upstream_settings
+
+ALGORITHMS = ("round_robin", "least_outstanding", "power_of_two")
+
+# Upstream answers counted as failures by passive ejection, besides connection errors and timeouts
+FAILURE_STATUSES = frozenset([502, 503, 504])
+
+DEFAULT_MAX_FAILURES = 5
+DEFAULT_EJECTION_TIME = 30
+
+
+class Upstream:
+    """
+    One entry of "destinations" with its own pooled client and load balancing state.
+    """
+
+    def __init__(self, destination, client=None):
+        self.host = destination["host"]
+        self.port = destination["port"]
+        self.weight = destination.get("weight", 1)
+        if not isinstance(self.weight, int) or self.weight < 1:
+            raise ValueError(
+                f"Invalid weight '{self.weight}' for destination {self.host}:{self.port}"
+            )
+        self.base_url = f"http://{self.host}:{self.port}{destination['path']}"
+        self.label = f"{self.host}:{self.port}"
+        self.client = client
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+
+    def url(self, sub=None):
+        """
+        Build the destination URL of this upstream with the optional sub-path.
+        """
+        return f"{self.base_url}/{sub}" if sub else self.base_url
+
+
+def weighted_schedule(upstreams):
+    """
+    Smooth weighted round robin order: every upstream appears weight times per cycle,
+    spread out instead of in bursts (weights 5, 1, 1 give a a b a c a a).
+    """
+    current = [0] * len(upstreams)
+    total = sum(upstream.weight for upstream in upstreams)
+    schedule = []
+    for _ in range(total):
+        for index, upstream in enumerate(upstreams):
+            current[index] += upstream.weight
+        best = max(range(len(upstreams)), key=current.__getitem__)
+        current[best] -= total
+        schedule.append(upstreams[best])
+    return schedule
+
+
+class LoadBalancer:
+    """
+    Picks the upstream for every request and passively ejects failing ones.
+
+    Algorithms:
+      - round_robin: smooth weighted round robin.
+      - least_outstanding: fewest in-flight requests per unit of weight.
+      - power_of_two: the less loaded of two upstreams drawn at random by weight.
+
+    An upstream failing max_failures times in a row (connection error, timeout, 502, 503
+    or 504) is skipped for ejection_time seconds. When every upstream is ejected all of them
+    are used again, so a total outage does not turn into refusing every request.
+    In-flight counts are per process.
+    """
+
+    def __init__(
+        self,
+        upstreams,
+        algorithm="round_robin",
+        max_failures=DEFAULT_MAX_FAILURES,
+        ejection_time=DEFAULT_EJECTION_TIME,
+        logger=None,
+    ):
+        if not upstreams:
+            raise ValueError("At least one destination is required for load balancing")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(
+                f"Unknown load balancing algorithm '{algorithm}', expected one of: {', '.join(ALGORITHMS)}"
+            )
+        self.upstreams = upstreams
+        self.algorithm = algorithm
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.logger = logger
+        self.schedule = weighted_schedule(upstreams)
+        self.counter = count()
+        self.ejected = 0
+        self.lock = threading.Lock()
+        self.pick = getattr(self, f"_pick_{algorithm}")
+
+    def candidates(self):
+        """
+        Upstreams not currently ejected, or all of them if every one is.
+        """
+        if not self.ejected:
+            return self.upstreams
+        now = time.monotonic()
+        available = [
+            upstream for upstream in self.upstreams if upstream.ejected_until <= now
+        ]
+        if len(available) == len(self.upstreams):
+            with self.lock:
+                self.ejected = 0
+        return available or self.upstreams
+
+    def _pick_round_robin(self, candidates):
+        schedule = self.schedule
+        if candidates is not self.upstreams:
+            # Only while upstreams are ejected: keep the weighted order of the others
+            schedule = [upstream for upstream in schedule if upstream in candidates]
+        return schedule[next(self.counter) % len(schedule)]
+
+    def _pick_least_outstanding(self, candidates):
+        # Start the scan at a rotating offset, so ties do not always go to the first upstream
+        start = next(self.counter) % len(candidates)
+        rotated = candidates[start:] + candidates[:start]
+        return min(rotated, key=lambda upstream: upstream.outstanding / upstream.weight)
+
+    def _pick_power_of_two(self, candidates):
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.choices(
+            candidates, weights=[upstream.weight for upstream in candidates], k=2
+        )  # nosec B311 - load spreading, not security
+        if second.outstanding / second.weight < first.outstanding / first.weight:
+            return second
+        return first
+
+    def acquire(self):
+        """
+        Pick the upstream for the current request and count it as in flight.
+        """
+        upstream = self.pick(self.candidates())
+        with self.lock:
+            upstream.outstanding += 1
+        return upstream
+
+    def release(self, upstream, failed=False):
+        """
+        End a request started with acquire(), recording whether the upstream failed it.
+        """
+        with self.lock:
+            upstream.outstanding -= 1
+            if not failed:
+                upstream.failures = 0
+                return
+            upstream.failures += 1
+            if upstream.failures < self.max_failures:
+                return
+            upstream.failures = 0
+            upstream.ejected_until = time.monotonic() + self.ejection_time
+            self.ejected += 1
+
+        if self.logger:
+            self.logger.warning(
+                "Destination %s ejected for %ss after %s consecutive failures.",
+                upstream.label,
+                self.ejection_time,
+                self.max_failures,
+            )
+
+
+def create_load_balancer(proxy_config, logger):
+    """
+    Create the load balancer for the "destinations" of the proxy configuration, if any.
+
+    :param proxy_config: The loaded proxy configuration.
+    :param logger: The logger from the Flask app to use for logging.
+    :return: LoadBalancer instance, or None with a single "destination".
+    """
+    destinations = proxy_config.get("destinations")
+    if not destinations:
+        return None
+
+    settings = load_upstream_settings()
+    options = proxy_config.get("load_balancing", {})
+    balancer = LoadBalancer(
+        # Each destination gets its own client, and with it its own connection pool
+        [Upstream(destination, UpstreamClient(**settings)) for destination in destinations],
+        algorithm=options.get("algorithm", "round_robin"),
+        max_failures=int(options.get("max_failures", DEFAULT_MAX_FAILURES)),
+        ejection_time=float(options.get("ejection_time", DEFAULT_EJECTION_TIME)),
+        logger=logger,
+    )
+    logger.info(
+        f"Load balancing over {len(destinations)} destinations with {balancer.algorithm}, "
+        f"ejection after {balancer.max_failures} consecutive failures for {balancer.ejection_time}s"
+    )
+    return balancer
@@ -0,0 +1,242 @@
+import os
+import zlib
+from flask import request, g
+from werkzeug.datastructures import ResponseCacheControl
+from werkzeug.http import parse_cache_control_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, brotli is offered when installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional, zstd is offered when installed
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024
+
+# Types worth compressing, "text/*" matches a whole family, +json/+xml suffixes always match
+DEFAULT_CONTENT_TYPES = (
+    "text/*",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class GzipEncoder:
+    """
+    Incremental gzip encoder, every chunk is flushed so streamed bodies stay progressive.
+    """
+
+    def __init__(self, level=6):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level=4):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level=3):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def available_encoders():
+    """
+    Encoders usable in this environment by content coding, most preferred first.
+    """
+    encoders = {}
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    encoders["gzip"] = GzipEncoder
+    return encoders
+
+
+def encode(encoder, data):
+    """
+    Compress a whole body with a new encoder.
+    """
+    return encoder.compress(data) + encoder.finish()
+
+
+class CompressedBody:
+    """
+    Response body wrapper compressing the chunks passing through the WSGI iterator.
+    """
+
+    def __init__(self, body, encoder):
+        self.body = body
+        self.encoder = encoder
+
+    def __iter__(self):
+        for chunk in self.body:
+            data = self.encoder.compress(chunk)
+            if data:
+                yield data
+        yield self.encoder.finish()
+
+    def close(self):
+        close = getattr(self.body, "close", None)
+        if close is not None:
+            close()
+
+
+class ResponseCompressor:
+    """
+    Compresses responses with the best content coding the client accepts (Accept-Encoding).
+
+    Only responses of an allowed Content-Type, not encoded already, without
+    "Cache-Control: no-transform" and of at least min_size bytes (when the size is known)
+    are compressed. Streamed bodies are compressed chunk by chunk. Bodies served from the
+    response cache are compressed once per coding and kept with the cache entry.
+    """
+
+    def __init__(
+        self,
+        min_size=DEFAULT_MIN_SIZE,
+        content_types=DEFAULT_CONTENT_TYPES,
+        levels=None,
+        cache=None,
+    ):
+        self.min_size = min_size
+        self.content_types = {t for t in content_types if not t.endswith("/*")}
+        self.type_families = tuple(t[:-1] for t in content_types if t.endswith("/*"))
+        self.levels = levels or {}
+        self.encoders = available_encoders()
+        self.codings = list(self.encoders)
+        self.cache = cache
+
+    def compressible(self, response):
+        """
+        Whether the response may be compressed, whatever the client accepts.
+        """
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if "Content-Encoding" in response.headers:
+            return False
+        mimetype = response.mimetype or ""
+        if not (
+            mimetype in self.content_types
+            or mimetype.startswith(self.type_families)
+            or mimetype.endswith(("+json", "+xml"))
+        ):
+            return False
+        cache_control = parse_cache_control_header(
+            response.headers.get("Cache-Control"), cls=ResponseCacheControl
+        )
+        return not cache_control.no_transform
+
+    def new_encoder(self, coding):
+        level = self.levels.get(coding)
+        if level is None:
+            return self.encoders[coding]()
+        return self.encoders[coding](level)
+
+    def compress(self, response):
+        """
+        After-request hook compressing the response for the current request.
+        """
+        if request.method == "HEAD" or not self.compressible(response):
+            return response
+        # The representation depends on Accept-Encoding even when it is not compressed
+        response.vary.add("Accept-Encoding")
+        content_length = response.content_length
+        if content_length is not None and content_length < self.min_size:
+            return response
+        coding = request.accept_encodings.best_match(self.codings)
+        if coding is None:
+            return response
+
+        if g.get("relayed_upstream"):
+            # The ASGI engine relays the body after the hooks ran and encodes it itself
+            g.relay_encoder = self.new_encoder(coding)
+        elif response.is_streamed:
+            response.response = CompressedBody(response.response, self.new_encoder(coding))
+        else:
+            data = response.get_data()
+            entry = g.get("cached_response")
+            if self.cache is not None and entry is not None:
+                body = self.cache.encoded(
+                    entry, coding, lambda body: encode(self.new_encoder(coding), body)
+                )
+            else:
+                body = encode(self.new_encoder(coding), data)
+            if len(body) >= len(data):
+                return response  # Already compressed content sent with a text type
+            response.set_data(body)
+
+        response.headers["Content-Encoding"] = coding
+        if response.is_streamed or g.get("relayed_upstream"):
+            response.headers.pop("Content-Length", None)
+        # Encoded bytes differ from the upstream's, a strong ETag would no longer be valid
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def register_compression(app, compressor):
+    """
+    Compress responses of the app; register after the metrics so their sizes are the sent ones.
+    """
+    app.after_request(compressor.compress)
+
+
+def create_response_compressor(logger, cache=None):
+    """
+    Create the response compressor based on environment settings.
+
+    :param logger: The logger from the Flask app to use for logging.
+    :param cache: Optional ResponseCache keeping the compressed bodies of its entries.
+    :return: ResponseCompressor instance, or None if compression is disabled.
+    """
+    if os.getenv("COMPRESSION_ENABLED", "false").lower() != "true":
+        return None
+
+    content_types = os.getenv("COMPRESSION_CONTENT_TYPES")
+    levels = {
+        coding: int(os.getenv(f"COMPRESSION_{name}_LEVEL"))
+        for coding, name in (("gzip", "GZIP"), ("br", "BROTLI"), ("zstd", "ZSTD"))
+        if os.getenv(f"COMPRESSION_{name}_LEVEL")
+    }
+    compressor = ResponseCompressor(
+        min_size=int(os.getenv("COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE)),
+        content_types=(
+            [t.strip() for t in content_types.split(",") if t.strip()]
+            if content_types
+            else DEFAULT_CONTENT_TYPES
+        ),
+        levels=levels,
+        cache=cache,
+    )
+    logger.info(
+        f"Response compression is enabled with {', '.join(compressor.codings)}, "
+        f"min_size={compressor.min_size}"
+    )
+    return compressor
@@ -0,0 +1,120 @@
+from flask import Response, request, jsonify
+
+DEFAULT_MAX_AGE = 600
+
+
+class CorsPolicy:
+    """
+    Answers CORS preflight requests (OPTIONS with Origin and Access-Control-Request-Method)
+    from rules_config.json without a round-trip to the destination, and adds
+    Access-Control-Allow-Origin to the other responses of allowed origins.
+    """
+
+    def __init__(
+        self,
+        allowed_origins,
+        allowed_methods,
+        allowed_headers=(),
+        max_age=DEFAULT_MAX_AGE,
+        allow_credentials=False,
+        logger=None,
+    ):
+        self.any_origin = "*" in allowed_origins
+        self.allowed_origins = set(allowed_origins) - {"*"}
+        self.allowed_methods = list(allowed_methods)
+        self.any_header = "*" in allowed_headers
+        self.allowed_headers = {name.lower() for name in allowed_headers}
+        self.max_age = max_age
+        self.allow_credentials = allow_credentials
+        self.logger = logger
+
+    def origin_allowed(self, origin):
+        return self.any_origin or origin in self.allowed_origins
+
+    def allow_origin(self, response, origin):
+        if self.any_origin and not self.allow_credentials:
+            response.headers["Access-Control-Allow-Origin"] = "*"
+        else:
+            # The exact origin (required with credentials), so the answer varies with it
+            response.headers["Access-Control-Allow-Origin"] = origin
+            response.vary.add("Origin")
+        if self.allow_credentials:
+            response.headers["Access-Control-Allow-Credentials"] = "true"
+
+    def preflight(self):
+        """
+        Before-request hook answering preflight requests, other requests go on unchanged.
+        """
+        origin = request.headers.get("Origin")
+        method = request.headers.get("Access-Control-Request-Method")
+        if request.method != "OPTIONS" or not origin or not method:
+            return None
+
+        requested_headers = request.headers.get("Access-Control-Request-Headers", "")
+        names = {name.strip().lower() for name in requested_headers.split(",")} - {""}
+        if (
+            not self.origin_allowed(origin)
+            or method not in self.allowed_methods
+            or not (self.any_header or names <= self.allowed_headers)
+        ):
+            if self.logger:
+                self.logger.warning(
+                    "CORS preflight from %s for %s refused.", origin, method
+                )
+            return jsonify({"error": "CORS preflight request not allowed"}), 403
+
+        response = Response(status=204)
+        del response.headers["Content-Type"]
+        self.allow_origin(response, origin)
+        response.headers["Access-Control-Allow-Methods"] = ", ".join(self.allowed_methods)
+        if names:
+            response.headers["Access-Control-Allow-Headers"] = requested_headers
+        response.headers["Access-Control-Max-Age"] = str(self.max_age)
+        return response
+
+    def add_headers(self, response):
+        """
+        After-request hook allowing allowed origins to read the response.
+        """
+        origin = request.headers.get("Origin")
+        if (
+            origin
+            and "Access-Control-Allow-Origin" not in response.headers
+            and self.origin_allowed(origin)
+        ):
+            self.allow_origin(response, origin)
+        return response
+
+
+def register_cors(app, policy):
+    app.before_request(policy.preflight)
+    app.after_request(policy.add_headers)
+
+
+def create_cors_policy(rules_config, logger):
+    """
+    Create the CORS policy based on rules_config.
+
+    :param rules_config: The configuration with cors_enabled and the cors_* settings.
+    :param logger: The logger from the Flask app to use for logging.
+    :return: CorsPolicy instance, or None if CORS is not answered by Dracan.
+    """
+    if not rules_config.get("cors_enabled", False):
+        logger.info("CORS preflight handling is disabled.")
+        return None
+
+    policy = CorsPolicy(
+        allowed_origins=rules_config.get("cors_allowed_origins", []),
+        allowed_methods=rules_config.get(
+            "allowed_methods", ["GET", "POST", "PUT", "DELETE"]
+        ),
+        allowed_headers=rules_config.get("cors_allowed_headers", []),
+        max_age=int(rules_config.get("cors_max_age", DEFAULT_MAX_AGE)),
+        allow_credentials=rules_config.get("cors_allow_credentials", False),
+        logger=logger,
+    )
+    logger.info(
+        "CORS preflight requests are answered by Dracan. Allowed origins: "
+        + " | ".join(rules_config.get("cors_allowed_origins", []))
+    )
+    return policy
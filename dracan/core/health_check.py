@@ -1,48 +1,216 @@
 import os
 import json
+import time
+import socket
+import threading
 from datetime import datetime
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ..utils.config_load import load_proxy_config
+
+LIVENESS_BODY = json.dumps({"status": "running"}).encode()
+
+
+class UpstreamProber:
+    """
+    Checks the destinations from proxy_config.json in a background thread and caches
+    the outcome, so health requests are answered from memory without any I/O.
+
+    A destination is probed with a TCP connect, or with a GET of probe_path when set
+    (any status below 500 counts as healthy). The proxy is ready while at least one
+    destination is healthy, and not ready until the first round of probes completed.
+    """
+
+    def __init__(self, destinations, interval=5.0, timeout=2.0, probe_path=None):
+        self.destinations = [
+            (f"{destination['host']}:{destination['port']}", destination)
+            for destination in destinations
+        ]
+        self.interval = interval
+        self.timeout = timeout
+        self.probe_path = probe_path
+        self.stop_event = threading.Event()
+        self.thread = None
+        # Prepared readiness answer (status, body), replaced as a whole after each round
+        self.readiness = (
+            503,
+            json.dumps({"status": "starting", "upstreams": {}}).encode(),
+        )
+
+    def probe(self, destination):
+        """
+        Return whether the destination answers within the timeout.
+        """
+        try:
+            if self.probe_path is None:
+                with socket.create_connection(
+                    (destination["host"], destination["port"]), timeout=self.timeout
+                ):
+                    return True
+            connection = HTTPConnection(
+                destination["host"], destination["port"], timeout=self.timeout
+            )
+            try:
+                connection.request("GET", self.probe_path)
+                return connection.getresponse().status < 500
+            finally:
+                connection.close()
+        except OSError:
+            return False
+
+    def probe_all(self):
+        """
+        Probe every destination once and publish the new readiness answer.
+        """
+        upstreams = {
+            label: "up" if self.probe(destination) else "down"
+            for label, destination in self.destinations
+        }
+        ready = "up" in upstreams.values()
+        body = {
+            "status": "ready" if ready else "unavailable",
+            "upstreams": upstreams,
+            "checked_at": int(time.time()),
+        }
+        self.readiness = (200 if ready else 503, json.dumps(body).encode())
+
+    def run(self):
+        while True:
+            self.probe_all()
+            if self.stop_event.wait(self.interval):
+                return
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+def create_upstream_prober(proxy_config=None):
+    """
+    Create the destination prober based on environment settings.
+
+    :param proxy_config: Optional loaded proxy configuration, read from proxy_config.json if omitted.
+    :return: UpstreamProber instance (not started), or None if probing is disabled.
+    """
+    if os.getenv("HEALTHCHECK_PROBE_ENABLED", "true").lower() != "true":
+        return None
+
+    proxy_config = proxy_config or load_proxy_config()
+    destinations = proxy_config.get("destinations") or [proxy_config["destination"]]
+    return UpstreamProber(
+        destinations,
+        interval=float(os.getenv("HEALTHCHECK_PROBE_INTERVAL", 5)),
+        timeout=float(os.getenv("HEALTHCHECK_PROBE_TIMEOUT", 2)),
+        probe_path=os.getenv("HEALTHCHECK_PROBE_PATH") or None,
+    )
 
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
     """
     A simple HTTP request handler for health check purposes.
 
-    This handler responds to GET requests on the root ("/") path with a JSON
-    response indicating the service is "running". Requests to any other path
-    result in a 404 Not Found response.
+    This handler responds to GET requests on the root ("/") and "/live" paths with a
+    JSON response indicating the service is "running" (liveness). "/ready" answers
+    from the state cached by the server's UpstreamProber (readiness): 200 while a
+    destination is reachable, 503 otherwise, and 200 when no prober is attached.
+    Requests to any other path result in a 404 Not Found response.
 
     Methods:
-        do_get: Handles HTTP GET requests. Sends a 200 OK response with a
-                JSON payload {"status": "running"} if the path is "/".
+        do_get: Handles HTTP GET requests on "/", "/live" and "/ready".
                 Otherwise, responds with a 404 Not Found.
     """
 
+    # Socket timeout in seconds, a stuck client only holds its own thread until it expires
+    timeout = 5
+
+    def setup(self):
+        self.timeout = getattr(self.server, "request_timeout", self.timeout)
+        super().setup()
+
     def log_message(self, format, *args):
         """Override to disable logging of HTTP requests in console."""
         pass
 
-    def do_GET(self):
-        if self.path == "/":
-            # Send a 200 OK response
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
+    def send_json(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
-            # Write JSON response
-            response = json.dumps({"status": "running"})
-            self.wfile.write(response.encode())
+    def do_GET(self):
+        if self.path in ("/", "/live"):
+            # Liveness only tells the process is serving, never depends on the destination
+            self.send_json(200, LIVENESS_BODY)
+        elif self.path == "/ready":
+            prober = getattr(self.server, "prober", None)
+            if prober is None:
+                self.send_json(200, LIVENESS_BODY)
+            else:
+                self.send_json(*prober.readiness)
         else:
             # Send a 404 Not Found response for other paths
             self.send_response(404)
             self.end_headers()
 
 
-def run_health_check_server():
+class HealthCheckServer(ThreadingHTTPServer):
+    """
+    Health check server handling every connection in its own thread, so one slow or stuck
+    probe connection cannot delay the others.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, prober=None, request_timeout=5):
+        self.prober = prober
+        self.request_timeout = request_timeout
+        super().__init__(server_address, HealthCheckHandler)
+
+
+def create_health_check_server():
+    """
+    Create the health check server and start its destination prober, based on environment settings.
+
+    :return: HealthCheckServer instance, not serving yet.
+    """
     health_port = int(os.getenv("HEALTHCHECK_PORT", 9000))
-    server_address = ("", health_port)
-    httpd = HTTPServer(server_address, HealthCheckHandler)
+    request_timeout = float(os.getenv("HEALTHCHECK_REQUEST_TIMEOUT", 5))
+    prober = create_upstream_prober()
+    httpd = HealthCheckServer(("", health_port), prober, request_timeout)
+    if prober is not None:
+        prober.start()
     # Get the current timestamp and print the message with date and time (emulate logger for information about setting up HC)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S,%f")[:-3]
     print(f"{timestamp} [INFO] Health check server running on port {health_port}")
+    return httpd
+
+
+def start_health_check_server():
+    """
+    Serve health checks from a background thread, e.g. in the monitoring process of the gunicorn master.
+
+    :return: The running HealthCheckServer, stopped with stop_health_check_server().
+    """
+    httpd = create_health_check_server()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd
+
+
+def stop_health_check_server(httpd):
+    httpd.shutdown()
+    httpd.server_close()
+    if httpd.prober is not None:
+        httpd.prober.stop()
+
+
+def run_health_check_server():
+    httpd = create_health_check_server()
     httpd.serve_forever()
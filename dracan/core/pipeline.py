@@ -0,0 +1,82 @@
+import time
+from ..validators.method_validator import create_method_validator
+from ..validators.path_validator import create_path_validator
+from ..validators.headers_validator import create_header_validator
+from ..validators.json_validator import create_json_validator
+from ..middleware.payload_limiter import create_payload_size_limiter
+
+# Validation stages, cheapest first: (stage name, rules_config flag, validator factory)
+VALIDATION_STAGES = [
+    ("method", "method_validation_enabled", create_method_validator),
+    ("payload", "payload_limiting_enabled", create_payload_size_limiter),
+    ("path", "uri_validation_enabled", create_path_validator),
+    ("headers", "header_validation_enabled", create_header_validator),
+    ("json", "json_validation_enabled", create_json_validator),
+]
+
+
+class ValidationPipeline:
+    """
+    The enabled validation stages fused into a single callable.
+
+    Stages run in order and the first failing one short-circuits the pipeline. The pipeline
+    follows the validator contract, returning Tuple (is_valid, response).
+    """
+
+    def __init__(self, stages, observer=None):
+        """
+        :param stages: List of (stage name, validator) tuples.
+        :param observer: Optional function called with (stage name, seconds) after every stage.
+        """
+        self.stages = list(stages)
+        self.validators = tuple(validator for _, validator in self.stages)
+        self.observer = observer
+
+    @property
+    def stage_names(self):
+        return [name for name, _ in self.stages]
+
+    def __call__(self):
+        if self.observer is not None:
+            return self._run_observed()
+
+        for validator in self.validators:
+            is_valid, response = validator()
+            if not is_valid:
+                return False, response
+        return True, None
+
+    def _run_observed(self):
+        observer = self.observer
+        for name, validator in self.stages:
+            start_time = time.perf_counter()
+            is_valid, response = validator()
+            observer(name, time.perf_counter() - start_time)
+            if not is_valid:
+                return False, response
+        return True, None
+
+
+def create_validation_pipeline(rules_config, logger, enabled_stages=None, observer=None):
+    """
+    Creates the validation pipeline holding only the stages enabled by rules_config.
+
+    :param rules_config: The configuration that contains the validation rules.
+    :param logger: The logger from the Flask app to use for logging.
+    :param enabled_stages: Optional set of stage names allowed by the environment, all if omitted.
+    :param observer: Optional function called with (stage name, seconds) after every stage.
+    :return: ValidationPipeline instance.
+    """
+    stages = []
+    for name, enabled_flag, create_validator in VALIDATION_STAGES:
+        if enabled_stages is not None and name not in enabled_stages:
+            continue
+        validator = create_validator(rules_config, logger)
+        if rules_config.get(enabled_flag, False):
+            stages.append((name, validator))
+
+    pipeline = ValidationPipeline(stages, observer=observer)
+    logger.info(
+        f"Validation pipeline stages: {' -> '.join(pipeline.stage_names) or 'none'}"
+    )
+    return pipeline
@@ -1,119 +1,442 @@
 import json
 import os
+import time
 import requests
-from flask import request, jsonify, current_app as app
+from flask import Response, request, jsonify, current_app as app
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import HTTPException
+from .upstream import PROXY_TIMEOUT
+from .balancer import FAILURE_STATUSES
 from ..utils.config_load import load_proxy_config, load_rules_config
+from ..utils.metrics import record_phase
 
-# Set a default timeout in seconds if PROXY_TIMEOUT is not specified in the environment
-PROXY_TIMEOUT = int(os.getenv("PROXY_TIMEOUT", 180))
+# Headers meaningful only for a single transport-level connection (RFC 9110, section 7.6.1)
+HOP_BY_HOP_HEADERS = frozenset(
+    [
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "proxy-connection",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    ]
+)
 
+# Client validators replaced by those of a stale cached response when revalidating it
+CONDITIONAL_HEADERS = frozenset(["if-none-match", "if-modified-since"])
 
-def forward_request(request, config, sub=None):
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class UpstreamResponseTooLarge(Exception):
+    """
+    Raised when a buffered upstream response body exceeds the configured limit.
+    """
+
+
+def filter_hop_by_hop_headers(headers):
+    """
+    Drop hop-by-hop headers, including the ones nominated by the Connection header.
+
+    :param headers: Header mapping or list of (name, value) pairs.
+    :return: List of (name, value) pairs safe to relay to the next hop.
+    """
+    items = list(headers.items()) if hasattr(headers, "items") else list(headers)
+    dropped = set(HOP_BY_HOP_HEADERS)
+    for name, value in items:
+        if name.lower() == "connection":
+            dropped.update(
+                token.strip().lower() for token in value.split(",") if token.strip()
+            )
+    return [(name, value) for name, value in items if name.lower() not in dropped]
+
+
+class _RequestBodyStream:
+    """
+    File-like view of an incoming body of known length. Exposing ``len`` makes requests
+    send it with a Content-Length header instead of falling back to chunked encoding.
+    """
+
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.len = length
+
+    def read(self, size=-1):
+        return self.stream.read(size)
+
+
+def has_request_body(request):
+    """
+    Whether the client sent a body, whatever the method (e.g. PATCH, or DELETE with a body).
+    """
+    if getattr(request, "_cached_data", None):
+        return True
+    if request.content_length:
+        return True
+    return "chunked" in request.headers.get("Transfer-Encoding", "").lower()
+
+
+def request_body(request, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Return the incoming body in a form forwarding the original bytes unchanged.
+
+    A body already read by a validator (e.g. JSON validation) is reused from Flask's cache,
+    otherwise it is streamed from request.stream without being loaded into memory.
+
+    :param request: The original incoming request.
+    :param chunk_size: Size of the reads for bodies sent without Content-Length.
+    :return: Bytes, a file-like object or an iterator of chunks accepted by requests' data=.
+    """
+    # Same attribute werkzeug uses to cache the body read by get_data() / get_json()
+    cached_data = getattr(request, "_cached_data", None)
+    if cached_data is not None:
+        return cached_data
+
+    content_length = request.content_length
+    if content_length is not None:
+        return _RequestBodyStream(request.stream, content_length) if content_length else b""
+
+    # Chunked upload without Content-Length, relayed to the upstream chunked as well
+    return iter(lambda: request.stream.read(chunk_size), b"")
+
+
+def stream_upstream_body(upstream_response, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the upstream body exactly as received, in chunks of at most chunk_size bytes.
+    The upstream response is closed once the body is consumed or the client goes away.
+    """
+    chunks = upstream_response.raw.stream(chunk_size, decode_content=False)
+    reading = 0.0  # Time spent waiting for the upstream, not for the client
+    try:
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            reading += time.perf_counter() - started
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        upstream_response.close()
+        record_phase("upstream_body", reading)
+
+
+def read_upstream_body(upstream_response, chunk_size=DEFAULT_CHUNK_SIZE, max_size=0):
+    """
+    Read the whole upstream body into memory, refusing bodies larger than max_size.
+
+    :param upstream_response: Streamed response returned by forward_request.
+    :param chunk_size: Size of the reads from the upstream socket.
+    :param max_size: Maximum body size in bytes, 0 disables the limit.
+    :return: Body as bytes, still content-encoded as sent by the upstream.
+    """
+    started = time.perf_counter()
+    try:
+        declared_size = upstream_response.headers.get("Content-Length")
+        if max_size and declared_size and declared_size.isdigit():
+            if int(declared_size) > max_size:
+                raise UpstreamResponseTooLarge(
+                    f"Upstream response exceeds the limit of {max_size} bytes"
+                )
+
+        chunks = []
+        size = 0
+        for chunk in upstream_response.raw.stream(chunk_size, decode_content=False):
+            size += len(chunk)
+            if max_size and size > max_size:
+                raise UpstreamResponseTooLarge(
+                    f"Upstream response exceeds the limit of {max_size} bytes"
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        upstream_response.close()
+        record_phase("upstream_body", time.perf_counter() - started)
+
+
+def relay_upstream_response(
+    upstream_response, stream=False, chunk_size=DEFAULT_CHUNK_SIZE, max_buffered_size=0
+):
+    """
+    Turn the upstream response into a Flask response for the client.
+
+    :param upstream_response: Streamed response returned by forward_request.
+    :param stream: Relay the body chunk by chunk instead of buffering it first.
+    :param chunk_size: Size of the chunks read from the upstream.
+    :param max_buffered_size: Maximum size of a buffered body, 0 disables the limit.
+    :return: Flask Response object.
+    """
+    headers = filter_hop_by_hop_headers(upstream_response.raw.headers)
+
+    if request.method == "HEAD":
+        # Nothing to download, the upstream Content-Length describes the GET representation
+        read_upstream_body(upstream_response, chunk_size)
+        return Response(status=upstream_response.status_code, headers=headers)
+
+    if stream:
+        # Body is relayed undecoded, so upstream Content-Length and Content-Encoding stay valid
+        return Response(
+            stream_upstream_body(upstream_response, chunk_size),
+            status=upstream_response.status_code,
+            headers=headers,
+        )
+
+    body = read_upstream_body(upstream_response, chunk_size, max_buffered_size)
+    return Response(body, status=upstream_response.status_code, headers=headers)
+
+
+def revalidation_headers(headers, validators):
+    """
+    Replace the client's conditional headers with the validators of a stale cached response.
+
+    :param headers: Iterable of (name, value) request headers.
+    :param validators: Dict of If-None-Match/If-Modified-Since headers from CachedResponse.validators().
+    :return: List of (name, value) tuples.
+    """
+    kept = [
+        (name, value)
+        for name, value in headers
+        if name.lower() not in CONDITIONAL_HEADERS
+    ]
+    return kept + list(validators.items())
+
+
+def cache_upstream_response(
+    cache, key, upstream_response, stale=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """
+    Read a cacheable upstream response in full and store it in the response cache.
+
+    :param cache: The ResponseCache.
+    :param key: Primary cache key of the current request.
+    :param upstream_response: Streamed response returned by forward_request.
+    :param stale: Optional stale CachedResponse whose validators were sent to the destination.
+    :return: Flask Response built from the new entry, or None if the response is not cacheable.
+    """
+    headers = Headers(filter_hop_by_hop_headers(upstream_response.raw.headers))
+    if stale is not None and upstream_response.status_code == 304:
+        # Unchanged: only headers were transferred, the stored body is served again
+        read_upstream_body(upstream_response, chunk_size)
+        return cache.revalidated(key, request.headers, stale, headers).response(request)
+
+    lifetime = cache.lifetime(upstream_response.status_code, headers, request.headers)
+    if lifetime is None:
+        return None
+
+    body = read_upstream_body(upstream_response, chunk_size, cache.max_entry_bytes)
+    entry = cache.store(
+        key, request.headers, upstream_response.status_code, headers, body, lifetime
+    )
+    return entry.response(request)
+
+
+def create_response_relay(logger):
+    """
+    Creates a function relaying upstream responses based on environment settings.
+
+    :param logger: The logger from the Flask app to use for logging.
+    :return: A function turning an upstream response into a Flask response.
+    """
+    stream_responses = os.getenv("PROXY_STREAM_RESPONSES", "false").lower() == "true"
+    chunk_size = int(os.getenv("PROXY_STREAM_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+    max_buffered_size = int(os.getenv("PROXY_MAX_BUFFERED_RESPONSE_SIZE", 0))
+
+    def relay_response(upstream_response):
+        return relay_upstream_response(
+            upstream_response,
+            stream=stream_responses,
+            chunk_size=chunk_size,
+            max_buffered_size=max_buffered_size,
+        )
+
+    if stream_responses:
+        logger.info(
+            f"Response streaming is enabled with chunk size: {chunk_size} bytes."
+        )
+    else:
+        logger.info(
+            f"Response streaming is disabled, upstream bodies are buffered (limit: {max_buffered_size or 'none'})."
+        )
+
+    return relay_response
+
+
+def build_destination_url(config, sub=None):
+    """
+    Build the destination URL based on the proxy configuration and the optional sub-path.
+    """
+    destination = config["destination"]
+    destination_url = (
+        f"http://{destination['host']}:{destination['port']}{destination['path']}"
+    )
+    if sub:
+        destination_url = f"{destination_url}/{sub}"
+    return destination_url
+
+
+def forward_request(
+    request, config, sub=None, client=None, upstream=None, validators=None
+):
     """
     Forward the incoming request to the destination service.
     :param request: The original incoming request.
     :param config: The loaded proxy configuration.
     :param sub: Optional additional path after the base URL.
+    :param client: Optional pooled UpstreamClient, a fresh connection is used per request if omitted.
+    :param upstream: Optional Upstream picked by the load balancer, its URL and client are used instead.
+    :param validators: Optional conditional headers of a stale cached response, sent instead of the client's.
     :return: Response from the destination service.
     """
+    if upstream is not None:
+        client = upstream.client
+
+    # Without a pooled client fall back to module-level requests (one connection per request)
+    timeout = client.timeout if client else PROXY_TIMEOUT
+    client = client or requests
+
     # Build the destination URL based on the proxy configuration and subpath
-    destination_url = f"http://{config['destination']['host']}:{config['destination']['port']}{config['destination']['path']}"
-    if sub:
-        destination_url = f"{destination_url}/{sub}"
+    if upstream is not None:
+        destination_url = upstream.url(sub)
+    else:
+        destination_url = build_destination_url(config, sub)
 
-    app.logger.info(
-        f"Forwarding {request.method} request to {destination_url}"
+    app.logger.debug(
+        "Forwarding %s request to %s", request.method, destination_url
     )  # Log request forwarding
 
-    # Forward the request based on its method
+    # Client headers minus hop-by-hop ones, the body is forwarded byte for byte
+    headers = filter_hop_by_hop_headers(request.headers)
+    if validators:
+        headers = revalidation_headers(headers, validators)
+    headers = dict(headers)
+
+    # One code path for every configured method, a body is forwarded only if the client sent one
     try:
-        if request.method == "GET":
-            response = requests.get(
-                destination_url,
-                headers=request.headers,
-                params=request.args,
-                timeout=PROXY_TIMEOUT,
-            )
-        elif request.method == "POST":
-            response = requests.post(
-                destination_url,
-                headers=request.headers,
-                json=request.get_json(),
-                timeout=PROXY_TIMEOUT,
-            )
-        elif request.method == "PUT":
-            response = requests.put(
-                destination_url,
-                headers=request.headers,
-                json=request.get_json(),
-                timeout=PROXY_TIMEOUT,
-            )
-        elif request.method == "DELETE":
-            response = requests.delete(
-                destination_url, headers=request.headers, timeout=PROXY_TIMEOUT
-            )
+        # Returns once the response headers arrived, the body is read by the relay
+        started = time.perf_counter()
+        response = client.request(
+            request.method,
+            destination_url,
+            headers=headers,
+            params=request.args,
+            data=request_body(request) if has_request_body(request) else None,
+            timeout=timeout,
+            stream=True,
+            allow_redirects=False,  # Redirects are relayed to the client
+        )
+        record_phase("upstream_ttfb", time.perf_counter() - started)
 
-        app.logger.info(
-            f"Received {response.status_code} from {destination_url}"
+        app.logger.debug(
+            "Received %s from %s", response.status_code, destination_url
         )  # Log response status
         return response
 
     except requests.exceptions.RequestException as e:
         # Log any exception that occurs during forwarding
-        app.logger.error(f"Error forwarding request to {destination_url}: {str(e)}")
+        app.logger.error("Error forwarding request to %s: %s", destination_url, e)
         raise
 
 
+def forwarding_error_response(error):
+    """
+    Turn an error raised while forwarding a request into the response sent to the client.
+
+    :param error: The exception raised by the forwarding or the relay.
+    :return: Tuple (response, status): 502 for a too large upstream response, 500 otherwise.
+    """
+    # Handle any exception during the forwarding process and log it
+    app.logger.error(f"Error during request forwarding: {str(error)}")
+    status = 502 if isinstance(error, UpstreamResponseTooLarge) else 500
+    return jsonify({"error": str(error)}), status
+
+
 def handle_proxy(
     config,
-    validate_method,
-    validate_json,
-    validate_headers,
-    validate_payload_size=None,
+    validate_request,
     sub=None,
+    client=None,
+    relay_response=None,
+    balancer=None,
+    cache=None,
 ):
     """
-    Handle the request forwarding after validating the method, JSON body, headers, and optional payload size.
+    Handle the request forwarding after running the validation pipeline.
 
     :param config: The proxy configuration for the destination service.
-    :param validate_method: The method validator function.
-    :param validate_json: The JSON validator function.
-    :param validate_headers: The headers validator function.
-    :param validate_payload_size: Optional function to validate payload size.
+    :param validate_request: The validation pipeline (or any validator) returning Tuple (is_valid, response).
     :param sub: Optional substring for additional path handling.
+    :param client: Optional pooled UpstreamClient used to reach the destination.
+    :param relay_response: Optional function turning the upstream response into a Flask response.
+    :param balancer: Optional LoadBalancer picking one of several destinations instead of config and client.
+    :param cache: Optional ResponseCache answering GET requests without reaching the destination.
     :return: Response object or error response.
     """
-    # First, validate the method
-    is_valid, validation_response = validate_method()
+    # Run the enabled validation stages, the first failure ends the request
+    is_valid, validation_response = validate_request()
     if not is_valid:
-        app.logger.warning("Method validation failed")
         return validation_response
 
-    # Validate the request's JSON (if applicable)
-    is_valid, validation_response = validate_json()
-    if not is_valid:
-        app.logger.warning("JSON validation failed")
-        return validation_response
-
-    # Validate the request's headers
-    is_valid, validation_response = validate_headers()
-    if not is_valid:
-        app.logger.warning("Headers validation failed")
-        return validation_response
-
-    # Validate the payload size if the function is provided
-    if validate_payload_size:
-        is_valid, validation_response = validate_payload_size()
-        if not is_valid:
-            app.logger.warning("Payload size validation failed")
-            return validation_response
+    cache_key = cache.request_key(request) if cache is not None else None
+    upstream = None
+    flight = None
+    stale = None
+    error = None
 
     # If all validations pass, forward the request
     try:
-        response = forward_request(request, config, sub=sub)
-        return (response.content, response.status_code, response.headers.items())
+        if cache_key is not None:
+            cached = cache.lookup(cache_key, request.headers)
+            if cached is None or not cached.fresh:
+                # Identical requests in flight answer this one too, or share their failure
+                flight, shared, error = cache.coalesce(cache_key, request.headers)
+                if error is not None:
+                    # Answered like the leading request, its exception object is not raised again
+                    return forwarding_error_response(error)
+                cached = shared or cached
+            if cached is not None and cached.fresh:
+                return cached.response(request)
+            stale = cached
+
+        upstream = balancer.acquire() if balancer is not None else None
+        response = forward_request(
+            request,
+            config,
+            sub=sub,
+            client=client,
+            upstream=upstream,
+            validators=stale.validators() if stale is not None else None,
+        )
+        relayed = None
+        if cache_key is not None:
+            relayed = cache_upstream_response(cache, cache_key, response, stale)
+        if relayed is None and relay_response:
+            relayed = relay_response(response)
+        elif relayed is None:
+            relayed = relay_upstream_response(response)
+        if upstream is not None:
+            # The upstream stays in flight until its body has been relayed
+            failed = response.status_code in FAILURE_STATUSES
+            relayed.call_on_close(lambda: balancer.release(upstream, failed))
+        return relayed
+
+    except HTTPException:
+        # e.g. 413 raised while a chunked body is streamed past the payload limit
+        if upstream is not None:
+            balancer.release(upstream)
+        raise
 
     except Exception as e:
-        # Handle any exception during the forwarding process and log it
-        app.logger.error(f"Error during request forwarding: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        error = e
+        if upstream is not None:
+            # Connection errors and timeouts count towards passive ejection
+            balancer.release(
+                upstream, failed=isinstance(e, requests.exceptions.RequestException)
+            )
+        return forwarding_error_response(e)
+
+    finally:
+        if flight is not None:
+            # The response is stored (or known not to be cacheable), wake up the waiting requests
+            cache.flights.finish(cache_key, flight, error)
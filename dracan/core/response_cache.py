@@ -0,0 +1,457 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode
+from flask import Response, g
+from werkzeug.datastructures import Headers, RequestCacheControl, ResponseCacheControl
+from werkzeug.http import parse_cache_control_header, parse_date
+from ..utils.metrics import (
+    RESPONSE_CACHE_REQUESTS,
+    RESPONSE_CACHE_EVICTIONS,
+    RESPONSE_CACHE_COALESCED,
+    RESPONSE_CACHE_BYTES,
+    RESPONSE_CACHE_ENTRIES,
+)
+
+# Statuses cacheable by default (RFC 9110, section 15.1) relayed as complete bodies
+CACHEABLE_STATUSES = frozenset([200, 203, 300, 301, 404, 410])
+
+# Estimated bookkeeping cost of one entry, counted against the byte budget
+ENTRY_OVERHEAD = 256
+
+# Headers of a 304 Not Modified answer that must not replace the stored ones (RFC 9111, section 3.2)
+UNUPDATED_HEADERS = frozenset(["content-length", "content-encoding", "content-range"])
+
+
+class CachedResponse:
+    """
+    A stored upstream response: status, headers without hop-by-hop ones, and body.
+
+    Expired entries with an ETag or Last-Modified are kept, so they can be revalidated
+    with a conditional request instead of being fetched again.
+    """
+
+    __slots__ = (
+        "status",
+        "headers",
+        "body",
+        "stored_at",
+        "expires_at",
+        "age",
+        "size",
+        "encodings",
+        "full_key",
+    )
+
+    def __init__(self, status, headers, body, lifetime, age=0):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + lifetime
+        self.age = age
+        # Compressed bodies by content coding, see ResponseCache.encoded()
+        self.encodings = {}
+        self.full_key = None
+        self.size = (
+            len(body)
+            + sum(len(name) + len(value) for name, value in headers)
+            + ENTRY_OVERHEAD
+        )
+
+    @property
+    def fresh(self):
+        return self.expires_at > time.monotonic()
+
+    def validators(self):
+        """
+        Conditional request headers revalidating this entry with the destination.
+        """
+        validators = {}
+        if "ETag" in self.headers:
+            validators["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            validators["If-Modified-Since"] = self.headers["Last-Modified"]
+        return validators
+
+    def response(self, request=None):
+        """
+        Build a new Flask response with an Age header counting the time spent in the cache.
+
+        :param request: Optional client request, answered with 304 Not Modified when its
+                        If-None-Match or If-Modified-Since match the entry.
+        """
+        age = self.age + int(time.monotonic() - self.stored_at)
+        # A copy, werkzeug would otherwise let the response change the stored headers
+        response = Response(self.body, status=self.status, headers=self.headers.copy())
+        response.headers["Age"] = str(age)
+        if request is not None:
+            g.cached_response = self  # Lets compression reuse the encoded bodies of the entry
+            if self.status == 200:
+                response.make_conditional(request)
+        return response
+
+
+def cache_key(path, query_string):
+    """
+    Primary key of a GET request: path and query parameters in a stable order.
+    """
+    if not query_string:
+        return path
+    query = urlencode(sorted(parse_qsl(query_string, keep_blank_values=True)))
+    return f"{path}?{query}"
+
+
+def vary_names(headers):
+    """
+    Request headers the response varies on, lower-cased, or None for "Vary: *".
+    """
+    names = set()
+    for name in headers.get("Vary", "").split(","):
+        name = name.strip().lower()
+        if name == "*":
+            return None
+        if name:
+            names.add(name)
+    return tuple(sorted(names))
+
+
+def storable(headers, request_headers):
+    """
+    Whether a shared cache may store the response at all, fresh or not.
+
+    :param headers: Headers of the upstream response.
+    :param request_headers: Headers of the request that produced it.
+    """
+    cache_control = parse_cache_control_header(
+        headers.get("Cache-Control"), cls=ResponseCacheControl
+    )
+    if cache_control.no_store or cache_control.private or "Set-Cookie" in headers:
+        return False
+    return "Authorization" not in request_headers or bool(
+        cache_control.public or cache_control.s_maxage is not None
+    )
+
+
+def freshness_lifetime(headers, request_headers, default_ttl=0):
+    """
+    Seconds a response may be served from a shared cache without revalidation, 0 when it
+    must not be stored or has to be revalidated first.
+
+    :param headers: Headers of the upstream response.
+    :param request_headers: Headers of the request that produced it.
+    :param default_ttl: Lifetime of responses without Cache-Control max-age or Expires.
+    """
+    cache_control = parse_cache_control_header(
+        headers.get("Cache-Control"), cls=ResponseCacheControl
+    )
+    if cache_control.no_cache or not storable(headers, request_headers):
+        return 0
+
+    if cache_control.s_maxage is not None:
+        lifetime = cache_control.s_maxage
+    elif cache_control.max_age is not None:
+        lifetime = cache_control.max_age
+    elif headers.get("Expires") is not None:
+        expires = parse_date(headers.get("Expires"))
+        if expires is None:
+            return 0  # Invalid dates mean already expired
+        date = parse_date(headers.get("Date")) or datetime.now(timezone.utc)
+        lifetime = (expires - date).total_seconds()
+    else:
+        lifetime = default_ttl
+
+    age = headers.get("Age", "0")
+    return max(0, lifetime - (int(age) if age.isdigit() else 0))
+
+
+class Flight:
+    """
+    One upstream request that concurrent identical requests wait for.
+    """
+
+    __slots__ = ("done", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Lets a single request per key reach the destination while identical ones arriving in
+    the meantime wait for it, at most timeout seconds, instead of sending their own.
+
+    Flights only exist within a process: the threads of one worker wait for each other,
+    workers never wait on another worker, so they cannot deadlock.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def begin(self, key):
+        """
+        Return Tuple (flight, leader): the in-flight request for key, or a new one led by the caller.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self.flights[key] = Flight()
+            return flight, True
+
+    def finish(self, key, flight, error=None):
+        """
+        End a flight started by begin(), waking up the requests waiting for it.
+        """
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+        flight.error = error
+        flight.done.set()
+
+
+class ResponseCache:
+    """
+    In-process cache of upstream GET responses, shared by the threads of a worker.
+
+    Entries are keyed by path, sorted query and the request values of the headers named in
+    the response's Vary. The cache is an LRU bounded by max_bytes (bodies, headers and a
+    fixed overhead per entry). Responses are stored only if Cache-Control/Expires (or
+    default_ttl) give them a lifetime or they carry a validator (ETag, Last-Modified), they
+    have no Set-Cookie and fit in max_entry_bytes. Expired entries without a validator are
+    dropped when looked up or reached by eviction, the others are kept for revalidation.
+    """
+
+    def __init__(self, max_bytes, max_entry_bytes, default_ttl=0, flights=None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.default_ttl = default_ttl
+        # Optional SingleFlight coalescing concurrent misses of the same key
+        self.flights = flights
+        self.entries = OrderedDict()
+        # Primary key -> [Vary header names, number of stored variants]
+        self.variants = {}
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def request_key(self, request):
+        """
+        Return the primary key of a cacheable request, or None if the cache must be bypassed.
+        """
+        if request.method != "GET":
+            return None
+        cache_control = parse_cache_control_header(
+            request.headers.get("Cache-Control"), cls=RequestCacheControl
+        )
+        if (
+            cache_control.no_cache
+            or cache_control.no_store
+            or request.headers.get("Pragma") == "no-cache"
+        ):
+            RESPONSE_CACHE_REQUESTS.labels(result="bypass").inc()
+            return None
+        return cache_key(request.path, request.environ.get("QUERY_STRING", ""))
+
+    def lookup(self, key, request_headers):
+        """
+        Return the CachedResponse for the request, or None on a miss.
+
+        The entry is only served as is when fresh, a stale one has to be revalidated.
+        """
+        entry = self._get(key, request_headers)
+        if entry is None:
+            result = "miss"
+        else:
+            result = "hit" if entry.fresh else "stale"
+        RESPONSE_CACHE_REQUESTS.labels(result=result).inc()
+        return entry
+
+    def coalesce(self, key, request_headers):
+        """
+        After a miss, wait for an identical request already sent to the destination, or lead a new one.
+
+        :return: Tuple (flight, entry, error): the flight to finish when this request leads it,
+                 the response shared by the leading request, or the error it failed with.
+                 All None when the request has to be sent on its own.
+        """
+        if self.flights is None:
+            return None, None, None
+        flight, leader = self.flights.begin(key)
+        if leader:
+            return flight, None, None
+
+        if not flight.done.wait(self.flights.timeout):
+            RESPONSE_CACHE_COALESCED.labels(result="timeout").inc()
+            return None, None, None
+        if flight.error is not None:
+            RESPONSE_CACHE_COALESCED.labels(result="error").inc()
+            return None, None, flight.error
+        # Not stored when the response was not cacheable or varies on other header values
+        entry = self._get(key, request_headers)
+        if entry is not None and not entry.fresh:
+            entry = None
+        RESPONSE_CACHE_COALESCED.labels(
+            result="not_shared" if entry is None else "shared"
+        ).inc()
+        return None, entry, None
+
+    def _get(self, key, request_headers):
+        with self.lock:
+            variant = self.variants.get(key)
+            entry = None
+            if variant is not None:
+                full_key = (key, tuple(request_headers.get(name, "") for name in variant[0]))
+                entry = self.entries.get(full_key)
+                if entry is not None:
+                    if entry.fresh or entry.validators():
+                        self.entries.move_to_end(full_key)
+                    else:
+                        self._remove(full_key, "expired")
+                        entry = None
+        return entry
+
+    def lifetime(self, status, headers, request_headers):
+        """
+        Seconds the upstream response may be served from the cache, or None if it is not stored.
+
+        Responses with an ETag or Last-Modified are stored even without a lifetime (e.g.
+        "Cache-Control: no-cache"), they are then revalidated on every request.
+
+        :param headers: Relayed upstream response headers (werkzeug Headers).
+        """
+        if status not in CACHEABLE_STATUSES:
+            return None
+        content_length = headers.get("Content-Length", type=int)
+        if content_length is None or content_length > self.max_entry_bytes:
+            return None
+        if not storable(headers, request_headers):
+            return None
+        lifetime = freshness_lifetime(headers, request_headers, self.default_ttl)
+        if lifetime or "ETag" in headers or "Last-Modified" in headers:
+            return lifetime
+        return None
+
+    def store(self, key, request_headers, status, headers, body, lifetime):
+        """
+        Store a response body read in full, evicting least recently used entries to fit.
+
+        :param headers: Relayed upstream response headers (werkzeug Headers).
+        :return: The new CachedResponse.
+        """
+        age = headers.get("Age", 0, type=int)
+        entry = CachedResponse(status, Headers(headers), body, lifetime, age)
+        vary = vary_names(headers)
+        if vary is None or entry.size > self.max_bytes:
+            return entry
+
+        with self.lock:
+            variant = self.variants.get(key)
+            if variant is not None and variant[0] != vary:
+                # The resource changed its Vary, drop the variants stored with the old one
+                for full_key in [k for k in self.entries if k[0] == key]:
+                    self._remove(full_key, "replaced")
+                variant = None
+            if variant is None:
+                variant = self.variants[key] = [vary, 0]
+
+            full_key = (key, tuple(request_headers.get(name, "") for name in vary))
+            if full_key in self.entries:
+                self._remove(full_key, "replaced")
+                self.variants[key] = variant
+            variant[1] += 1
+            entry.full_key = full_key
+            self.entries[full_key] = entry
+            self.size += entry.size
+
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)), "size")
+
+            RESPONSE_CACHE_BYTES.set(self.size)
+            RESPONSE_CACHE_ENTRIES.set(len(self.entries))
+        return entry
+
+    def revalidated(self, key, request_headers, stale, headers):
+        """
+        Refresh a stale entry the destination answered with 304 Not Modified.
+
+        :param stale: The entry whose validators were sent.
+        :param headers: Headers of the 304 answer, replacing the stored ones of the same name.
+        :return: CachedResponse with the stored body and the updated headers.
+        """
+        updated = Headers(stale.headers)
+        for name in {name.lower() for name in headers.keys()} - UNUPDATED_HEADERS:
+            updated.setlist(name, headers.getlist(name))
+
+        lifetime = self.lifetime(stale.status, updated, request_headers)
+        if lifetime is None:
+            # No longer cacheable, the body is still the current one for this request
+            return CachedResponse(stale.status, updated, stale.body, 0)
+        return self.store(key, request_headers, stale.status, updated, stale.body, lifetime)
+
+    def encoded(self, entry, coding, encode):
+        """
+        Return the body of an entry compressed with coding, encoding it on first use only.
+
+        :param encode: Function compressing a body, called outside the lock.
+        :return: Compressed body, counted against max_bytes while the entry is stored.
+        """
+        body = entry.encodings.get(coding)
+        if body is not None:
+            return body
+
+        body = encode(entry.body)
+        with self.lock:
+            if coding in entry.encodings:
+                return entry.encodings[coding]
+            entry.encodings[coding] = body
+            entry.size += len(body)
+            if self.entries.get(entry.full_key) is entry:
+                self.size += len(body)
+                while self.size > self.max_bytes:
+                    self._remove(next(iter(self.entries)), "size")
+                RESPONSE_CACHE_BYTES.set(self.size)
+        return body
+
+    def _remove(self, full_key, reason):
+        entry = self.entries.pop(full_key)
+        self.size -= entry.size
+        variant = self.variants[full_key[0]]
+        variant[1] -= 1
+        if not variant[1]:
+            del self.variants[full_key[0]]
+        RESPONSE_CACHE_EVICTIONS.labels(reason=reason).inc()
+        RESPONSE_CACHE_BYTES.set(self.size)
+        RESPONSE_CACHE_ENTRIES.set(len(self.entries))
+
+
+def create_response_cache(logger):
+    """
+    Create the GET response cache based on environment settings.
+
+    :param logger: The logger from the Flask app to use for logging.
+    :return: ResponseCache instance, or None if caching is disabled.
+    """
+    if os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() != "true":
+        return None
+
+    flights = None
+    if os.getenv("RESPONSE_CACHE_COALESCE", "true").lower() == "true":
+        flights = SingleFlight(float(os.getenv("RESPONSE_CACHE_COALESCE_TIMEOUT", 30)))
+
+    cache = ResponseCache(
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+        max_entry_bytes=int(os.getenv("RESPONSE_CACHE_MAX_ENTRY_BYTES", 1024 * 1024)),
+        default_ttl=float(os.getenv("RESPONSE_CACHE_DEFAULT_TTL", 0)),
+        flights=flights,
+    )
+    logger.info(
+        f"Response cache is enabled: max_bytes={cache.max_bytes}, "
+        f"max_entry_bytes={cache.max_entry_bytes}, default_ttl={cache.default_ttl}s, "
+        f"coalescing={'on' if flights else 'off'}"
+    )
+    return cache
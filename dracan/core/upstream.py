@@ -0,0 +1,252 @@
+import os
+import time
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.poolmanager import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from ..utils.metrics import (
+    UPSTREAM_POOL_IN_USE,
+    UPSTREAM_POOL_IDLE,
+    UPSTREAM_POOL_CREATED,
+    UPSTREAM_POOL_REUSED,
+    record_phase,
+)
+
+# Set a default timeout in seconds if PROXY_TIMEOUT is not specified in the environment
+PROXY_TIMEOUT = int(os.getenv("PROXY_TIMEOUT", 180))
+
+
+class _TrackedConnectionMixin:
+    """
+    Counts and times every new TCP connection opened towards the upstream and resets
+    the per-connection request counter used by ``max_requests``.
+    """
+
+    upstream_label = ""
+    dracan_idle = False
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        record_phase("upstream_connect", time.perf_counter() - started)
+        self.dracan_requests = 0
+        UPSTREAM_POOL_CREATED.labels(upstream=self.upstream_label).inc()
+
+    def close(self):
+        # Discarded by a full pool or closed with the pool, it is no longer idle in it
+        if self.dracan_idle:
+            self.dracan_idle = False
+            UPSTREAM_POOL_IDLE.labels(upstream=self.upstream_label).dec()
+        super().close()
+
+
+class TrackedHTTPConnection(_TrackedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TrackedHTTPSConnection(_TrackedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _UpstreamPoolMixin:
+    """
+    Adds keep-alive idle timeout, max requests per connection and pool
+    statistics on top of urllib3's connection pools.
+    """
+
+    idle_timeout = 0
+    max_requests = 0
+    upstream_label = ""
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.upstream_label = self.upstream_label
+        return conn
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        label = self.upstream_label
+
+        if getattr(conn, "dracan_idle", False):
+            conn.dracan_idle = False
+            UPSTREAM_POOL_IDLE.labels(upstream=label).dec()
+
+            # Drop keep-alive connections idling for longer than allowed, urllib3 reconnects lazily
+            idle_for = time.monotonic() - conn.dracan_last_used
+            if self.idle_timeout and idle_for > self.idle_timeout:
+                conn.close()
+
+        if conn.sock is not None:
+            UPSTREAM_POOL_REUSED.labels(upstream=label).inc()
+
+        UPSTREAM_POOL_IN_USE.labels(upstream=label).inc()
+        return conn
+
+    def _put_conn(self, conn):
+        label = self.upstream_label
+        UPSTREAM_POOL_IN_USE.labels(upstream=label).dec()
+
+        if conn is not None and conn.sock is not None and self.pool is not None:
+            conn.dracan_requests = getattr(conn, "dracan_requests", 0) + 1
+            if self.max_requests and conn.dracan_requests >= self.max_requests:
+                # Retire the connection, next checkout opens a fresh one
+                conn.close()
+            else:
+                conn.dracan_last_used = time.monotonic()
+                conn.dracan_idle = True
+                UPSTREAM_POOL_IDLE.labels(upstream=label).inc()
+
+        # A full pool closes the connection instead of queueing it, which takes it out of
+        # the idle gauge again (see _TrackedConnectionMixin.close)
+        super()._put_conn(conn)
+
+
+class UpstreamHTTPConnectionPool(_UpstreamPoolMixin, HTTPConnectionPool):
+    ConnectionCls = TrackedHTTPConnection
+
+
+class UpstreamHTTPSConnectionPool(_UpstreamPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TrackedHTTPSConnection
+
+
+class UpstreamPoolManager(PoolManager):
+    """
+    Pool manager handing out upstream pools configured with the idle timeout
+    and max requests per connection.
+    """
+
+    def __init__(self, *args, idle_timeout=0, max_requests=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        self.pool_classes_by_scheme = {
+            "http": UpstreamHTTPConnectionPool,
+            "https": UpstreamHTTPSConnectionPool,
+        }
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.idle_timeout = self.idle_timeout
+        pool.max_requests = self.max_requests
+        pool.upstream_label = f"{host}:{port}"
+        return pool
+
+    def clear(self):
+        # urllib3 2.x no longer closes evicted pools, close them so idle sockets are released
+        pools = [self.pools[key] for key in self.pools.keys()]
+        super().clear()
+        for pool in pools:
+            pool.close()
+
+
+class UpstreamAdapter(HTTPAdapter):
+    """
+    Requests transport adapter backed by :class:`UpstreamPoolManager`.
+    """
+
+    def __init__(self, pool_size=10, idle_timeout=0, max_requests=0):
+        self.idle_timeout = idle_timeout
+        self.max_requests = max_requests
+        super().__init__(pool_maxsize=pool_size, max_retries=0)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = UpstreamPoolManager(
+            num_pools=connections,
+            maxsize=maxsize,
+            block=block,
+            idle_timeout=self.idle_timeout,
+            max_requests=self.max_requests,
+            **pool_kwargs,
+        )
+
+
+class UpstreamClient:
+    """
+    Keep-alive HTTP client used to forward requests to the destination service.
+
+    One instance is created per worker by ``create_app`` and shared by all requests
+    handled in that worker, so TCP connections to the destination are reused.
+    """
+
+    def __init__(
+        self,
+        pool_size=10,
+        idle_timeout=60,
+        max_requests=0,
+        connect_timeout=PROXY_TIMEOUT,
+        read_timeout=PROXY_TIMEOUT,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        # Forward client headers only, requests' defaults (e.g. Accept-Encoding) would alter the exchange
+        self.session.headers.clear()
+        # The session is shared between clients, never let upstream cookies leak across requests
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = UpstreamAdapter(
+            pool_size=pool_size, idle_timeout=idle_timeout, max_requests=max_requests
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request through the pooled session using the configured timeouts.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+def load_upstream_settings():
+    """
+    Read the upstream connection pool settings from the environment.
+
+    :return: Dict of keyword arguments accepted by UpstreamClient.
+    """
+    return {
+        "pool_size": int(os.getenv("PROXY_POOL_SIZE", 10)),
+        "idle_timeout": float(os.getenv("PROXY_POOL_IDLE_TIMEOUT", 60)),
+        "max_requests": int(os.getenv("PROXY_POOL_MAX_REQUESTS", 0)),
+        "connect_timeout": float(os.getenv("PROXY_CONNECT_TIMEOUT", PROXY_TIMEOUT)),
+        "read_timeout": float(os.getenv("PROXY_READ_TIMEOUT", PROXY_TIMEOUT)),
+    }
+
+
+def create_upstream_client(logger):
+    """
+    Create the pooled upstream client based on environment settings.
+
+    :param logger: The logger from the Flask app to use for logging.
+    :return: UpstreamClient instance.
+    """
+    settings = load_upstream_settings()
+
+    logger.info(
+        f"Upstream connection pool: size={settings['pool_size']}, "
+        f"idle_timeout={settings['idle_timeout']}s, "
+        f"max_requests={settings['max_requests'] or 'unlimited'}, "
+        f"connect_timeout={settings['connect_timeout']}s, "
+        f"read_timeout={settings['read_timeout']}s"
+    )
+
+    return UpstreamClient(**settings)
@@ -0,0 +1,261 @@
+import os
+import math
+import time
+import threading
+from flask import request, jsonify
+from limits import parse
+from ..utils.route_trie import RouteTrie, is_template
+
+# Header carrying the client API key, as required by the default rules_config.json
+API_KEY_HEADER = "X-API-KEY"
+
+DEFAULT_MAX_KEYS = 100000
+
+# GCRA update as a Redis script, so the read-modify-write is atomic across hosts
+REDIS_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local emission_interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + emission_interval * cost
+if new_tat - now > tolerance then
+    return {0, tostring(new_tat - tolerance - now)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return {1, '0'}
+"""
+
+
+class MemoryGcraStore:
+    """
+    Per-process GCRA state: one theoretical arrival time (TAT) float per key.
+
+    A key whose TAT has passed is equivalent to an unknown key, so idle keys are dropped
+    without changing any decision. Entries are kept in update order, each call sweeps a few
+    idle keys from the front, and above max_keys the least recently updated key is evicted.
+    """
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS, sweep=8):
+        self.tats = {}
+        self.max_keys = max_keys
+        self.sweep = sweep
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tats)
+
+    def acquire(self, key, emission_interval, tolerance, cost=1):
+        """
+        :return: Tuple (allowed, retry_after in seconds).
+        """
+        with self.lock:
+            now = time.monotonic()
+            tats = self.tats
+
+            tat = tats.pop(key, now)
+            if tat < now:
+                tat = now
+            new_tat = tat + emission_interval * cost
+            allowed = new_tat - now <= tolerance
+            if allowed:
+                tat = new_tat
+            if tat > now:
+                tats[key] = tat  # Re-inserted last: entries stay in update order
+
+            # Drop idle keys from the front, then enforce the hard bound
+            for _ in range(self.sweep):
+                oldest = next(iter(tats), None)
+                if oldest is None or tats[oldest] > now:
+                    break
+                del tats[oldest]
+            while len(tats) > self.max_keys:
+                del tats[next(iter(tats))]
+
+            if allowed:
+                return True, 0.0
+            return False, new_tat - tolerance - now
+
+
+class RedisGcraStore:
+    """
+    GCRA state in Redis, shared by several hosts. Keys expire once their TAT has passed.
+    """
+
+    def __init__(self, client, key_prefix="DRACAN_GCRA"):
+        self.script = client.register_script(REDIS_GCRA_SCRIPT)
+        self.key_prefix = key_prefix
+
+    def acquire(self, key, emission_interval, tolerance, cost=1):
+        allowed, retry_after = self.script(
+            keys=[f"{self.key_prefix}/{key}"],
+            args=[time.time(), emission_interval, tolerance, cost],
+        )
+        return bool(allowed), float(retry_after)
+
+
+def create_gcra_store(storage_uri, max_keys=DEFAULT_MAX_KEYS, storage_options=None):
+    """
+    Create the GCRA state store matching the rate limit storage URI.
+
+    :param storage_uri: memory://, shm://... or redis://... as in RATE_LIMIT_STORAGE_URI.
+    :param max_keys: Maximum number of keys kept by the in-process store.
+    :param storage_options: Optional keyword arguments for the storage, e.g. a Redis connection_pool.
+    :return: Object with an acquire(key, emission_interval, tolerance, cost) method.
+    """
+    scheme = storage_uri.split("://")[0]
+    if scheme == "memory":
+        return MemoryGcraStore(max_keys=max_keys)
+    if scheme == "shm":
+        from .shm_storage import SharedMemoryStorage
+
+        return SharedMemoryStorage(storage_uri, **(storage_options or {}))
+    if scheme in ("redis", "rediss", "redis+unix"):
+        from limits.storage import RedisStorage
+
+        return RedisGcraStore(RedisStorage(storage_uri, **(storage_options or {})).storage)
+    raise ValueError(f"Unsupported storage '{storage_uri}' for 'rate_limits'")
+
+
+class GcraRule:
+    """
+    One entry of "rate_limits": a rate, a burst size and how requests are keyed.
+
+    With rate N per period, one request is allowed every period / N seconds (the emission
+    interval) and up to burst requests may arrive at once. burst defaults to N, the number
+    of requests a fixed window of the same rate lets through at once.
+    """
+
+    def __init__(self, index, rule):
+        self.rate = rule["rate"]
+        item = parse(self.rate)
+        self.emission_interval = item.get_expiry() / item.amount
+        self.burst = int(rule.get("burst", item.amount))
+        if self.burst < 1:
+            raise ValueError(f"Invalid burst '{self.burst}' for rate limit '{self.rate}'")
+        self.tolerance = self.emission_interval * self.burst
+        self.key = rule.get("key", "remote_addr")
+        if self.key not in ("remote_addr", "api_key"):
+            raise ValueError(
+                f"Invalid rate limit key '{self.key}', expected 'remote_addr' or 'api_key'"
+            )
+        self.route = rule.get("route")
+        self.prefix = f"gcra/{index}/"
+
+    def request_key(self):
+        """
+        Key of the current request for this rule, requests without an API key fall back to their address.
+        """
+        if self.key == "api_key":
+            api_key = request.headers.get(API_KEY_HEADER)
+            if api_key:
+                return f"{self.prefix}key:{api_key}"
+        return f"{self.prefix}ip:{request.remote_addr}"
+
+
+class RateLimitRules:
+    """
+    The "rate_limits" rules indexed by route.
+
+    Rules without a route apply to every request. Route rules use the "METHOD /path" or
+    "/path" (any method) syntax of "json_schemas", with Flask-style placeholders, and are
+    selected by an exact-match dict lookup falling back to a per-method segment trie.
+    """
+
+    def __init__(self, rate_limits):
+        self.global_rules = []
+        self.exact = {}
+        self.templates = {}
+        routes = {}
+
+        for index, entry in enumerate(rate_limits):
+            rule = GcraRule(index, entry)
+            if rule.route is None:
+                self.global_rules.append(rule)
+                continue
+
+            method, _, path = rule.route.partition(" ")
+            if not path:
+                method, path = "*", method
+            if not path.startswith("/"):
+                raise ValueError(
+                    f"Invalid rate limit route '{rule.route}', expected 'METHOD /path' or '/path'"
+                )
+            method = method.upper()
+            rules = routes.get((method, path))
+            if rules is None:
+                rules = routes[(method, path)] = []
+                if is_template(path):
+                    self.templates.setdefault(method, RouteTrie()).insert(path, rules)
+                else:
+                    self.exact[(method, path)] = rules
+            rules.append(rule)
+
+    def _route_rules(self, method, path):
+        rules = self.exact.get((method, path))
+        if rules is None:
+            trie = self.templates.get(method)
+            if trie is not None:
+                rules = trie.match(path)
+        return rules
+
+    def select(self, method, path):
+        """
+        Return the rules applying to the request: global rules, then the route rules.
+        """
+        rules = self.global_rules
+        for route_rules in (
+            self._route_rules(method, path),
+            self._route_rules("*", path),
+        ):
+            if route_rules:
+                rules = rules + route_rules
+        return rules
+
+
+def create_gcra_limiter(app, rules_config, storage_options=None):
+    """
+    Apply the per-route and per-API-key GCRA limits from "rate_limits", if any are configured.
+
+    :param app: The Flask app instance.
+    :param rules_config: The configuration that contains limiting rules.
+    :param storage_options: Optional keyword arguments for the storage, e.g. a Redis connection_pool.
+    :return: The check function registered as before_request hook, or None.
+    """
+    rate_limits = rules_config.get("rate_limits", [])
+    if not rules_config.get("limiting_enabled", False) or not rate_limits:
+        return None
+
+    rules = RateLimitRules(rate_limits)
+    storage_uri = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+    max_keys = int(os.getenv("RATE_LIMIT_MAX_KEYS", DEFAULT_MAX_KEYS))
+    store = create_gcra_store(storage_uri, max_keys, storage_options)
+
+    def check_rate_limits():
+        """
+        Consume one request from every applicable rule, answering 429 on the first exceeded one.
+        """
+        for rule in rules.select(request.method, request.path):
+            allowed, retry_after = store.acquire(
+                rule.request_key(), rule.emission_interval, rule.tolerance
+            )
+            if not allowed:
+                app.logger.warning(
+                    "Rate limit '%s' (burst %s) exceeded for %s %s.",
+                    rule.rate,
+                    rule.burst,
+                    request.method,
+                    request.path,
+                )
+                response = jsonify({"error": f"Rate limit exceeded: {rule.rate}"})
+                response.status_code = 429
+                response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+                return response
+        return None
+
+    app.before_request(check_rate_limits)
+    app.logger.info(
+        f"GCRA rate limiting enabled with {len(rate_limits)} rule(s), storage: {storage_uri.split('://')[0]}"
+    )
+    return check_rate_limits
@@ -1,14 +1,18 @@
+import os
 import warnings
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from . import shm_storage  # noqa: F401 - registers the shm:// storage scheme
+from .gcra import create_gcra_limiter
 
 
-def create_limiter(app, rules_config):
+def create_limiter(app, rules_config, storage_options=None):
     """
     Initialize and apply the rate limiter if limiting is enabled.
     :param app: The Flask app instance.
     :param rules_config: The configuration that contains limiting rules.
-    :return: Limiter object or None if limiting is disabled.
+    :param storage_options: Optional keyword arguments for the storage, e.g. a Redis connection_pool.
+    :return: Limiter object, or None if limiting is disabled or only "rate_limits" are configured.
     """
     # Suppress the specific warning about in-memory storage
     warnings.filterwarnings(
@@ -17,9 +21,24 @@ def create_limiter(app, rules_config):
     )
 
     if rules_config.get("limiting_enabled", False):
+        # Per-route / per-API-key limits with bursts, in addition to the global rate_limit
+        create_gcra_limiter(app, rules_config, storage_options)
+        if "rate_limit" not in rules_config and rules_config.get("rate_limits"):
+            return None
+
         rate_limit = rules_config.get("rate_limit", "10 per minute")
-        limiter = Limiter(get_remote_address, app=app, default_limits=[rate_limit])
-        app.logger.info(f"Rate limiting enabled with limit: {rate_limit}")
+        # memory:// is per process, use shm:// (or redis://) to share counters between workers
+        storage_uri = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+        limiter = Limiter(
+            get_remote_address,
+            app=app,
+            default_limits=[rate_limit],
+            storage_uri=storage_uri,
+            storage_options=storage_options or {},
+        )
+        app.logger.info(
+            f"Rate limiting enabled with limit: {rate_limit}, storage: {storage_uri.split('://')[0]}"
+        )
         return limiter
 
     app.logger.info("Rate limiting is disabled")
@@ -1,4 +1,123 @@
-from flask import request, jsonify
+from flask import request
+from werkzeug.exceptions import RequestEntityTooLarge
+from ..utils.responses import PreparedError
+
+
+class LimitedInput:
+    """
+    wsgi.input of a request sent without Content-Length (chunked), raising
+    RequestEntityTooLarge as soon as more than max_size bytes were received.
+
+    Reads are capped so that at most one byte past the limit is ever taken from the client,
+    even when the whole body is requested at once (e.g. by request.get_json()).
+    """
+
+    def __init__(self, stream, max_size, chunk_size=64 * 1024):
+        self.stream = stream
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.received = 0
+
+    def allowance(self, size):
+        # One byte past the limit is enough to tell an oversized body apart
+        remaining = self.max_size + 1 - self.received
+        return remaining if size is None or size < 0 else min(size, remaining)
+
+    def count(self, data):
+        self.received += len(data)
+        if self.received > self.max_size:
+            raise RequestEntityTooLarge()
+        return data
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = []
+            while True:
+                chunk = self.read(self.chunk_size)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+        return self.count(self.stream.read(self.allowance(size)))
+
+    def readline(self, size=-1):
+        return self.count(self.stream.readline(self.allowance(size)))
+
+
+class PayloadLimitMiddleware:
+    """
+    WSGI wrapper counting the bodies sent without Content-Length while they are read, by
+    whichever code reads them, before Flask builds the request around wsgi.input.
+    """
+
+    def __init__(self, wsgi_app, max_payload_size):
+        self.wsgi_app = wsgi_app
+        self.max_payload_size = max_payload_size
+
+    def __call__(self, environ, start_response):
+        try:
+            content_length = int(environ.get("CONTENT_LENGTH") or "")
+        except ValueError:
+            content_length = None  # Absent or invalid, werkzeug reads until the stream ends
+
+        if content_length is None:
+            environ["wsgi.input"] = LimitedInput(
+                environ["wsgi.input"], self.max_payload_size
+            )
+        return self.wsgi_app(environ, start_response)
+
+
+def apply_payload_limit(app, rules_config):
+    """
+    Enforce max_payload_size before the request body is read, if payload limiting is enabled.
+
+    Requests declaring a too large Content-Length are answered with 413 by a before-request
+    hook, so metrics and request logging still see them. Chunked bodies are counted by a WSGI
+    wrapper while they are read (streamed upstream or parsed by the JSON validation), and the
+    request is aborted with 413 as soon as the limit is crossed.
+
+    :param app: The Flask app instance.
+    :param rules_config: The configuration that contains payload size limitations.
+    :return: The enforced limit in bytes, or None if payload limiting is disabled.
+    """
+    if not rules_config.get("payload_limiting_enabled", False):
+        return None
+
+    max_payload_size = rules_config.get("max_payload_size", 1024)
+    payload_too_large = PreparedError(
+        f"Payload size exceeds the limit of {max_payload_size} bytes", 413
+    )
+
+    def too_large_response():
+        response, status = payload_too_large.response()
+        # The rest of the body is never read, the connection cannot be reused
+        response.headers["Connection"] = "close"
+        return response, status
+
+    app.wsgi_app = PayloadLimitMiddleware(app.wsgi_app, max_payload_size)
+
+    @app.before_request
+    def reject_declared_payload_too_large():
+        payload_size = request.content_length
+        if payload_size is not None and payload_size > max_payload_size:
+            app.logger.warning(
+                "Payload size %s exceeds the limit of %s bytes.",
+                payload_size,
+                max_payload_size,
+            )
+            return too_large_response()
+        return None
+
+    @app.errorhandler(RequestEntityTooLarge)
+    def handle_payload_too_large(e):
+        app.logger.warning(
+            "Streamed payload exceeded the limit of %s bytes.", max_payload_size
+        )
+        return too_large_response()
+
+    app.logger.info(
+        f"Payload size limit of {max_payload_size} bytes is enforced before reading the body."
+    )
+    return max_payload_size
 
 
 def create_payload_size_limiter(rules_config, logger):
@@ -13,6 +132,9 @@ def create_payload_size_limiter(rules_config, logger):
     max_payload_size = rules_config.get(
         "max_payload_size", 1024
     )  # Default to 1KB if not specified
+    payload_too_large = PreparedError(
+        f"Payload size exceeds the limit of {max_payload_size} bytes", 413
+    )
 
     def validate_payload_size():
         """
@@ -20,33 +142,30 @@ def create_payload_size_limiter(rules_config, logger):
         :return: Tuple (is_valid, response) - is_valid is True if valid, False otherwise.
         """
         if not payload_limiting_enabled:
-            logger.info("Payload size limiting is disabled.")
+            logger.debug("Payload size limiting is disabled.")
             return True, None
 
         # Get the payload size or let know that there is no payload to check
         payload_size = request.content_length
         if payload_size is None:
-            logger.info("No payload to validate.")
+            logger.debug("No payload to validate.")
             return True, None
 
-        logger.info(
-            f"Validating payload size: {payload_size} bytes (Max allowed: {max_payload_size} bytes)"
+        logger.debug(
+            "Validating payload size: %s bytes (Max allowed: %s bytes)",
+            payload_size,
+            max_payload_size,
         )
 
         if payload_size > max_payload_size:
             logger.warning(
-                f"Payload size {payload_size} exceeds the limit of {max_payload_size} bytes."
-            )
-            return False, (
-                jsonify(
-                    {
-                        "error": f"Payload size exceeds the limit of {max_payload_size} bytes"
-                    }
-                ),
-                413,
+                "Payload size %s exceeds the limit of %s bytes.",
+                payload_size,
+                max_payload_size,
             )
+            return False, payload_too_large.response()
 
-        logger.info(f"Payload size {payload_size} is within the allowed limit.")
+        logger.debug("Payload size %s is within the allowed limit.", payload_size)
         return True, None
 
     if payload_limiting_enabled:
@@ -0,0 +1,270 @@
+import os
+import mmap
+import time
+import fcntl
+import struct
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from limits.storage import Storage
+
+# File header: magic + number of slots
+HEADER = struct.Struct("<8sQ")
+MAGIC = b"DRCNRL01"
+
+# Slot: 64-bit key hash (0 = empty), counter, expiry as a UNIX timestamp
+SLOT = struct.Struct("<QQd")
+
+DEFAULT_SLOTS = 65536
+DEFAULT_STRIPES = 64
+MAX_PROBE = 32
+
+
+# Stripe thread locks per table file, shared by all storages of the process using it
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def stripe_thread_locks(path, stripes):
+    """
+    Thread locks of a table's stripes. fcntl locks are owned by the process, so they do not
+    exclude threads of one process even through different file descriptors: every storage
+    opened on the same file, e.g. by Flask-Limiter and the GCRA store, takes the same locks.
+    """
+    key = (os.path.realpath(path), stripes)
+    with _thread_locks_guard:
+        locks = _thread_locks.get(key)
+        if locks is None:
+            locks = _thread_locks[key] = [threading.Lock() for _ in range(stripes)]
+        return locks
+
+
+def key_hash(key):
+    """
+    Stable 64-bit hash of a rate limit key, identical in every worker process.
+    """
+    value = int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "little"
+    )
+    return value or 1
+
+
+def default_table_path(name="dracan-rate-limit"):
+    """
+    Path of a table in shared memory (/dev/shm), or in the temporary directory without it.
+    """
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else "/tmp"  # nosec B108
+    return os.path.join(directory, name)
+
+
+class SharedMemoryStorage(Storage):
+    """
+    Fixed window rate limit counters in a memory-mapped file, shared by all worker processes
+    of a host without an external service.
+
+    The table is split into stripes, each guarded by a thread lock (shared by the storages of
+    the process opened on the same file) and an fcntl byte-range lock on its part of the file,
+    so only requests whose keys fall into the same stripe wait for each other. Keys are stored as 64-bit hashes with open addressing inside their stripe.
+    Expired slots are reused and, when a stripe is full, the slot closest to expiry is evicted,
+    so the table size (24 bytes per slot) bounds the memory used.
+
+    URI: ``shm:///dev/shm/dracan-rate-limit?slots=65536&stripes=64``
+    """
+
+    STORAGE_SCHEME = ["shm"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        parsed = urlparse(uri or "shm://")
+        query = {name: values[-1] for name, values in parse_qs(parsed.query).items()}
+
+        self.path = parsed.path or default_table_path()
+        self.slots = int(options.get("slots", query.get("slots", DEFAULT_SLOTS)))
+        self.stripes = int(options.get("stripes", query.get("stripes", DEFAULT_STRIPES)))
+        if self.slots < self.stripes or self.slots % self.stripes:
+            raise ValueError(
+                f"Rate limit table slots ({self.slots}) must be a multiple of stripes ({self.stripes})"
+            )
+        self.stripe_slots = self.slots // self.stripes
+        self.probe = min(MAX_PROBE, self.stripe_slots)
+        self.thread_locks = stripe_thread_locks(self.path, self.stripes)
+
+        self.size = HEADER.size + self.slots * SLOT.size
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._initialize()
+        self.table = mmap.mmap(self.fd, self.size)
+
+    @property
+    def base_exceptions(self):
+        return OSError
+
+    def _initialize(self):
+        """
+        Create or re-create the table if it is missing or was built with another layout.
+        """
+        fcntl.lockf(self.fd, fcntl.LOCK_EX)
+        try:
+            header = HEADER.pack(MAGIC, self.slots)
+            if (
+                os.fstat(self.fd).st_size != self.size
+                or os.pread(self.fd, HEADER.size, 0) != header
+            ):
+                os.ftruncate(self.fd, 0)
+                os.ftruncate(self.fd, self.size)
+                os.pwrite(self.fd, header, 0)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN)
+
+    def _locked(self, stripe):
+        return _StripeLock(self, stripe)
+
+    def _find(self, stripe, hashed, now, insert=False):
+        """
+        Return the offset of the key's slot in the stripe, or None if it is not stored.
+        With insert, return the slot to (re)use for the key instead of None.
+        """
+        base = HEADER.size + stripe * self.stripe_slots * SLOT.size
+        start = hashed % self.stripe_slots
+        reusable = None
+        oldest = None
+        oldest_expiry = None
+        for step in range(self.probe):
+            offset = base + ((start + step) % self.stripe_slots) * SLOT.size
+            slot_hash, _, expiry = SLOT.unpack_from(self.table, offset)
+            if slot_hash == hashed:
+                return offset
+            if slot_hash == 0:
+                # Keys are never stored past an empty slot
+                return (reusable or offset) if insert else None
+            if expiry <= now and reusable is None:
+                reusable = offset
+            if oldest_expiry is None or expiry < oldest_expiry:
+                oldest, oldest_expiry = offset, expiry
+        if not insert:
+            return None
+        return reusable or oldest
+
+    def _slot(self, key):
+        hashed = key_hash(key)
+        return hashed, (hashed >> 32) % self.stripes
+
+    def incr(self, key, expiry, amount=1):
+        hashed, stripe = self._slot(key)
+        with self._locked(stripe):
+            now = time.time()
+            offset = self._find(stripe, hashed, now, insert=True)
+            slot_hash, count, slot_expiry = SLOT.unpack_from(self.table, offset)
+            if slot_hash != hashed or slot_expiry <= now:
+                count, slot_expiry = 0, now + expiry
+            count += amount
+            SLOT.pack_into(self.table, offset, hashed, count, slot_expiry)
+            return count
+
+    def get(self, key):
+        hashed, stripe = self._slot(key)
+        with self._locked(stripe):
+            now = time.time()
+            offset = self._find(stripe, hashed, now)
+            if offset is None:
+                return 0
+            _, count, expiry = SLOT.unpack_from(self.table, offset)
+            return count if expiry > now else 0
+
+    def get_expiry(self, key):
+        hashed, stripe = self._slot(key)
+        with self._locked(stripe):
+            now = time.time()
+            offset = self._find(stripe, hashed, now)
+            if offset is None:
+                return now
+            return SLOT.unpack_from(self.table, offset)[2]
+
+    def acquire(self, key, emission_interval, tolerance, cost=1):
+        """
+        GCRA update of the key's theoretical arrival time (TAT), kept in the slot's expiry field.
+        Slots whose TAT has passed hold no information and are reused like expired counters.
+
+        :return: Tuple (allowed, retry_after in seconds).
+        """
+        hashed, stripe = self._slot(key)
+        with self._locked(stripe):
+            now = time.time()
+            offset = self._find(stripe, hashed, now, insert=True)
+            slot_hash, _, tat = SLOT.unpack_from(self.table, offset)
+            if slot_hash != hashed or tat < now:
+                tat = now
+            new_tat = tat + emission_interval * cost
+            if new_tat - now > tolerance:
+                return False, new_tat - tolerance - now
+            SLOT.pack_into(self.table, offset, hashed, 0, new_tat)
+            return True, 0.0
+
+    def check(self):
+        return not self.table.closed
+
+    def reset(self):
+        now = time.time()
+        cleared = 0
+        for stripe in range(self.stripes):
+            with self._locked(stripe):
+                base = HEADER.size + stripe * self.stripe_slots * SLOT.size
+                for index in range(self.stripe_slots):
+                    offset = base + index * SLOT.size
+                    slot_hash, _, expiry = SLOT.unpack_from(self.table, offset)
+                    if slot_hash and expiry > now:
+                        cleared += 1
+                self.table[base : base + self.stripe_slots * SLOT.size] = bytes(
+                    self.stripe_slots * SLOT.size
+                )
+        return cleared
+
+    def clear(self, key):
+        hashed, stripe = self._slot(key)
+        with self._locked(stripe):
+            offset = self._find(stripe, hashed, time.time())
+            if offset is not None:
+                # Keep the slot occupied so keys probed past it stay reachable
+                SLOT.pack_into(self.table, offset, hashed, 0, 0.0)
+
+
+class _StripeLock:
+    """
+    Exclusive access to one stripe: the thread lock serializes threads of this process,
+    the fcntl byte-range lock (owned per process) serializes the other processes.
+    """
+
+    __slots__ = ("storage", "stripe")
+
+    def __init__(self, storage, stripe):
+        self.storage = storage
+        self.stripe = stripe
+
+    def __enter__(self):
+        storage = self.storage
+        storage.thread_locks[self.stripe].acquire()
+        length = storage.stripe_slots * SLOT.size
+        try:
+            fcntl.lockf(
+                storage.fd,
+                fcntl.LOCK_EX,
+                length,
+                HEADER.size + self.stripe * length,
+                os.SEEK_SET,
+            )
+        except BaseException:
+            storage.thread_locks[self.stripe].release()
+            raise
+
+    def __exit__(self, *exc_info):
+        storage = self.storage
+        length = storage.stripe_slots * SLOT.size
+        try:
+            fcntl.lockf(
+                storage.fd,
+                fcntl.LOCK_UN,
+                length,
+                HEADER.size + self.stripe * length,
+                os.SEEK_SET,
+            )
+        finally:
+            storage.thread_locks[self.stripe].release()
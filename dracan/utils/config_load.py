@@ -24,32 +24,60 @@ def check_required_files(required_files):
             sys.exit(1)
 
 
+def check_destination(destination, name, optional_keys=frozenset()):
+    """
+    Ensure a destination has the host, port and path fields and no unexpected ones.
+    """
+    required_keys = {"host", "port", "path"}
+    if not required_keys.issubset(destination.keys()):
+        missing_keys = required_keys - destination.keys()
+        raise KeyError(f"Missing required fields in '{name}': {', '.join(missing_keys)}")
+
+    # Ensure no extra fields are present
+    extra_keys = set(destination.keys()) - required_keys - optional_keys
+    if extra_keys:
+        raise KeyError(f"Unexpected fields in '{name}': {', '.join(extra_keys)}")
+
+
 def load_proxy_config():
     """
     Load the destination service configuration from a JSON file.
     Ensures that only required fields are present in the configuration.
+    Either a single 'destination' or a 'destinations' list (load balanced) is expected.
     """
     file_path = get_config_file_path("proxy_config.json")
     with open(file_path, "r") as f:
         config = json.load(f)
 
+    # Several destinations, spread by the load balancer
+    if "destinations" in config:
+        if "destination" in config:
+            raise KeyError(
+                "Only one of 'destination' or 'destinations' can be set in proxy configuration"
+            )
+        destinations = config["destinations"]
+        if not isinstance(destinations, list) or not destinations:
+            raise KeyError("'destinations' must be a non-empty list in proxy configuration")
+        for index, destination in enumerate(destinations):
+            check_destination(destination, f"destinations[{index}]", {"weight"})
+
+        extra_keys = set(config.get("load_balancing", {}).keys()) - {
+            "algorithm",
+            "max_failures",
+            "ejection_time",
+        }
+        if extra_keys:
+            raise KeyError(
+                f"Unexpected fields in 'load_balancing': {', '.join(extra_keys)}"
+            )
+        return config
+
     # Validate the structure of proxy configuration
-    required_keys = {"host", "port", "path"}
     if "destination" not in config:
         raise KeyError("Missing required object 'destination' in proxy configuration")
 
     # Check if 'destination' contains only the required keys
-    destination_config = config["destination"]
-    if not required_keys.issubset(destination_config.keys()):
-        missing_keys = required_keys - destination_config.keys()
-        raise KeyError(
-            f"Missing required fields in 'destination': {', '.join(missing_keys)}"
-        )
-
-    # Ensure no extra fields are present
-    extra_keys = set(destination_config.keys()) - required_keys
-    if extra_keys:
-        raise KeyError(f"Unexpected fields in 'destination': {', '.join(extra_keys)}")
+    check_destination(config["destination"], "destination")
 
     return config
 
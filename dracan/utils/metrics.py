@@ -1,7 +1,15 @@
+import os
 import time
-from threading import Thread
-from prometheus_client import start_http_server, Counter, Histogram, Gauge
-from flask import request, g
+from threading import Thread, Lock
+from prometheus_client import (
+    start_http_server,
+    multiprocess,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    Gauge,
+)
+from flask import request, g, has_request_context
 
 # Define metrics
 REQUEST_COUNT = Counter(
@@ -11,7 +19,9 @@ REQUEST_LATENCY = Histogram(
     "http_request_latency_seconds", "Request latency", ["method", "endpoint"]
 )
 REQUEST_IN_PROGRESS = Gauge(
-    "http_requests_in_progress", "Number of HTTP requests in progress"
+    "http_requests_in_progress",
+    "Number of HTTP requests in progress",
+    multiprocess_mode="livesum",
 )
 REQUEST_SIZE = Histogram(
     "http_request_size_bytes", "Size of HTTP requests", ["method", "endpoint"]
@@ -19,15 +29,211 @@ REQUEST_SIZE = Histogram(
 RESPONSE_SIZE = Histogram(
     "http_response_size_bytes", "Size of HTTP responses", ["method", "endpoint"]
 )
+VALIDATION_LATENCY = Histogram(
+    "http_request_validation_seconds", "Time spent in each validation stage", ["stage"]
+)
+PHASE_LATENCY = Histogram(
+    "http_request_phase_seconds",
+    "Time spent in each proxying phase (upstream connect, TTFB, body, response write)",
+    ["phase"],
+)
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "GET requests looked up in the response cache",
+    ["result"],
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    "response_cache_evictions_total",
+    "Entries removed from the response cache",
+    ["reason"],
+)
+RESPONSE_CACHE_COALESCED = Counter(
+    "response_cache_coalesced_total",
+    "GET requests that waited for an identical request already sent to the destination",
+    ["result"],
+)
+RESPONSE_CACHE_BYTES = Gauge(
+    "response_cache_bytes",
+    "Bytes used by the response cache",
+    multiprocess_mode="livesum",
+)
+RESPONSE_CACHE_ENTRIES = Gauge(
+    "response_cache_entries",
+    "Responses stored in the response cache",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_POOL_IN_USE = Gauge(
+    "upstream_pool_connections_in_use",
+    "Upstream connections currently checked out of the pool",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_POOL_IDLE = Gauge(
+    "upstream_pool_connections_idle",
+    "Open keep-alive upstream connections waiting in the pool",
+    ["upstream"],
+    multiprocess_mode="livesum",
+)
+UPSTREAM_POOL_CREATED = Counter(
+    "upstream_pool_connections_created_total",
+    "New TCP connections opened to the upstream",
+    ["upstream"],
+)
+UPSTREAM_POOL_REUSED = Counter(
+    "upstream_pool_connections_reused_total",
+    "Requests served over an already open keep-alive upstream connection",
+    ["upstream"],
+)
+
+
+# Endpoint labels of requests matching no rule or route, and of endpoints above the cap
+UNMATCHED_ENDPOINT = "unmatched"
+OVERFLOW_ENDPOINT = "other"
+
+DEFAULT_MAX_ENDPOINTS = 100
+
+
+class EndpointLabels:
+    """
+    Bounded set of "endpoint" label values.
+
+    Once max_endpoints distinct values have been seen, new ones are reported as
+    OVERFLOW_ENDPOINT, so the number of time series per metric cannot grow without limit.
+    """
+
+    def __init__(self, max_endpoints=DEFAULT_MAX_ENDPOINTS):
+        self.max_endpoints = max_endpoints
+        self.seen = set()
+        self.lock = Lock()
+
+    def label(self, endpoint):
+        if endpoint in self.seen:
+            return endpoint
+        with self.lock:
+            if len(self.seen) >= self.max_endpoints:
+                return OVERFLOW_ENDPOINT
+            self.seen.add(endpoint)
+        return endpoint
+
+
+ENDPOINT_LABELS = EndpointLabels()
+
+
+def request_endpoint():
+    """
+    Endpoint label of the current request: the allowed URI rule matched by the path validator,
+    else the Flask route template, never the raw path.
+    """
+    endpoint = g.get("uri_rule")
+    if endpoint is None:
+        url_rule = request.url_rule
+        endpoint = url_rule.rule if url_rule is not None else UNMATCHED_ENDPOINT
+    return ENDPOINT_LABELS.label(endpoint)
+
+
+def multiprocess_mode_enabled():
+    """
+    Whether metrics are written to PROMETHEUS_MULTIPROC_DIR, as set up by gunicorn.conf.py
+    for several workers, instead of being kept in process memory.
+    """
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class ResponseSizeCounter:
+    """
+    Response body wrapper counting the bytes passing through the WSGI iterator.
+
+    The size is recorded once the server closes the body, i.e. after the last byte was sent,
+    so streamed responses are neither buffered nor copied to be measured.
+    """
+
+    def __init__(self, body, observe):
+        self.body = body
+        self.observe = observe
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            close = getattr(self.body, "close", None)
+            if close is not None:
+                close()
+        finally:
+            observe, self.observe = self.observe, None
+            if observe is not None:
+                observe(self.size)
+
+
+def record_relayed_size(response, size):
+    """
+    Count body bytes sent without iterating the Flask response, as done by the ASGI engine.
+    """
+    if isinstance(response.response, ResponseSizeCounter):
+        response.response.size += size
+
+
+class PhaseTimings:
+    """
+    Switches for the per-phase latency breakdown, set by register_phase_timing().
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.server_timing = False
+
+    def collect(self, name, seconds):
+        """
+        Add the duration to the Server-Timing entries of the current request, if enabled.
+        """
+        if self.server_timing and has_request_context():
+            timings = g.get("phase_timings")
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + seconds
+
+
+PHASE_TIMINGS = PhaseTimings()
+
+
+def record_phase(phase, seconds):
+    """
+    Record the duration of a proxying phase measured with time.perf_counter().
+    Phases measured after the response headers were sent only reach the histogram.
+    """
+    if PHASE_TIMINGS.enabled:
+        PHASE_LATENCY.labels(phase=phase).observe(seconds)
+        PHASE_TIMINGS.collect(phase, seconds)
+
+
+def observe_validation_stage(stage, seconds):
+    """
+    Validation pipeline observer recording the duration of every stage.
+    """
+    VALIDATION_LATENCY.labels(stage=stage).observe(seconds)
+    PHASE_TIMINGS.collect(f"validation_{stage}", seconds)
 
 
 def start_metrics_server(port=9100):
     """
     Start an independent HTTP server for Prometheus metrics on the specified port.
+
+    In multiprocess mode the server aggregates the metric files of all worker processes,
+    so it has to run once per host (in the process forked by the gunicorn master), not in
+    every worker.
     """
+    registry = None
+    if multiprocess_mode_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
 
     def metrics_thread():
-        start_http_server(port)
+        if registry is None:
+            start_http_server(port)
+        else:
+            start_http_server(port, registry=registry)
         while True:
             time.sleep(1)  # Keeps the thread alive
 
@@ -50,25 +256,82 @@ def finalize_request_metrics(response):
     Finalize metrics recording after each request.
     """
     method = request.method
-    endpoint = request.path
+    endpoint = request_endpoint()
     status = response.status_code
     latency = time.time() - g.start_time
     request_size = g.request_size
-    response_size = len(response.data) if response.data else 0
 
     # Record metrics for this request
     REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status).inc()
     REQUEST_LATENCY.labels(method=method, endpoint=endpoint).observe(latency)
     REQUEST_SIZE.labels(method=method, endpoint=endpoint).observe(request_size)
-    RESPONSE_SIZE.labels(method=method, endpoint=endpoint).observe(response_size)
+
+    # Known sizes are recorded now, bodies of unknown size are counted while they are sent
+    response_size = RESPONSE_SIZE.labels(method=method, endpoint=endpoint)
+    if method == "HEAD":
+        # No body is sent, a relayed Content-Length describes the GET representation
+        response_size.observe(0)
+    elif response.content_length is not None:
+        response_size.observe(response.content_length)
+    else:
+        response.response = ResponseSizeCounter(response.response, response_size.observe)
     REQUEST_IN_PROGRESS.dec()  # Decrease the in-progress count after the request
 
     return response
 
 
-def register_metrics(app):
+def register_metrics(app, max_endpoints=DEFAULT_MAX_ENDPOINTS):
     """
     Register metrics hooks with the Flask app.
+    :param max_endpoints: Maximum number of distinct "endpoint" label values.
     """
+    ENDPOINT_LABELS.max_endpoints = max_endpoints
     app.before_request(start_request_metrics)
     app.after_request(finalize_request_metrics)
+
+
+def start_phase_timing():
+    """
+    Start collecting the Server-Timing entries of the request.
+    """
+    g.phase_timings = {}
+
+
+def finalize_phase_timing(response):
+    """
+    Add the Server-Timing header and time the response write, which ends when the server
+    closes the response after its last byte.
+    """
+    if PHASE_TIMINGS.server_timing:
+        timings = g.get("phase_timings")
+        if timings:
+            response.headers["Server-Timing"] = ", ".join(
+                f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items()
+            )
+
+    write_start = time.perf_counter()
+    response.call_on_close(
+        lambda: record_phase("response_write", time.perf_counter() - write_start)
+    )
+    return response
+
+
+def register_phase_timing(app, server_timing=False):
+    """
+    Enable the per-phase latency histograms and register their hooks with the Flask app.
+    :param server_timing: Also report the phases measured before the response in a Server-Timing header.
+    """
+    PHASE_TIMINGS.enabled = True
+    PHASE_TIMINGS.server_timing = server_timing
+    if server_timing:
+        app.before_request(start_phase_timing)
+    app.after_request(finalize_phase_timing)
+
+
+def mark_worker_dead(pid):
+    """
+    Drop the live gauges of an exited worker process in multiprocess mode,
+    counters and histograms it recorded keep being reported.
+    """
+    if multiprocess_mode_enabled():
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,65 @@
+import time
+import random
+import logging
+from flask import request, g
+
+
+def create_request_logger(logger, sample_rate=1.0):
+    """
+    Creates before/after request hooks writing one structured summary line per request.
+
+    Successful requests are logged at INFO for a sampled fraction of requests. Failed ones
+    (status >= 400) are always logged at WARNING. Nothing is formatted unless the line is
+    actually emitted.
+
+    :param logger: The logger from the Flask app to use for logging.
+    :param sample_rate: Fraction (0.0 - 1.0) of successful requests to log.
+    :return: Tuple (start_request_log, finalize_request_log).
+    """
+
+    def start_request_log():
+        """
+        Record the time the request started.
+        """
+        g.log_start_time = time.perf_counter()
+
+    def finalize_request_log(response):
+        """
+        Log the request summary once the response is ready.
+        """
+        status = response.status_code
+        if status >= 400:
+            level = logging.WARNING
+        elif sample_rate >= 1.0 or random.random() < sample_rate:  # nosec B311
+            level = logging.INFO
+        else:
+            return response
+
+        if logger.isEnabledFor(level):
+            start_time = g.get("log_start_time")
+            duration_ms = (
+                (time.perf_counter() - start_time) * 1000 if start_time else 0.0
+            )
+            logger.log(
+                level,
+                'request method=%s path="%s" status=%s duration_ms=%.2f remote=%s',
+                request.method,
+                request.path,
+                status,
+                duration_ms,
+                request.remote_addr,
+            )
+        return response
+
+    return start_request_log, finalize_request_log
+
+
+def register_request_logging(app, sample_rate=1.0):
+    """
+    Register the request summary hooks with the Flask app.
+    """
+    start_request_log, finalize_request_log = create_request_logger(
+        app.logger, sample_rate
+    )
+    app.before_request(start_request_log)
+    app.after_request(finalize_request_log)
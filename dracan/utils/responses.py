@@ -0,0 +1,30 @@
+import json
+from flask import Response
+
+
+def error_body(message):
+    """
+    Serialize an error message to the JSON body jsonify({"error": message}) would produce.
+    """
+    return json.dumps({"error": message}, separators=(",", ":")).encode() + b"\n"
+
+
+class PreparedError:
+    """
+    Error response whose JSON body is serialized once, when the rules are loaded.
+
+    A fresh Response is built around the cached bytes on every use, so after_request
+    hooks can still modify it safely.
+    """
+
+    __slots__ = ("body", "status")
+
+    def __init__(self, message, status):
+        self.body = error_body(message)
+        self.status = status
+
+    def response(self):
+        """
+        :return: Tuple (response, status) in the shape returned by the validators.
+        """
+        return Response(self.body, mimetype="application/json"), self.status
@@ -0,0 +1,99 @@
+class _Node:
+    __slots__ = ("children", "param", "value", "prefix_value")
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.value = None
+        self.prefix_value = None
+
+
+def split_path(path):
+    """
+    Split a request path into segments, "/api/users/" -> ["api", "users", ""].
+    """
+    return path[1:].split("/") if path.startswith("/") else path.split("/")
+
+
+def is_template(path):
+    """
+    Tell whether a route path contains Flask-style placeholders such as <id> or <path:rest>.
+    """
+    return "<" in path
+
+
+class RouteTrie:
+    """
+    Segment trie matching request paths against route templates in O(number of segments).
+
+    Templates use Flask placeholder syntax:
+      * ``<name>`` or ``<converter:name>`` matches exactly one non-empty segment,
+      * ``<path:name>`` as the last segment matches the rest of the path,
+      * ``/prefix/`` inserted with ``insert_prefix`` matches every path below the prefix.
+
+    Literal segments win over placeholders, which win over prefixes.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _walk(self, segments):
+        node = self.root
+        for segment in segments:
+            if segment.startswith("<") and segment.endswith(">"):
+                node.param = node.param or _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        return node
+
+    def insert(self, template, value):
+        """
+        Register a route template (e.g. "/users/<id>") with the value returned on match.
+        """
+        segments = split_path(template)
+        if segments[-1].startswith("<path:") and segments[-1].endswith(">"):
+            self.insert_prefix("/".join([""] + segments[:-1]) + "/", value)
+            return
+        node = self._walk(segments)
+        if node.value is None:
+            self.size += 1
+            node.value = value
+
+    def insert_prefix(self, prefix, value):
+        """
+        Register a prefix ending with "/" (e.g. "/api/"), matching every path below it.
+        """
+        if not prefix.endswith("/"):
+            raise ValueError(f"Route prefix '{prefix}' must end with '/'")
+        node = self._walk(split_path(prefix)[:-1])
+        if node.prefix_value is None:
+            self.size += 1
+            node.prefix_value = value
+
+    def match(self, path):
+        """
+        Return the value of the most specific template matching the path, or None.
+        """
+        return self._match(self.root, split_path(path), 0)
+
+    def _match(self, node, segments, index):
+        if index == len(segments):
+            return node.value
+
+        child = node.children.get(segments[index])
+        if child is not None:
+            found = self._match(child, segments, index + 1)
+            if found is not None:
+                return found
+
+        if node.param is not None and segments[index]:
+            found = self._match(node.param, segments, index + 1)
+            if found is not None:
+                return found
+
+        return node.prefix_value
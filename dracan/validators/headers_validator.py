@@ -1,5 +1,81 @@
 import re
-from flask import request, jsonify
+from flask import request
+from ..utils.responses import PreparedError
+
+# Header kinds of a compiled required header rule
+ANY_VALUE = "any"
+REGEX_VALUE = "regex"
+EXACT_VALUE = "exact"
+
+
+def environ_key(header):
+    """
+    Translate a header name into its WSGI environ key, e.g. "X-API-KEY" -> "HTTP_X_API_KEY".
+    """
+    key = header.upper().replace("-", "_")
+    if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+        return key
+    return f"HTTP_{key}"
+
+
+class HeaderRulePlan:
+    """
+    Required and prohibited header rules compiled once at startup.
+
+    Required rules keep their configuration order and hold either a compiled regex, an exact
+    value or a wildcard, along with their pre-serialized error responses. Prohibited headers
+    become a frozenset of environ keys. The incoming headers are then inspected in a single
+    pass over the WSGI environ.
+    """
+
+    def __init__(self, required_headers, prohibited_headers):
+        self.required = []
+        for header, expected_value in required_headers.items():
+            missing_error = PreparedError(f"Missing required header '{header}'", 403)
+            if expected_value == "*":
+                kind, pattern, compiled, invalid_error = ANY_VALUE, expected_value, None, None
+            elif expected_value.startswith("regex:"):
+                pattern = expected_value[6:]  # Remove 'regex:' prefix
+                kind, compiled = REGEX_VALUE, re.compile(pattern)
+                invalid_error = PreparedError(
+                    f"Invalid header '{header}': Does not match required pattern", 403
+                )
+            else:
+                kind, pattern, compiled = EXACT_VALUE, expected_value, None
+                invalid_error = PreparedError(
+                    f"Invalid header '{header}': Expected '{expected_value}'", 403
+                )
+            self.required.append(
+                (
+                    header,
+                    environ_key(header),
+                    kind,
+                    pattern,
+                    compiled,
+                    missing_error,
+                    invalid_error,
+                )
+            )
+
+        self.prohibited = [
+            (
+                header,
+                environ_key(header),
+                PreparedError(f"Prohibited header '{header}' must not be present", 403),
+            )
+            for header in prohibited_headers
+        ]
+        self.prohibited_keys = frozenset(key for _, key, _ in self.prohibited)
+        self.watched_keys = self.prohibited_keys | frozenset(
+            rule[1] for rule in self.required
+        )
+
+    def collect(self, environ):
+        """
+        Single pass over the environ, picking the values of all headers referenced by the rules.
+        """
+        watched_keys = self.watched_keys
+        return {key: value for key, value in environ.items() if key in watched_keys}
 
 
 def create_header_validator(rules_config, logger):
@@ -14,83 +90,76 @@ def create_header_validator(rules_config, logger):
     required_headers = rules_config.get("required_headers", {})
     prohibited_headers = rules_config.get("prohibited_headers", [])
 
+    # Compile the rules once instead of re-parsing them for every request
+    plan = HeaderRulePlan(required_headers, prohibited_headers)
+
     def validate_headers():
         """
         Validates request headers based on required and prohibited headers if header validation is enabled.
         :return: Tuple (is_valid, response) - is_valid is True if headers are valid, False otherwise.
         """
         if not header_validation_enabled:
-            logger.info("Header validation is disabled.")
+            logger.debug("Header validation is disabled.")
             return True, None
 
+        present = plan.collect(request.environ)
+
         # Required Headers Validation
-        for header, expected_value in required_headers.items():
-            actual_value = request.headers.get(header)
+        for (
+            header,
+            key,
+            kind,
+            expected_value,
+            compiled,
+            missing_error,
+            invalid_error,
+        ) in plan.required:
+            actual_value = present.get(key)
 
             # Check if the header is present
             if actual_value is None:
                 logger.warning(
-                    f"Header validation failed: Missing required header '{header}'."
-                )
-                return False, (
-                    jsonify({"error": f"Missing required header '{header}'"}),
-                    403,
+                    "Header validation failed: Missing required header '%s'.", header
                 )
+                return False, missing_error.response()
 
             # Handle wildcard ("*") to allow any value
-            if expected_value == "*":
-                logger.info(f"Header '{header}' is present and allowed with any value.")
+            if kind is ANY_VALUE:
                 continue
 
             # Handle regex-based validation
-            if expected_value.startswith("regex:"):
-                pattern = expected_value[6:]  # Remove 'regex:' prefix
-                if not re.match(pattern, actual_value):
+            if kind is REGEX_VALUE:
+                if not compiled.match(actual_value):
                     logger.warning(
-                        f"Header validation failed: '{header}'='{actual_value}' does not match regex '{pattern}'."
+                        "Header validation failed: '%s'='%s' does not match regex '%s'.",
+                        header,
+                        actual_value,
+                        expected_value,
                     )
-                    return False, (
-                        jsonify(
-                            {
-                                "error": f"Invalid header '{header}': Does not match required pattern"
-                            }
-                        ),
-                        403,
-                    )
-                logger.info(f"Header '{header}' matches the specified regex pattern.")
+                    return False, invalid_error.response()
                 continue
 
             # Exact match validation
             if actual_value != expected_value:
                 logger.warning(
-                    f"Header validation failed: '{header}'='{actual_value}' (expected '{expected_value}')."
-                )
-                return False, (
-                    jsonify(
-                        {
-                            "error": f"Invalid header '{header}': Expected '{expected_value}'"
-                        }
-                    ),
-                    403,
+                    "Header validation failed: '%s'='%s' (expected '%s').",
+                    header,
+                    actual_value,
+                    expected_value,
                 )
-            logger.info(
-                f"Header '{header}' is present with the correct value '{expected_value}'."
-            )
+                return False, invalid_error.response()
 
-        # Prohibited Headers Validation
-        for header in prohibited_headers:
-            if header in request.headers:
-                logger.warning(
-                    f"Header validation failed: Prohibited header '{header}' is present."
-                )
-                return False, (
-                    jsonify(
-                        {"error": f"Prohibited header '{header}' must not be present"}
-                    ),
-                    403,
-                )
+        # Prohibited Headers Validation, reported in configuration order
+        if plan.prohibited_keys.intersection(present):
+            for header, key, prohibited_error in plan.prohibited:
+                if key in present:
+                    logger.warning(
+                        "Header validation failed: Prohibited header '%s' is present.",
+                        header,
+                    )
+                    return False, prohibited_error.response()
 
-        logger.info(
+        logger.debug(
             "All required headers are valid and no prohibited headers are present."
         )
         return True, None
@@ -1,5 +1,78 @@
+import os
 from flask import request, jsonify
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+from .schema_codegen import generate_fast_validator
+from ..utils.route_trie import RouteTrie, is_template
+
+
+class CompiledSchema:
+    """
+    JSON schema checked against its meta-schema and compiled once, reused for every request.
+
+    With fast_path enabled, schemas within the supported subset are validated by a generated
+    function first. Data it rejects is re-validated by jsonschema to build the error message.
+    """
+
+    def __init__(self, schema, fast_path=False):
+        validator_cls = validator_for(schema)
+        validator_cls.check_schema(schema)
+        self.schema = schema
+        self.validator = validator_cls(schema)
+        self.fast_check = generate_fast_validator(schema) if fast_path else None
+
+    def validate(self, data):
+        """
+        Validate data against the schema.
+        :raises ValidationError: The same error jsonschema.validate() would raise.
+        """
+        if self.fast_check is not None and self.fast_check(data):
+            return
+        error = best_match(self.validator.iter_errors(data))
+        if error is not None:
+            raise error
+
+
+class RouteSchemas:
+    """
+    Per-route JSON schemas from the "json_schemas" map, keyed by "METHOD /path/template".
+
+    Every schema is compiled at startup. Selection is an exact-match dict lookup on
+    (method, path), falling back to a per-method segment trie for templated paths,
+    so its cost does not grow with the number of routes.
+    """
+
+    def __init__(self, json_schemas, fast_path=False):
+        self.exact = {}
+        self.templates = {}
+
+        for route, schema in json_schemas.items():
+            method, _, path = route.partition(" ")
+            if not method or not path.startswith("/"):
+                raise ValueError(
+                    f"Invalid 'json_schemas' key '{route}', expected 'METHOD /path'"
+                )
+            method = method.upper()
+            compiled = CompiledSchema(schema, fast_path=fast_path)
+            if is_template(path):
+                self.templates.setdefault(method, RouteTrie()).insert(path, compiled)
+            else:
+                self.exact[(method, path)] = compiled
+
+    def __len__(self):
+        return len(self.exact) + sum(len(trie) for trie in self.templates.values())
+
+    def select(self, method, path):
+        """
+        Return the CompiledSchema registered for the method and path, or None.
+        """
+        schema = self.exact.get((method, path))
+        if schema is None:
+            trie = self.templates.get(method)
+            if trie is not None:
+                schema = trie.match(path)
+        return schema
 
 
 def validate_json(data, schema, logger):
@@ -7,18 +80,21 @@ def validate_json(data, schema, logger):
     Validate the given JSON data against the provided schema, including required fields.
 
     :param data: The JSON data to validate.
-    :param schema: The schema to validate against, which includes required fields.
+    :param schema: The schema to validate against, as a dict or a CompiledSchema.
     :param logger: The logger to use for logging.
     :return: Tuple (is_valid, error_message).
     """
+    if not isinstance(schema, CompiledSchema):
+        schema = CompiledSchema(schema)
+
     try:
         # Validate the data against the schema, which includes required fields
-        validate(instance=data, schema=schema)
-        logger.info("JSON validation passed.")  # Log successful validation
+        schema.validate(data)
+        logger.debug("JSON validation passed.")  # Log successful validation
         return True, None
     except ValidationError as e:
         # Return False and a clear error message if validation fails
-        logger.error(f"JSON validation failed: {str(e)}")  # Log validation error
+        logger.error("JSON validation failed: %s", e)  # Log validation error
         return False, str(e)
 
 
@@ -32,30 +108,62 @@ def create_json_validator(rules_config, logger):
     """
     json_validation_enabled = rules_config.get("json_validation_enabled", False)
     json_schema = rules_config.get("json_schema", {})
+    json_schemas = rules_config.get("json_schemas", {})
     detailed_errors_enabled = rules_config.get(
         "detailed_errors_enabled", False
     )  # Default to False
+    fast_path_enabled = os.getenv("JSON_VALIDATION_FAST_PATH", "false").lower() == "true"
+
+    # Check and compile the schemas once at startup instead of on every request
+    compiled_schema = None
+    route_schemas = None
+    if json_validation_enabled:
+        # The global schema keeps applying to POST/PUT requests without a route schema
+        if "json_schema" in rules_config or not json_schemas:
+            compiled_schema = CompiledSchema(json_schema, fast_path=fast_path_enabled)
+        route_schemas = RouteSchemas(json_schemas, fast_path=fast_path_enabled)
+
+    def select_schema():
+        """
+        Pick the route schema for the request, falling back to the global schema for POST/PUT.
+        """
+        schema = route_schemas.select(request.method, request.path)
+        if schema is None and request.method in ["POST", "PUT"]:
+            schema = compiled_schema
+        return schema
 
     def validate_json_request():
         """
         Validates the request JSON against the schema if JSON validation is enabled.
         :return: Tuple (is_valid, response) - is_valid is True if valid, False otherwise.
         """
-        if json_validation_enabled and request.method in ["POST", "PUT"]:
+        if not json_validation_enabled:
+            return True, None
+
+        schema = select_schema()
+        if schema is not None:
             data = request.get_json()
-            is_valid, error_message = validate_json(data, json_schema, logger)
+            is_valid, error_message = validate_json(data, schema, logger)
             if not is_valid:
                 error_message_to_display = (
                     error_message if detailed_errors_enabled else "Invalid JSON format"
                 )
                 logger.warning(
-                    f"Invalid JSON: {error_message_to_display}"
+                    "Invalid JSON: %s", error_message_to_display
                 )  # Log failed request
                 return False, (jsonify({"error": f"{error_message_to_display}"}), 400)
         return True, None
 
+    # Lets engines that receive the body themselves (see dracan.core.asgi) buffer it only
+    # for requests that are validated
+    validate_json_request.select_schema = select_schema
+
     if json_validation_enabled:
-        logger.info("JSON validation is enabled.")
+        logger.info(
+            f"JSON validation is enabled with {len(route_schemas)} route schema(s)."
+        )
+        if fast_path_enabled:
+            logger.info("JSON validation fast path is enabled.")
     else:
         logger.info("JSON validation is disabled.")
 
@@ -22,19 +22,19 @@ def create_method_validator(rules_config, logger):
         :return: Tuple (is_valid, response) - is_valid is True if valid, False otherwise.
         """
         if not method_validation_enabled:
-            logger.info("Method validation is disabled.")
+            logger.debug("Method validation is disabled.")
             return True, None
 
         if request.method not in allowed_methods:
             logger.warning(
-                f"Method {request.method} not allowed."
+                "Method %s not allowed.", request.method
             )  # Log disallowed method
             return False, (
                 jsonify({"error": f"Method {request.method} not allowed"}),
                 405,
             )
 
-        logger.info(f"Method {request.method} is allowed.")  # Log allowed method
+        logger.debug("Method %s is allowed.", request.method)  # Log allowed method
         return True, None
 
     if method_validation_enabled:
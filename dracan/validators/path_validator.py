@@ -1,5 +1,71 @@
 import re
-from flask import request, jsonify
+from flask import request, jsonify, g
+from ..utils.route_trie import RouteTrie
+
+# Regex rules that are a plain literal prefix followed by ".*", e.g. "^/api/.*"
+LITERAL_PREFIX_PATTERN = re.compile(r"\^?((?:[A-Za-z0-9/_~-]|\\\.)*)\.\*")
+
+# Constructs that cannot be merged into one alternation: inline global flags, backreferences, named groups
+UNMERGEABLE_PATTERN = re.compile(r"^\(\?[aiLmsux]+\)|\\[1-9]|\(\?P[<=]")
+
+
+class UriMatcher:
+    """
+    Allowed URI rules compiled once at startup.
+
+    Exact URIs live in a frozenset, literal prefix patterns (e.g. "^/api/.*") in a segment trie
+    and the remaining patterns in a single alternation regex with one named group per rule,
+    so one match call tells which rule allowed the path.
+    """
+
+    def __init__(self, allowed_uris, allowed_uri_patterns):
+        self.exact = frozenset(allowed_uris)
+        self.prefixes = RouteTrie()
+        self.separate = []
+
+        mergeable = []
+        for pattern in allowed_uri_patterns:
+            literal = LITERAL_PREFIX_PATTERN.fullmatch(pattern)
+            if literal and literal.group(1).endswith("/"):
+                self.prefixes.insert_prefix(literal.group(1).replace("\\", ""), pattern)
+            elif UNMERGEABLE_PATTERN.search(pattern):
+                self.separate.append((re.compile(pattern), pattern))
+            else:
+                re.compile(pattern)  # Fail on invalid patterns with their own error
+                mergeable.append(pattern)
+
+        self.rules = mergeable
+        self.combined = (
+            re.compile(
+                "|".join(
+                    f"(?P<r{index}>{pattern})" for index, pattern in enumerate(mergeable)
+                )
+            )
+            if mergeable
+            else None
+        )
+
+    def match(self, path):
+        """
+        Return the rule (exact URI or pattern) allowing the path, or None if no rule matches.
+        """
+        if path in self.exact:
+            return path
+
+        rule = self.prefixes.match(path)
+        if rule is not None:
+            return rule
+
+        if self.combined is not None:
+            matched = self.combined.match(path)
+            if matched is not None:
+                return self.rules[int(matched.lastgroup[1:])]
+
+        for compiled, pattern in self.separate:
+            if compiled.match(path):
+                return pattern
+
+        return None
 
 
 def create_path_validator(rules_config, logger):
@@ -14,32 +80,31 @@ def create_path_validator(rules_config, logger):
     allowed_uris = rules_config.get("allowed_uris", [])
     allowed_uri_patterns = rules_config.get("allowed_uri_patterns", [])
 
+    # Compile all rules once instead of scanning lists and patterns on every request
+    uri_matcher = UriMatcher(allowed_uris, allowed_uri_patterns)
+
     def validate_request_path():
         """
         Validates the request URI against the allowed URIs or patterns if URI validation is enabled.
         :return: Tuple (is_valid, response) - is_valid is True if valid, False otherwise.
         """
         if not uri_validation_enabled:
-            logger.info("URI validation is disabled.")
+            logger.debug("URI validation is disabled.")
             return True, None
 
         # Get the request path
         request_path = request.path
-        logger.info(f"Validating URI: {request_path}")
+        logger.debug("Validating URI: %s", request_path)
 
-        # Check if the request path is in the list of allowed URIs
-        if request_path in allowed_uris:
-            logger.info(f"URI {request_path} is allowed.")
+        # Check if the request path is allowed by any exact URI or pattern
+        rule = uri_matcher.match(request_path)
+        if rule is not None:
+            logger.debug("URI %s is allowed by rule %s.", request_path, rule)
+            g.uri_rule = rule  # Bounded endpoint label for metrics
             return True, None
 
-        # Check if the request path matches any of the allowed URI patterns (regex)
-        for pattern in allowed_uri_patterns:
-            if re.match(pattern, request_path):
-                logger.info(f"URI {request_path} matches pattern {pattern}.")
-                return True, None
-
         # If the path is not allowed, return 403 Forbidden
-        logger.warning(f"URI {request_path} is forbidden.")
+        logger.warning("URI %s is forbidden.", request_path)
         return False, (jsonify({"error": f"URI {request_path} is forbidden"}), 403)
 
     if uri_validation_enabled:
@@ -0,0 +1,245 @@
+"""
+Code generation of fast validation functions for a common subset of JSON schema.
+
+Only keywords with simple, unambiguous semantics are supported: ``type``, ``required``,
+``properties``, ``additionalProperties`` (boolean), ``items`` (single schema), ``enum``
+(of strings / null) and length / range limits. For any other schema ``generate_fast_validator``
+returns None and the caller keeps using the full jsonschema validator.
+"""
+
+# Keywords without effect on validation
+ANNOTATION_KEYWORDS = frozenset(
+    ["$schema", "$id", "$comment", "title", "description", "default", "examples"]
+)
+
+SUPPORTED_KEYWORDS = ANNOTATION_KEYWORDS | frozenset(
+    [
+        "type",
+        "required",
+        "properties",
+        "additionalProperties",
+        "items",
+        "enum",
+        "minLength",
+        "maxLength",
+        "minimum",
+        "maximum",
+        "exclusiveMinimum",
+        "exclusiveMaximum",
+        "minItems",
+        "maxItems",
+    ]
+)
+
+# Python expressions mirroring jsonschema's default type checker, "{v}" is the checked value
+TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "((isinstance({v}, int) and not isinstance({v}, bool))"
+    " or (isinstance({v}, float) and {v}.is_integer()))",
+}
+
+# Drafts before 6 use boolean exclusiveMinimum / exclusiveMaximum, leave them to jsonschema
+LEGACY_DRAFTS = ("draft-03", "draft-04")
+
+
+class UnsupportedSchema(Exception):
+    """
+    Raised while generating code for a schema outside the supported subset.
+    """
+
+
+class _CodeGenerator:
+    def __init__(self):
+        self.lines = []
+        self.constants = {}
+        self.counter = 0
+
+    def variable(self):
+        self.counter += 1
+        return f"v{self.counter}"
+
+    def constant(self, value):
+        name = f"c{len(self.constants)}"
+        self.constants[name] = value
+        return name
+
+    def emit(self, indent, line):
+        self.lines.append("    " * indent + line)
+
+    def guarded(self, indent, headers, build):
+        """
+        Emit nested block headers followed by the checks produced by build(indent).
+        Headers are dropped again when build emits nothing.
+        """
+        start = len(self.lines)
+        for header in headers:
+            self.emit(indent, header)
+            if header.endswith(":"):
+                indent += 1
+        mark = len(self.lines)
+        build(indent)
+        if len(self.lines) == mark:
+            del self.lines[start:]
+
+    def fail_unless(self, indent, condition):
+        self.emit(indent, f"if not ({condition}):")
+        self.emit(indent + 1, "return False")
+
+    def schema(self, schema, var, indent):
+        if schema is True:
+            return
+        if schema is False:
+            self.emit(indent, "return False")
+            return
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema("Schema must be an object or a boolean")
+
+        unsupported = set(schema) - SUPPORTED_KEYWORDS
+        if unsupported:
+            raise UnsupportedSchema(f"Unsupported keywords: {sorted(unsupported)}")
+
+        if "type" in schema:
+            self.type_check(schema["type"], var, indent)
+        if "enum" in schema:
+            self.enum_check(schema["enum"], var, indent)
+        self.string_checks(schema, var, indent)
+        self.number_checks(schema, var, indent)
+        self.object_checks(schema, var, indent)
+        self.array_checks(schema, var, indent)
+
+    def type_check(self, types, var, indent):
+        types = [types] if isinstance(types, str) else types
+        if not isinstance(types, list) or not types:
+            raise UnsupportedSchema("Invalid 'type' keyword")
+        checks = []
+        for type_name in types:
+            if type_name not in TYPE_CHECKS:
+                raise UnsupportedSchema(f"Unsupported type {type_name!r}")
+            checks.append(TYPE_CHECKS[type_name].format(v=var))
+        self.fail_unless(indent, " or ".join(checks))
+
+    def enum_check(self, values, var, indent):
+        if not isinstance(values, list) or not all(
+            value is None or isinstance(value, str) for value in values
+        ):
+            raise UnsupportedSchema("Only enums of strings and null are supported")
+        strings = self.constant(frozenset(value for value in values if value is not None))
+        condition = f"(isinstance({var}, str) and {var} in {strings})"
+        if None in values:
+            condition += f" or {var} is None"
+        self.fail_unless(indent, condition)
+
+    def string_checks(self, schema, var, indent):
+        checks = []
+        if "minLength" in schema:
+            checks.append(f"len({var}) >= {int(schema['minLength'])}")
+        if "maxLength" in schema:
+            checks.append(f"len({var}) <= {int(schema['maxLength'])}")
+        if checks:
+            self.emit(indent, f"if isinstance({var}, str):")
+            self.fail_unless(indent + 1, " and ".join(checks))
+
+    def number_checks(self, schema, var, indent):
+        operators = {
+            "minimum": ">=",
+            "maximum": "<=",
+            "exclusiveMinimum": ">",
+            "exclusiveMaximum": "<",
+        }
+        checks = []
+        for keyword, operator in operators.items():
+            if keyword not in schema:
+                continue
+            limit = schema[keyword]
+            if isinstance(limit, bool) or not isinstance(limit, (int, float)):
+                raise UnsupportedSchema(f"Non numeric '{keyword}'")
+            checks.append(f"{var} {operator} {limit!r}")
+        if checks:
+            self.emit(indent, f"if {TYPE_CHECKS['number'].format(v=var)}:")
+            self.fail_unless(indent + 1, " and ".join(checks))
+
+    def object_checks(self, schema, var, indent):
+        required = schema.get("required", [])
+        properties = schema.get("properties", {})
+        additional = schema.get("additionalProperties", True)
+        if not isinstance(required, list) or not all(
+            isinstance(name, str) for name in required
+        ):
+            raise UnsupportedSchema("Invalid 'required' keyword")
+        if not isinstance(properties, dict):
+            raise UnsupportedSchema("Invalid 'properties' keyword")
+        if not isinstance(additional, bool):
+            raise UnsupportedSchema("Only boolean 'additionalProperties' is supported")
+
+        def build(indent):
+            for name in required:
+                self.fail_unless(indent, f"{name!r} in {var}")
+            if not additional:
+                allowed = self.constant(frozenset(properties))
+                self.fail_unless(indent, f"{allowed}.issuperset({var})")
+            for name, subschema in properties.items():
+                child = self.variable()
+                self.guarded(
+                    indent,
+                    [
+                        f"{child} = {var}.get({name!r}, _MISSING)",
+                        f"if {child} is not _MISSING:",
+                    ],
+                    lambda indent: self.schema(subschema, child, indent),
+                )
+
+        self.guarded(indent, [f"if isinstance({var}, dict):"], build)
+
+    def array_checks(self, schema, var, indent):
+        items = schema.get("items", True)
+        if isinstance(items, list):
+            raise UnsupportedSchema("Tuple-form 'items' is not supported")
+        checks = []
+        if "minItems" in schema:
+            checks.append(f"len({var}) >= {int(schema['minItems'])}")
+        if "maxItems" in schema:
+            checks.append(f"len({var}) <= {int(schema['maxItems'])}")
+
+        def build(indent):
+            if checks:
+                self.fail_unless(indent, " and ".join(checks))
+            child = self.variable()
+            self.guarded(
+                indent,
+                [f"for {child} in {var}:"],
+                lambda indent: self.schema(items, child, indent),
+            )
+
+        self.guarded(indent, [f"if isinstance({var}, list):"], build)
+
+
+def generate_fast_validator(schema):
+    """
+    Generate a function returning True when the data is valid against the schema.
+
+    :param schema: The JSON schema to compile.
+    :return: Validation function or None if the schema is outside of the supported subset.
+    """
+    if isinstance(schema, dict) and any(
+        draft in str(schema.get("$schema", "")) for draft in LEGACY_DRAFTS
+    ):
+        return None
+
+    generator = _CodeGenerator()
+    try:
+        generator.schema(schema, "v0", 1)
+    except UnsupportedSchema:
+        return None
+
+    source = "\n".join(["def check(v0):", *generator.lines, "    return True"])
+    namespace = dict(generator.constants, _MISSING=object())
+    # Source is built from schema keywords only: names via repr(), limits as numbers
+    exec(  # nosec B102
+        compile(source, "<json-schema-fast-path>", "exec"), namespace
+    )
+    return namespace["check"]
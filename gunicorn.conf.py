@@ -0,0 +1,104 @@
+import os
+import shutil
+
+# Proxy engine: "wsgi" (Flask, sync workers) or "asgi" (asyncio workers, non-blocking upstream calls)
+engine = os.getenv("DRACAN_ENGINE", "wsgi").lower()
+
+bind = "0.0.0.0:5000"
+workers = 4
+
+if engine == "asgi":
+    wsgi_app = "asgi:app"
+    worker_class = "dracan.core.asgi_worker.DracanUvicornWorker"
+elif engine == "wsgi":
+    wsgi_app = "main:app"
+else:
+    raise ValueError(f"Unknown DRACAN_ENGINE '{engine}', expected 'wsgi' or 'asgi'")
+
+# Rate limit table shared by the workers of this master, unless a storage is configured
+shared_rate_limit_table = None
+
+# Process serving health checks and metrics for this master
+monitoring_process = None
+
+# Prometheus metric files written by the workers and served by this master
+metrics_enabled = os.getenv("ALLOW_METRICS_ENDPOINT", "false").lower() == "true"
+shared_metrics_dir = None
+
+
+def on_starting(server):
+    global shared_rate_limit_table
+    if "RATE_LIMIT_STORAGE_URI" not in os.environ:
+        from dracan.middleware.shm_storage import default_table_path
+
+        shared_rate_limit_table = default_table_path(f"dracan-rate-limit-{os.getpid()}")
+        if os.path.exists(shared_rate_limit_table):
+            os.unlink(shared_rate_limit_table)
+        # Inherited by the workers forked from this process
+        os.environ["RATE_LIMIT_STORAGE_URI"] = f"shm://{shared_rate_limit_table}"
+
+    global shared_metrics_dir
+    if metrics_enabled and not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from dracan.middleware.shm_storage import default_table_path
+
+        # Set before any metric exists, so the workers record into per-process files
+        shared_metrics_dir = default_table_path(f"dracan-metrics-{os.getpid()}")
+        shutil.rmtree(shared_metrics_dir, ignore_errors=True)
+        os.makedirs(shared_metrics_dir, mode=0o700)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = shared_metrics_dir
+
+    global monitoring_process
+    healthcheck_enabled = os.getenv("HEALTHCHECK_DISABLED", "false").lower() != "true"
+    if healthcheck_enabled or metrics_enabled:
+        # Forked before any thread exists, the master itself never runs one when forking workers
+        master_pid = os.getpid()
+        monitoring_process = os.fork()
+        if monitoring_process == 0:
+            try:
+                serve_monitoring(master_pid, healthcheck_enabled)
+            finally:
+                os._exit(0)
+
+
+def serve_monitoring(master_pid, healthcheck_enabled):
+    """
+    Serve health checks and metrics away from the workers busy with proxy traffic,
+    until the master process is gone.
+    """
+    import time
+
+    if healthcheck_enabled:
+        from dracan.core.health_check import start_health_check_server
+
+        start_health_check_server()
+
+    if metrics_enabled:
+        from dracan.utils.metrics import start_metrics_server
+
+        # One endpoint for the host, aggregating the files of every worker
+        start_metrics_server(port=int(os.getenv("METRICS_PORT", 9100)))
+
+    while os.getppid() == master_pid:
+        time.sleep(1)
+
+
+def child_exit(server, worker):
+    if metrics_enabled:
+        from dracan.utils.metrics import mark_worker_dead
+
+        mark_worker_dead(worker.pid)
+
+
+def on_exit(server):
+    if monitoring_process:
+        import signal
+
+        try:
+            os.kill(monitoring_process, signal.SIGTERM)
+            os.waitpid(monitoring_process, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass  # Already gone and reaped by the master
+    if shared_rate_limit_table and os.path.exists(shared_rate_limit_table):
+        os.unlink(shared_rate_limit_table)
+    if shared_metrics_dir:
+        shutil.rmtree(shared_metrics_dir, ignore_errors=True)
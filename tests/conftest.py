@@ -0,0 +1,15 @@
+import pytest
+from tests.upstream_mock import start_upstream, stop_server
+
+
+@pytest.fixture(scope="module")
+def upstream(request):
+    """
+    Fixture to start a destination for the module, serving the handler class the tests
+    pass through indirect parametrization:
+
+        @pytest.mark.parametrize("upstream", [EchoHandler], indirect=True)
+    """
+    server = start_upstream(request.param)
+    yield server
+    stop_server(server)
@@ -0,0 +1,201 @@
+import json
+import asyncio
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from dracan.core.asgi import build_environ, create_asgi_app  # noqa: E402
+from tests.upstream_mock import UpstreamHandler, destination  # noqa: E402
+
+
+class EchoHandler(UpstreamHandler):
+    """Upstream echoing back the method, path and raw body it received."""
+
+    def echo(self):
+        body = self.read_body()
+        if self.path.endswith("/redirect"):
+            self.send_response(302)
+            self.send_header("Location", "/elsewhere")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.dumps(
+            {"method": self.command, "path": self.path, "body": body.decode()}
+        ).encode()
+        self.send_response(201 if self.command == "POST" else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header(
+            "X-Received-Transfer-Encoding", self.headers.get("Transfer-Encoding", "")
+        )
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = echo
+
+
+echo_upstream = pytest.mark.parametrize("upstream", [EchoHandler], indirect=True)
+
+
+@pytest.fixture(scope="module")
+def call(tmp_path_factory, upstream):
+    """
+    Fixture building the ASGI engine from config files pointing at the echo upstream,
+    returning a function sending one request to it.
+    """
+    config_dir = tmp_path_factory.mktemp("config")
+    (config_dir / "proxy_config.json").write_text(json.dumps(destination(upstream)))
+    (config_dir / "rules_config.json").write_text(
+        json.dumps(
+            {
+                "allowed_methods": ["GET", "POST", "PUT", "DELETE"],
+                "method_validation_enabled": True,
+                "uri_validation_enabled": True,
+                "allowed_uri_patterns": ["^/api/.*"],
+                "header_validation_enabled": True,
+                "required_headers": {"X-Api-Key": "*"},
+                "payload_limiting_enabled": True,
+                "max_payload_size": 64,
+                "json_validation_enabled": True,
+                "json_schema": {"type": "object", "required": ["name"]},
+            }
+        )
+    )
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("CONFIG_LOCATION", str(config_dir))
+        mp.setenv("RATE_LIMITING_ENABLED", "false")
+        app = create_asgi_app()
+
+    # One event loop for the module, as in a server process, so pooled connections stay usable
+    loop = asyncio.new_event_loop()
+
+    def send_request(method, path, **kwargs):
+        async def request():
+            transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 1234))
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://dracan"
+            ) as client:
+                return await client.request(method, path, **kwargs)
+
+        return loop.run_until_complete(request())
+
+    yield send_request
+    if app.client is not None:
+        loop.run_until_complete(app.client.aclose())
+    loop.close()
+
+
+@echo_upstream
+def test_forwards_valid_request(call):
+    """
+    Test that a valid request is forwarded with its body byte for byte.
+    """
+    body = b'{ "name" : "John" }'
+    response = call(
+        "POST",
+        "/api/users",
+        content=body,
+        headers={"X-Api-Key": "k", "Content-Type": "application/json"},
+    )
+    assert response.status_code == 201
+    assert response.json() == {
+        "method": "POST",
+        "path": "/api/users",
+        "body": body.decode(),
+    }
+
+
+@echo_upstream
+@pytest.mark.parametrize("method", ["GET", "DELETE"])
+def test_forwards_query_string(call, method):
+    """
+    Test that requests keep their query string whatever the method.
+    """
+    response = call(method, "/api/items?page=2", headers={"X-Api-Key": "k"})
+    assert response.status_code == 200
+    assert response.json()["path"] == "/api/items?page=2"
+
+
+async def chunked(body):
+    """Request body sent without Content-Length."""
+    yield body
+
+
+@echo_upstream
+@pytest.mark.parametrize(
+    "method, path, transfer_encoding",
+    [("DELETE", "/api/items", "chunked"), ("POST", "/api/users", "")],
+)
+def test_body_buffered_only_when_validated(call, method, path, transfer_encoding):
+    """
+    Test that only bodies with a JSON schema to check are received before forwarding,
+    others are streamed to the destination as they arrive.
+    """
+    body = b'{"name": "x"}'
+    response = call(
+        method,
+        path,
+        content=chunked(body),
+        headers={"X-Api-Key": "k", "Content-Type": "application/json"},
+    )
+    assert response.json()["body"] == body.decode()
+    assert response.headers["X-Received-Transfer-Encoding"] == transfer_encoding
+
+
+@echo_upstream
+@pytest.mark.parametrize(
+    "method, path, kwargs, status",
+    [
+        ("GET", "/other", {"headers": {"X-Api-Key": "k"}}, 403),
+        ("GET", "/api/items", {}, 403),
+        ("POST", "/api/users", {"headers": {"X-Api-Key": "k"}, "json": {}}, 400),
+        ("PATCH", "/api/users", {"headers": {"X-Api-Key": "k"}}, 405),
+        (
+            "POST",
+            "/api/users",
+            {"headers": {"X-Api-Key": "k"}, "json": {"name": "x" * 100}},
+            413,
+        ),
+    ],
+)
+def test_rules_are_shared_with_flask_app(call, method, path, kwargs, status):
+    """
+    Test that the ASGI engine applies the same rules as the Flask app.
+    """
+    response = call(method, path, **kwargs)
+    assert response.status_code == status
+    if status != 405:
+        assert "error" in response.json()
+
+
+@echo_upstream
+def test_redirect_is_relayed(call):
+    """
+    Test that an upstream redirect is relayed to the client instead of being followed.
+    """
+    response = call("GET", "/api/redirect", headers={"X-Api-Key": "k"})
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/elsewhere"
+
+
+def test_build_environ_merges_headers():
+    """
+    Test that ASGI headers are translated into WSGI environ keys.
+    """
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/ü",
+        "query_string": b"a=1",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"x-forwarded-for", b"10.0.0.1"),
+            (b"x-forwarded-for", b"10.0.0.2"),
+        ],
+    }
+    environ = build_environ(scope, None)
+    assert environ["CONTENT_TYPE"] == "application/json"
+    assert environ["HTTP_X_FORWARDED_FOR"] == "10.0.0.1,10.0.0.2"
+    assert environ["PATH_INFO"] == "/api/ü".encode("utf-8").decode("latin-1")
+    assert environ["QUERY_STRING"] == "a=1"
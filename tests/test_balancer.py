@@ -0,0 +1,171 @@
+import socket
+import pytest
+from collections import Counter
+from flask import Flask
+from dracan.core.balancer import LoadBalancer, Upstream, create_load_balancer
+from dracan.core.proxy import handle_proxy
+from tests.upstream_mock import UpstreamHandler, start_upstream, stop_server
+
+
+def upstreams(*weights):
+    """Upstreams on ports 8001, 8002, ... with the given weights."""
+    return [
+        Upstream({"host": "127.0.0.1", "port": 8001 + i, "path": "", "weight": weight})
+        for i, weight in enumerate(weights)
+    ]
+
+
+def picks(balancer, count):
+    """Ports picked by count requests released right away."""
+    ports = []
+    for _ in range(count):
+        upstream = balancer.acquire()
+        ports.append(upstream.port)
+        balancer.release(upstream)
+    return ports
+
+
+def test_weighted_round_robin():
+    """
+    Test that round robin follows the weights and spreads the heavier upstream out.
+    """
+    balancer = LoadBalancer(upstreams(3, 1), algorithm="round_robin")
+    ports = picks(balancer, 8)
+    assert Counter(ports) == {8001: 6, 8002: 2}
+    assert ports[:4].count(8002) == 1
+
+
+def test_least_outstanding():
+    """
+    Test that the upstream with the fewest in-flight requests is picked.
+    """
+    balancer = LoadBalancer(upstreams(1, 1, 1), algorithm="least_outstanding")
+    held = [balancer.acquire() for _ in range(3)]
+    assert sorted(upstream.port for upstream in held) == [8001, 8002, 8003]
+
+    balancer.release(held[1])
+    assert balancer.acquire() is held[1]
+
+
+def test_power_of_two_prefers_less_loaded():
+    """
+    Test that power-of-two choices avoids a busy upstream.
+    """
+    balancer = LoadBalancer(upstreams(1, 1), algorithm="power_of_two")
+    busy = balancer.upstreams[0]
+    busy.outstanding = 100
+    ports = picks(balancer, 50)
+    assert ports.count(8002) > ports.count(8001)
+
+
+def test_passive_ejection_and_recovery(monkeypatch):
+    """
+    Test that consecutive failures eject an upstream until the ejection time has passed.
+    """
+    clock = [1000.0]
+    monkeypatch.setattr("dracan.core.balancer.time.monotonic", lambda: clock[0])
+    balancer = LoadBalancer(upstreams(1, 1), max_failures=2, ejection_time=10)
+    failing = balancer.upstreams[0]
+
+    for _ in range(2):
+        failing.outstanding += 1
+        balancer.release(failing, failed=True)
+    assert set(picks(balancer, 4)) == {8002}
+
+    clock[0] += 11
+    assert set(picks(balancer, 4)) == {8001, 8002}
+
+
+def test_success_resets_failures():
+    """
+    Test that only consecutive failures count.
+    """
+    balancer = LoadBalancer(upstreams(1), max_failures=2)
+    upstream = balancer.upstreams[0]
+    for failed in (True, False, True):
+        upstream.outstanding += 1
+        balancer.release(upstream, failed=failed)
+    assert upstream.ejected_until == 0.0
+
+
+def test_all_ejected_uses_every_upstream():
+    """
+    Test that ejecting every upstream does not leave requests without a destination.
+    """
+    balancer = LoadBalancer(upstreams(1, 1), max_failures=1)
+    for upstream in balancer.upstreams:
+        upstream.outstanding += 1
+        balancer.release(upstream, failed=True)
+    assert set(picks(balancer, 4)) == {8001, 8002}
+
+
+def test_invalid_settings():
+    """
+    Test that unknown algorithms and invalid weights are refused at startup.
+    """
+    with pytest.raises(ValueError):
+        LoadBalancer(upstreams(1), algorithm="random")
+    with pytest.raises(ValueError):
+        upstreams(0)
+
+
+class NamedHandler(UpstreamHandler):
+    """Upstream answering with its own port."""
+
+    def do_GET(self):
+        body = str(self.server.server_port).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def upstream_ports():
+    """
+    Fixture to start two upstreams, plus a port nothing listens on.
+    """
+    servers = [start_upstream(NamedHandler) for _ in range(2)]
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        dead_port = sock.getsockname()[1]
+
+    yield [server.server_port for server in servers], dead_port
+    for server in servers:
+        stop_server(server)
+
+
+def test_requests_spread_and_dead_upstream_ejected(upstream_ports):
+    """
+    Test that requests are spread over the destinations and a dead one is ejected.
+    """
+    ports, dead_port = upstream_ports
+    proxy_config = {
+        "destinations": [
+            {"host": "127.0.0.1", "port": port, "path": ""}
+            for port in ports + [dead_port]
+        ],
+        "load_balancing": {"algorithm": "round_robin", "max_failures": 2},
+    }
+    app = Flask(__name__)
+    balancer = create_load_balancer(proxy_config, app.logger)
+
+    @app.route("/<path:sub>")
+    def proxy_route(sub):
+        return handle_proxy(
+            proxy_config, lambda: (True, None), sub=sub, balancer=balancer
+        )
+
+    client = app.test_client()
+    answers = []
+    for _ in range(12):
+        response = client.get("/data")
+        answers.append((response.status_code, response.get_data(as_text=True)))
+        response.close()  # Ends the request for the balancer, as the server does
+
+    statuses = Counter(status for status, _ in answers)
+    assert statuses[500] == 2
+    served = Counter(body for _, body in answers[-6:])
+    assert served == {str(ports[0]): 3, str(ports[1]): 3}
+    assert all(upstream.outstanding == 0 for upstream in balancer.upstreams)
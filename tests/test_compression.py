@@ -0,0 +1,161 @@
+import gzip
+import json
+import zlib
+import pytest
+from flask import Flask, Response, request
+from werkzeug.datastructures import Headers
+from dracan.core.compression import (
+    CompressedBody,
+    GzipEncoder,
+    ResponseCompressor,
+    register_compression,
+)
+from dracan.core.response_cache import ResponseCache
+
+PAYLOAD = json.dumps([{"id": i, "name": f"item {i}"} for i in range(200)]).encode()
+
+
+@pytest.fixture
+def client():
+    """
+    Fixture for an app serving a few kinds of responses through the compressor.
+    """
+    app = Flask(__name__)
+    register_compression(app, ResponseCompressor(min_size=1024))
+
+    @app.route("/json")
+    def json_body():
+        return Response(PAYLOAD, mimetype="application/json", headers={"ETag": '"v1"'})
+
+    @app.route("/small")
+    def small_body():
+        return Response(b'{"ok": true}', mimetype="application/json")
+
+    @app.route("/png")
+    def png_body():
+        return Response(PAYLOAD, mimetype="image/png")
+
+    @app.route("/encoded")
+    def encoded_body():
+        return Response(
+            gzip.compress(PAYLOAD),
+            mimetype="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+    @app.route("/no-transform")
+    def no_transform_body():
+        return Response(
+            PAYLOAD, mimetype="application/json", headers={"Cache-Control": "no-transform"}
+        )
+
+    @app.route("/stream")
+    def streamed_body():
+        chunks = (PAYLOAD[i : i + 1000] for i in range(0, len(PAYLOAD), 1000))
+        return Response(chunks, mimetype="application/json")
+
+    return app.test_client()
+
+
+def test_compresses_accepted_coding(client):
+    """
+    Test that an allowed response is gzip-compressed with its headers adjusted.
+    """
+    response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == PAYLOAD
+    assert int(response.headers["Content-Length"]) == len(response.data) < len(PAYLOAD)
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"] == 'W/"v1"'
+
+
+@pytest.mark.parametrize(
+    "path, accept_encoding",
+    [
+        ("/json", None),
+        ("/json", "deflate"),
+        ("/json", "gzip;q=0"),
+        ("/small", "gzip"),
+        ("/png", "gzip"),
+        ("/no-transform", "gzip"),
+    ],
+)
+def test_left_uncompressed(client, path, accept_encoding):
+    """
+    Test that responses are sent as is without an acceptable coding or when not eligible.
+    """
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    response = client.get(path, headers=headers)
+    assert "Content-Encoding" not in response.headers
+
+
+def test_already_encoded_is_not_compressed_again(client):
+    """
+    Test that a body encoded by the destination keeps its encoding.
+    """
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert gzip.decompress(response.data) == PAYLOAD
+
+
+def test_streamed_body_is_compressed_incrementally(client):
+    """
+    Test that streamed bodies are compressed chunk by chunk, each chunk decodable on arrival.
+    """
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.data) == PAYLOAD
+
+    decoder = zlib.decompressobj(31)
+    body = CompressedBody(iter([b"first chunk", b"second chunk"]), GzipEncoder())
+    chunks = iter(body)
+    assert decoder.decompress(next(chunks)) == b"first chunk"
+
+
+def test_cache_entry_compressed_once():
+    """
+    Test that a cached body is compressed once per coding and counted in the cache size.
+    """
+    cache = ResponseCache(1 << 20, 1 << 16)
+    entry = cache.store(
+        "/a", Headers(), 200, Headers([("Content-Length", str(len(PAYLOAD)))]), PAYLOAD, 60
+    )
+    size = cache.size
+    calls = []
+
+    def encode(body):
+        calls.append(body)
+        return gzip.compress(body)
+
+    first = cache.encoded(entry, "gzip", encode)
+    assert cache.encoded(entry, "gzip", encode) is first
+    assert len(calls) == 1
+    assert cache.size == size + len(first)
+
+
+def test_cached_response_compressed_on_every_hit():
+    """
+    Test that compressing a response served from the cache leaves the stored entry untouched.
+    """
+    cache = ResponseCache(1 << 20, 1 << 16)
+    entry = cache.store(
+        "/a",
+        Headers(),
+        200,
+        Headers([("Content-Type", "application/json"), ("Content-Length", str(len(PAYLOAD)))]),
+        PAYLOAD,
+        60,
+    )
+    app = Flask(__name__)
+    register_compression(app, ResponseCompressor(cache=cache))
+
+    @app.route("/a")
+    def cached_body():
+        return entry.response(request)
+
+    client = app.test_client()
+    for _ in range(2):
+        response = client.get("/a", headers={"Accept-Encoding": "gzip"})
+        assert gzip.decompress(response.data) == PAYLOAD
+    assert "Content-Encoding" not in entry.headers
+    assert list(entry.encodings) == ["gzip"]
@@ -278,3 +278,61 @@ def test_load_proxy_config_with_extra_fields(setup_extra_fields_config, monkeypa
         KeyError, match="Unexpected fields in 'destination': extra_field"
     ):
         load_proxy_config()
+
+
+def write_proxy_config(tmp_path, config):
+    """Write proxy_config.json into tmp_path and return the directory."""
+    (tmp_path / "proxy_config.json").write_text(json.dumps(config))
+    return tmp_path
+
+
+def test_load_proxy_config_with_destinations(tmp_path, monkeypatch):
+    """
+    Test loading a proxy configuration with several weighted destinations.
+    """
+    config = {
+        "destinations": [
+            {"host": "10.0.0.1", "port": 8080, "path": "/", "weight": 2},
+            {"host": "10.0.0.2", "port": 8080, "path": "/"},
+        ],
+        "load_balancing": {"algorithm": "least_outstanding", "max_failures": 3},
+    }
+    monkeypatch.setenv("CONFIG_LOCATION", str(write_proxy_config(tmp_path, config)))
+
+    assert load_proxy_config() == config
+
+
+@pytest.mark.parametrize(
+    "config, message",
+    [
+        (
+            {
+                "destination": {"host": "a", "port": 1, "path": "/"},
+                "destinations": [{"host": "b", "port": 1, "path": "/"}],
+            },
+            "Only one of 'destination' or 'destinations'",
+        ),
+        ({"destinations": []}, "'destinations' must be a non-empty list"),
+        (
+            {"destinations": [{"host": "a", "port": 1}]},
+            r"Missing required fields in 'destinations\[0\]': path",
+        ),
+        (
+            {
+                "destinations": [{"host": "a", "port": 1, "path": "/"}],
+                "load_balancing": {"retries": 3},
+            },
+            "Unexpected fields in 'load_balancing': retries",
+        ),
+    ],
+)
+def test_load_proxy_config_with_invalid_destinations(
+    tmp_path, monkeypatch, config, message
+):
+    """
+    Test that invalid 'destinations' configurations are refused.
+    """
+    monkeypatch.setenv("CONFIG_LOCATION", str(write_proxy_config(tmp_path, config)))
+
+    with pytest.raises(KeyError, match=message):
+        load_proxy_config()
@@ -0,0 +1,104 @@
+import logging
+import pytest
+from flask import Flask
+from dracan.core.cors import create_cors_policy, register_cors
+
+RULES = {
+    "cors_enabled": True,
+    "cors_allowed_origins": ["https://app.example.com"],
+    "cors_allowed_headers": ["Content-Type", "X-API-KEY"],
+    "cors_max_age": 300,
+    "allowed_methods": ["GET", "POST"],
+}
+
+
+def make_client(rules):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/<path:sub>", methods=["GET", "POST", "OPTIONS"])
+    def proxy_route(sub):
+        calls.append(sub)
+        return {"proxied": sub}
+
+    policy = create_cors_policy(rules, logging.getLogger(__name__))
+    if policy is not None:
+        register_cors(app, policy)
+    return app.test_client(), calls
+
+
+def preflight_headers(origin="https://app.example.com", method="POST", headers=None):
+    values = {"Origin": origin, "Access-Control-Request-Method": method}
+    if headers:
+        values["Access-Control-Request-Headers"] = headers
+    return values
+
+
+def test_preflight_answered_at_edge():
+    """
+    Test that an allowed preflight is answered from config without reaching the destination.
+    """
+    client, calls = make_client(RULES)
+    response = client.options(
+        "/api/items", headers=preflight_headers(headers="content-type, x-api-key")
+    )
+    assert response.status_code == 204
+    assert response.headers["Access-Control-Allow-Origin"] == "https://app.example.com"
+    assert response.headers["Access-Control-Allow-Methods"] == "GET, POST"
+    assert response.headers["Access-Control-Allow-Headers"] == "content-type, x-api-key"
+    assert response.headers["Access-Control-Max-Age"] == "300"
+    assert calls == []
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        preflight_headers(origin="https://evil.example.com"),
+        preflight_headers(method="DELETE"),
+        preflight_headers(headers="X-Other"),
+    ],
+)
+def test_preflight_refused(headers):
+    """
+    Test that preflights for other origins, methods or headers are refused.
+    """
+    client, calls = make_client(RULES)
+    response = client.options("/api/items", headers=headers)
+    assert response.status_code == 403
+    assert calls == []
+
+
+def test_plain_options_is_forwarded():
+    """
+    Test that OPTIONS without preflight headers reaches the destination.
+    """
+    client, calls = make_client(RULES)
+    assert client.options("/api/items").status_code == 200
+    assert calls == ["api/items"]
+
+
+def test_allow_origin_on_responses():
+    """
+    Test that responses to allowed origins can be read by them, others get no CORS headers.
+    """
+    client, _ = make_client(RULES)
+    allowed = client.get("/api/items", headers={"Origin": "https://app.example.com"})
+    assert allowed.headers["Access-Control-Allow-Origin"] == "https://app.example.com"
+    assert "Origin" in allowed.headers["Vary"]
+    other = client.get("/api/items", headers={"Origin": "https://evil.example.com"})
+    assert "Access-Control-Allow-Origin" not in other.headers
+
+
+def test_wildcard_origin_and_disabled():
+    """
+    Test the "*" origin, and that nothing is answered at the edge when CORS is disabled.
+    """
+    client, _ = make_client(dict(RULES, cors_allowed_origins=["*"]))
+    response = client.options(
+        "/api/items", headers=preflight_headers(origin="https://any.example")
+    )
+    assert response.headers["Access-Control-Allow-Origin"] == "*"
+
+    client, calls = make_client(dict(RULES, cors_enabled=False))
+    client.options("/api/items", headers=preflight_headers())
+    assert calls == ["api/items"]
@@ -0,0 +1,100 @@
+import json
+import pytest
+from flask import Flask
+from dracan.core.proxy import handle_proxy
+from tests.upstream_mock import UpstreamHandler, destination
+
+METHODS = ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
+
+class EchoHandler(UpstreamHandler):
+    """Upstream echoing back the method, path and body it received."""
+
+    def echo(self):
+        body = self.read_body()
+        if self.path.endswith("/redirect"):
+            self.send_response(302)
+            self.send_header("Location", "/elsewhere")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.dumps(
+            {"method": self.command, "path": self.path, "body": body.decode()}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = echo
+
+
+pytestmark = pytest.mark.parametrize("upstream", [EchoHandler], indirect=True)
+
+
+@pytest.fixture(scope="module")
+def client(upstream):
+    """
+    Fixture for a proxy accepting every method in front of the echo upstream.
+    """
+    proxy_config = destination(upstream)
+    app = Flask(__name__)
+
+    @app.route("/<path:sub>", methods=METHODS)
+    def proxy_route(sub):
+        return handle_proxy(proxy_config, lambda: (True, None), sub=sub)
+
+    return app.test_client()
+
+
+@pytest.mark.parametrize("method", ["PATCH", "DELETE", "OPTIONS", "PUT"])
+def test_any_method_is_forwarded(client, method):
+    """
+    Test that methods beyond GET and POST reach the destination with their body.
+    """
+    response = client.open("/items/1", method=method, data=b'{"name": "x"}')
+    assert response.status_code == 200
+    assert response.json == {
+        "method": method,
+        "path": "/items/1",
+        "body": '{"name": "x"}',
+    }
+
+
+@pytest.mark.parametrize("method", ["DELETE", "PATCH", "POST"])
+def test_query_string_forwarded_with_any_method(client, method):
+    """
+    Test that the query string reaches the destination whatever the method.
+    """
+    response = client.open("/items?id=5&tag=a", method=method)
+    assert response.json["path"] == "/items?id=5&tag=a"
+
+
+def test_bodyless_request_sends_no_body(client):
+    """
+    Test that a request without a body is not forwarded with an empty chunked one.
+    """
+    response = client.delete("/items/1")
+    assert response.json["body"] == ""
+
+
+def test_head_keeps_length_without_body(client):
+    """
+    Test that HEAD relays the upstream headers, including Content-Length, and no body.
+    """
+    expected = len(json.dumps({"method": "HEAD", "path": "/items/1?a=1", "body": ""}))
+    response = client.head("/items/1?a=1")
+    assert response.status_code == 200
+    assert response.data == b""
+    assert int(response.headers["Content-Length"]) == expected
+
+
+def test_redirect_is_relayed(client):
+    """
+    Test that an upstream redirect is relayed to the client instead of being followed.
+    """
+    response = client.get("/items/redirect")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/elsewhere"
@@ -0,0 +1,142 @@
+import time
+import pytest
+from flask import Flask
+from dracan.middleware.gcra import (
+    MemoryGcraStore,
+    RateLimitRules,
+    create_gcra_store,
+)
+from dracan.middleware.limiter import create_limiter
+
+
+@pytest.fixture(params=["memory", "shm", "redis"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return create_gcra_store("memory://")
+    if request.param == "shm":
+        return create_gcra_store(f"shm://{tmp_path / 'rate-limit'}?slots=256&stripes=4")
+
+    redis = pytest.importorskip("redis")
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    pool = redis.ConnectionPool(
+        connection_class=fakeredis.FakeRedisConnection, server=fakeredis.FakeServer()
+    )
+    return create_gcra_store("redis://localhost", storage_options={"connection_pool": pool})
+
+
+def test_gcra_allows_burst_then_paces(store):
+    """
+    Test that a full burst passes at once, then requests are spaced by the emission interval.
+    """
+    emission_interval, burst = 0.2, 3
+    tolerance = emission_interval * burst
+
+    assert [store.acquire("k", emission_interval, tolerance)[0] for _ in range(3)] == [
+        True,
+        True,
+        True,
+    ]
+    allowed, retry_after = store.acquire("k", emission_interval, tolerance)
+    assert allowed is False
+    assert 0 < retry_after <= emission_interval
+
+    # Other keys have their own bucket
+    assert store.acquire("other", emission_interval, tolerance)[0] is True
+
+    time.sleep(retry_after + 0.01)
+    assert store.acquire("k", emission_interval, tolerance)[0] is True
+    assert store.acquire("k", emission_interval, tolerance)[0] is False
+
+
+def test_memory_store_evicts_idle_keys():
+    """
+    Test that idle keys are swept and the number of keys stays bounded.
+    """
+    store = MemoryGcraStore(max_keys=100)
+    for index in range(1000):
+        store.acquire(f"client-{index}", 60, 600)
+    assert len(store) == 100
+
+    store = MemoryGcraStore(max_keys=100)
+    for index in range(50):
+        store.acquire(f"idle-{index}", 0.001, 0.01)
+    time.sleep(0.01)
+    for index in range(10):
+        store.acquire(f"active-{index}", 60, 600)
+    assert len(store) == 10
+
+
+def test_rules_selection():
+    """
+    Test that global rules apply everywhere and route rules by method and path template.
+    """
+    rules = RateLimitRules(
+        [
+            {"rate": "100 per minute"},
+            {"route": "POST /data", "rate": "5 per second", "key": "api_key"},
+            {"route": "/users/<id>", "rate": "1 per second", "burst": 2},
+            {"route": "/users/<id>", "rate": "100 per hour"},
+        ]
+    )
+
+    assert [r.rate for r in rules.select("GET", "/data")] == ["100 per minute"]
+    assert [r.rate for r in rules.select("POST", "/data")] == [
+        "100 per minute",
+        "5 per second",
+    ]
+    assert [r.rate for r in rules.select("DELETE", "/users/42")] == [
+        "100 per minute",
+        "1 per second",
+        "100 per hour",
+    ]
+    assert rules.select("DELETE", "/users/42")[1].burst == 2
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        {"rate": "10 per second", "key": "cookie"},
+        {"rate": "10 per second", "burst": 0},
+        {"rate": "10 per second", "route": "data"},
+    ],
+)
+def test_invalid_rules(rule):
+    """
+    Test that invalid rules are rejected when the config is loaded.
+    """
+    with pytest.raises(ValueError):
+        RateLimitRules([rule])
+
+
+def test_per_api_key_route_limit():
+    """
+    Test that a route limit keyed on X-API-KEY is enforced per key with Retry-After.
+    """
+    app = Flask(__name__)
+    create_limiter(
+        app,
+        {
+            "limiting_enabled": True,
+            "rate_limits": [
+                {"route": "POST /data", "rate": "1 per minute", "burst": 2, "key": "api_key"}
+            ],
+        },
+    )
+
+    @app.route("/data", methods=["GET", "POST"])
+    def data():
+        return "ok"
+
+    client = app.test_client()
+    statuses = [
+        client.post("/data", headers={"X-API-KEY": "a"}).status_code for _ in range(3)
+    ]
+    assert statuses == [200, 200, 429]
+
+    response = client.post("/data", headers={"X-API-KEY": "a"})
+    assert response.json == {"error": "Rate limit exceeded: 1 per minute"}
+    assert 1 <= int(response.headers["Retry-After"]) <= 60
+
+    assert client.post("/data", headers={"X-API-KEY": "b"}).status_code == 200
+    assert all(client.get("/data").status_code == 200 for _ in range(5))
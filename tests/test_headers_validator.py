@@ -0,0 +1,85 @@
+import logging
+import pytest
+from flask import Flask
+from dracan.validators.headers_validator import (
+    HeaderRulePlan,
+    create_header_validator,
+    environ_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def validate_headers():
+    rules_config = {
+        "header_validation_enabled": True,
+        "required_headers": {
+            "Content-Type": "application/json",
+            "Authorization": "regex:^Bearer\\s[A-Za-z0-9]+$",
+            "X-Request-Id": "*",
+        },
+        "prohibited_headers": ["X-Internal-Header", "X-Debug"],
+    }
+    return create_header_validator(rules_config, logger)
+
+
+VALID_HEADERS = {
+    "Content-Type": "application/json",
+    "Authorization": "Bearer abc123",
+    "X-Request-Id": "42",
+}
+
+
+@pytest.mark.parametrize(
+    "headers, error",
+    [
+        (VALID_HEADERS, None),
+        ({**VALID_HEADERS, "x-request-id": ""}, None),
+        (
+            {"Authorization": "Bearer abc123"},
+            "Missing required header 'Content-Type'",
+        ),
+        (
+            {**VALID_HEADERS, "Content-Type": "text/plain"},
+            "Invalid header 'Content-Type': Expected 'application/json'",
+        ),
+        (
+            {**VALID_HEADERS, "Authorization": "Basic abc"},
+            "Invalid header 'Authorization': Does not match required pattern",
+        ),
+        (
+            {**VALID_HEADERS, "x-debug": "1", "X-INTERNAL-HEADER": "1"},
+            "Prohibited header 'X-Internal-Header' must not be present",
+        ),
+        (
+            {"X-Debug": "1"},
+            "Missing required header 'Content-Type'",
+        ),
+    ],
+)
+def test_header_rules(validate_headers, headers, error):
+    """
+    Test required, regex, wildcard and case-insensitive prohibited header rules and their precedence.
+    """
+    app = Flask(__name__)
+    with app.test_request_context("/", headers=headers):
+        is_valid, response = validate_headers()
+
+    assert is_valid is (error is None)
+    if error is not None:
+        assert response[1] == 403
+        assert response[0].get_json() == {"error": error}
+
+
+def test_header_rule_plan_is_compiled_once():
+    """
+    Test that regex rules are compiled and header names normalized when the plan is built.
+    """
+    plan = HeaderRulePlan({"X-Token": "regex:^t[0-9]+$"}, ["x-debug"])
+
+    header, key, _, pattern, compiled, _, _ = plan.required[0]
+    assert (header, key, pattern) == ("X-Token", "HTTP_X_TOKEN", "^t[0-9]+$")
+    assert compiled.match("t1")
+    assert plan.prohibited_keys == frozenset({"HTTP_X_DEBUG"})
+    assert environ_key("content-length") == "CONTENT_LENGTH"
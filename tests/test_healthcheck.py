@@ -1,3 +1,5 @@
+import json
+import socket
 import pytest
 import requests
 import time
@@ -5,7 +7,10 @@ from threading import Thread
 from http.server import HTTPServer
 from dracan.core.health_check import (
     HealthCheckHandler,
+    HealthCheckServer,
+    UpstreamProber,
 )  # Adjust import based on your structure
+from tests.upstream_mock import UpstreamHandler
 
 
 @pytest.fixture(scope="module")
@@ -51,3 +56,127 @@ def test_health_check_invalid_path(run_health_check_server):
     """
     response = requests.get("http://127.0.0.1:9000/invalid-path", timeout=15)
     assert response.status_code == 404
+
+
+class StatusHandler(UpstreamHandler):
+    """Destination answering 204 on /status and 503 elsewhere."""
+
+    def do_GET(self):
+        self.send_response(204 if self.path == "/status" else 503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+status_upstream = pytest.mark.parametrize("upstream", [StatusHandler], indirect=True)
+
+
+@pytest.fixture
+def upstream_port(upstream):
+    """
+    Fixture for the port of the status destination.
+    """
+    return upstream.server_port
+
+
+def free_port():
+    """A local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def destination(port):
+    return {"host": "127.0.0.1", "port": port, "path": "/"}
+
+
+@status_upstream
+def test_prober_readiness(upstream_port):
+    """
+    Test that the proxy is ready while one destination is up, and not before the first probe.
+    """
+    dead_port = free_port()
+    prober = UpstreamProber([destination(upstream_port), destination(dead_port)])
+    assert prober.readiness[0] == 503
+
+    prober.probe_all()
+    status, body = prober.readiness
+    assert status == 200
+    assert json.loads(body)["upstreams"] == {
+        f"127.0.0.1:{upstream_port}": "up",
+        f"127.0.0.1:{dead_port}": "down",
+    }
+
+    prober = UpstreamProber([destination(dead_port)])
+    prober.probe_all()
+    assert prober.readiness[0] == 503
+    assert json.loads(prober.readiness[1])["status"] == "unavailable"
+
+
+@status_upstream
+def test_prober_http_probe_path(upstream_port):
+    """
+    Test that with a probe path the destination has to answer below 500.
+    """
+    prober = UpstreamProber([destination(upstream_port)], probe_path="/status")
+    prober.probe_all()
+    assert prober.readiness[0] == 200
+
+    prober = UpstreamProber([destination(upstream_port)], probe_path="/")
+    prober.probe_all()
+    assert prober.readiness[0] == 503
+
+
+@status_upstream
+def test_ready_endpoint_served_from_cache(upstream_port):
+    """
+    Test that /ready answers from the prober state, and /live never depends on it.
+    """
+    prober = UpstreamProber([destination(upstream_port)], interval=60).start()
+    httpd = HTTPServer(("127.0.0.1", 0), HealthCheckHandler)
+    httpd.prober = prober
+    thread = Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+    url = f"http://127.0.0.1:{httpd.server_port}"
+
+    try:
+        deadline = time.time() + 5
+        while prober.readiness[0] != 200 and time.time() < deadline:
+            time.sleep(0.01)
+        assert requests.get(f"{url}/ready", timeout=5).json()["status"] == "ready"
+
+        prober.readiness = (503, b'{"status": "unavailable"}')
+        response = requests.get(f"{url}/ready", timeout=5)
+        assert response.status_code == 503
+        assert requests.get(f"{url}/live", timeout=5).json() == {"status": "running"}
+    finally:
+        prober.stop()
+        httpd.shutdown()
+        thread.join()
+        httpd.server_close()
+
+
+def test_stuck_connection_does_not_block_probes():
+    """
+    Test that a client sending nothing neither delays other probes nor holds its thread forever.
+    """
+    httpd = HealthCheckServer(("127.0.0.1", 0), request_timeout=0.5)
+    thread = Thread(target=httpd.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        stuck = socket.create_connection(("127.0.0.1", httpd.server_port))
+        started = time.time()
+        response = requests.get(f"http://127.0.0.1:{httpd.server_port}/live", timeout=5)
+        assert response.json() == {"status": "running"}
+        assert time.time() - started < 0.5
+
+        # The server gives up on the idle connection after the request timeout
+        stuck.settimeout(5)
+        assert stuck.recv(1) == b""
+        stuck.close()
+    finally:
+        httpd.shutdown()
+        thread.join()
+        httpd.server_close()
@@ -0,0 +1,194 @@
+import logging
+import pytest
+from flask import Flask
+from jsonschema import validate, ValidationError, SchemaError
+from dracan.validators.json_validator import (
+    CompiledSchema,
+    RouteSchemas,
+    validate_json,
+    create_json_validator,
+)
+from dracan.validators.schema_codegen import generate_fast_validator
+
+logger = logging.getLogger(__name__)
+
+SCHEMAS = [
+    {
+        "type": "object",
+        "properties": {"name": {"type": "string"}, "age": {"type": "number"}},
+        "required": ["name", "age"],
+    },
+    {
+        "type": "object",
+        "properties": {
+            "id": {"type": "integer", "minimum": 1, "exclusiveMaximum": 100},
+            "tags": {
+                "type": "array",
+                "items": {"type": "string", "minLength": 2, "maxLength": 4},
+                "minItems": 1,
+                "maxItems": 2,
+            },
+            "status": {"enum": ["active", "disabled", None]},
+            "nested": {
+                "type": "object",
+                "properties": {"flag": {"type": ["boolean", "null"]}},
+                "additionalProperties": False,
+            },
+        },
+        "additionalProperties": False,
+    },
+]
+
+INSTANCES = [
+    {},
+    {"name": "John", "age": 30},
+    {"name": "John", "age": "30"},
+    {"name": "John", "age": True},
+    {"name": "John"},
+    {"id": 1},
+    {"id": 1.0},
+    {"id": 1.5},
+    {"id": 0},
+    {"id": 100},
+    {"id": True},
+    {"tags": ["ab"]},
+    {"tags": []},
+    {"tags": ["a"]},
+    {"tags": ["ab", "cd", "ef"]},
+    {"tags": ["abcde"]},
+    {"tags": "ab"},
+    {"status": "active"},
+    {"status": None},
+    {"status": "unknown"},
+    {"status": 1},
+    {"nested": {"flag": None}},
+    {"nested": {"flag": 0}},
+    {"nested": {"other": True}},
+    {"extra": 1},
+    [],
+    "string",
+    None,
+]
+
+
+@pytest.mark.parametrize("schema", SCHEMAS)
+@pytest.mark.parametrize("instance", INSTANCES)
+def test_fast_path_matches_jsonschema(schema, instance):
+    """
+    Test that the generated fast path accepts exactly what jsonschema accepts.
+    """
+    fast_check = generate_fast_validator(schema)
+    assert fast_check is not None
+
+    try:
+        validate(instance=instance, schema=schema)
+        expected = True
+    except ValidationError:
+        expected = False
+
+    assert fast_check(instance) is expected
+
+
+@pytest.mark.parametrize(
+    "schema",
+    [
+        {"type": "object", "patternProperties": {"^x": {"type": "string"}}},
+        {"$ref": "#/definitions/a", "definitions": {"a": {"type": "string"}}},
+        {"enum": [1, 2]},
+        {"type": "object", "additionalProperties": {"type": "string"}},
+        {"$schema": "http://json-schema.org/draft-04/schema#", "minimum": 1},
+    ],
+)
+def test_fast_path_falls_back_for_unsupported_schemas(schema):
+    """
+    Test that schemas outside of the supported subset are left to jsonschema.
+    """
+    assert generate_fast_validator(schema) is None
+    assert CompiledSchema(schema, fast_path=True).fast_check is None
+
+
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_compiled_schema_error_messages(fast_path):
+    """
+    Test that compiled schemas report the same errors as jsonschema.validate().
+    """
+    schema = SCHEMAS[0]
+    compiled = CompiledSchema(schema, fast_path=fast_path)
+
+    for instance in INSTANCES:
+        try:
+            validate(instance=instance, schema=schema)
+            expected = (True, None)
+        except ValidationError as e:
+            expected = (False, str(e))
+
+        assert validate_json(instance, compiled, logger) == expected
+
+
+def test_invalid_schema_is_rejected_at_compile_time():
+    """
+    Test that an invalid schema fails when compiled, not on the first request.
+    """
+    with pytest.raises(SchemaError):
+        CompiledSchema({"type": "object", "required": "name"})
+
+
+@pytest.fixture
+def route_rules_config():
+    return {
+        "json_validation_enabled": True,
+        "detailed_errors_enabled": True,
+        "json_schemas": {
+            "POST /users": {"type": "object", "required": ["name"]},
+            "PUT /users/<id>": {"type": "object", "required": ["email"]},
+            "PATCH /users/<id>/settings": {"type": "object", "required": ["theme"]},
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "method, path, body, status",
+    [
+        ("POST", "/users", {"name": "Jane"}, None),
+        ("POST", "/users", {"email": "jane@example.com"}, 400),
+        ("PUT", "/users/42", {"email": "jane@example.com"}, None),
+        ("PUT", "/users/42", {"name": "Jane"}, 400),
+        ("PATCH", "/users/42/settings", {"theme": "dark"}, None),
+        ("PATCH", "/users/42/settings", {}, 400),
+        ("POST", "/orders", {"anything": True}, None),
+    ],
+)
+def test_route_schemas(route_rules_config, method, path, body, status):
+    """
+    Test that the schema is selected by method and path template.
+    """
+    app = Flask(__name__)
+    validate_json_request = create_json_validator(route_rules_config, logger)
+
+    with app.test_request_context(path, method=method, json=body):
+        is_valid, response = validate_json_request()
+        assert is_valid is (status is None)
+        if status is not None:
+            assert response[1] == status
+
+
+def test_route_schemas_fall_back_to_global_schema(route_rules_config):
+    """
+    Test that the global json_schema still applies to POST/PUT without a route schema.
+    """
+    route_rules_config["json_schema"] = {"type": "object", "required": ["id"]}
+    app = Flask(__name__)
+    validate_json_request = create_json_validator(route_rules_config, logger)
+
+    with app.test_request_context("/orders", method="POST", json={"name": "x"}):
+        assert validate_json_request()[0] is False
+    with app.test_request_context("/users", method="POST", json={"name": "x"}):
+        assert validate_json_request()[0] is True
+
+
+def test_route_schemas_invalid_key():
+    """
+    Test that json_schemas keys must be 'METHOD /path'.
+    """
+    with pytest.raises(ValueError):
+        RouteSchemas({"/users": {"type": "object"}})
@@ -0,0 +1,83 @@
+from flask import Flask
+from dracan.utils.metrics import (
+    EndpointLabels,
+    OVERFLOW_ENDPOINT,
+    REQUEST_COUNT,
+    UNMATCHED_ENDPOINT,
+    register_metrics,
+)
+from dracan.validators.path_validator import create_path_validator
+
+
+def request_count(endpoint, status):
+    """Current value of http_requests_total for a GET to the endpoint label."""
+    value = REQUEST_COUNT.labels(method="GET", endpoint=endpoint, status=status)
+    return value._value.get()
+
+
+def create_metrics_app(rules_config):
+    """Create an app validating URIs and recording request metrics."""
+    app = Flask(__name__)
+    validate_path = create_path_validator(rules_config, app.logger)
+    register_metrics(app)
+
+    @app.route("/<path:sub>")
+    def proxy_route(sub):
+        is_valid, response = validate_path()
+        return response if not is_valid else "ok"
+
+    return app
+
+
+def test_endpoint_labels_cap():
+    """
+    Test that endpoints above the cap are reported under the overflow label.
+    """
+    labels = EndpointLabels(max_endpoints=2)
+    assert labels.label("/a") == "/a"
+    assert labels.label("/b") == "/b"
+    assert labels.label("/c") == OVERFLOW_ENDPOINT
+    assert labels.label("/a") == "/a"
+    assert len(labels.seen) == 2
+
+
+def test_endpoint_label_is_matched_rule():
+    """
+    Test that requests are labelled with the allowed URI rule, not the raw path.
+    """
+    app = create_metrics_app(
+        {
+            "uri_validation_enabled": True,
+            "allowed_uris": ["/health"],
+            "allowed_uri_patterns": ["^/users/[0-9]+$"],
+        }
+    )
+    client = app.test_client()
+    before = request_count("^/users/[0-9]+$", 200)
+
+    for user_id in range(5):
+        assert client.get(f"/users/{user_id}").status_code == 200
+    assert client.get("/health").status_code == 200
+
+    assert request_count("^/users/[0-9]+$", 200) == before + 5
+    assert request_count("/health", 200) >= 1
+    assert request_count("/users/1", 200) == 0
+
+
+def test_endpoint_label_falls_back_to_route_template():
+    """
+    Test that rejected paths and unrouted requests never become labels.
+    """
+    app = create_metrics_app(
+        {"uri_validation_enabled": True, "allowed_uris": ["/health"]}
+    )
+    client = app.test_client()
+    before_forbidden = request_count("/<path:sub>", 403)
+    before_unmatched = request_count(UNMATCHED_ENDPOINT, 404)
+
+    assert client.get("/secret/42").status_code == 403
+    assert client.get("/").status_code == 404
+
+    assert request_count("/<path:sub>", 403) == before_forbidden + 1
+    assert request_count(UNMATCHED_ENDPOINT, 404) == before_unmatched + 1
+    assert request_count("/secret/42", 403) == 0
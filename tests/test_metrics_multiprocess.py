@@ -0,0 +1,85 @@
+import os
+import sys
+import subprocess
+import textwrap
+
+# Multiprocess mode is picked when prometheus_client is imported, so it runs in a fresh interpreter
+SCRIPT = textwrap.dedent(
+    """
+    import os
+    from flask import Flask
+    from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+    from dracan.utils.metrics import REQUEST_IN_PROGRESS, register_metrics, mark_worker_dead
+
+    app = Flask(__name__)
+    register_metrics(app)
+
+    @app.route("/<path:sub>")
+    def proxy_route(sub):
+        return "ok"
+
+    workers = []
+    for _ in range(3):
+        pid = os.fork()
+        if pid == 0:
+            client = app.test_client()
+            client.get("/data")
+            client.get("/data")
+            REQUEST_IN_PROGRESS.inc()  # Left behind by a worker that died mid-request
+            os._exit(0)
+        workers.append(pid)
+
+    for pid in workers:
+        os.waitpid(pid, 0)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    print(generate_latest(registry).decode())
+    print("---")
+    for pid in workers:
+        mark_worker_dead(pid)
+    print(generate_latest(registry).decode())
+    """
+)
+
+
+def sample_value(exposition, name):
+    """Value of the first sample line starting with name."""
+    for line in exposition.splitlines():
+        if line.startswith(name):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_metrics_aggregated_across_workers(tmp_path):
+    """
+    Test that metrics recorded by several worker processes are served as one total,
+    and that live gauges of exited workers are dropped.
+    """
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    before, after = result.stdout.split("---")
+    assert (
+        sample_value(
+            before,
+            'http_requests_total{endpoint="/<path:sub>",method="GET",status="200"}',
+        )
+        == 6.0
+    )
+    assert sample_value(before, "http_requests_in_progress") == 3.0
+    assert (
+        sample_value(
+            after,
+            'http_requests_total{endpoint="/<path:sub>",method="GET",status="200"}',
+        )
+        == 6.0
+    )
+    assert sample_value(after, "http_requests_in_progress") in (None, 0.0)
@@ -0,0 +1,76 @@
+from flask import Flask, Response
+from dracan.utils.metrics import RESPONSE_SIZE, register_metrics
+
+
+def recorded(endpoint, method="GET"):
+    """Tuple (sum, count) of http_response_size_bytes for a request to the endpoint label."""
+    histogram = RESPONSE_SIZE.labels(method=method, endpoint=endpoint)
+    count = sum(bucket.get() for bucket in histogram._buckets)
+    return histogram._sum.get(), count
+
+
+def create_streaming_app(produced):
+    """Create an app with a streamed body of unknown size, a buffered one and a HEAD route."""
+    app = Flask(__name__)
+    register_metrics(app)
+
+    @app.route("/size-stream")
+    def stream():
+        def generate():
+            for chunk in (b"first,", b"second,", b"third"):
+                produced.append(chunk)
+                yield chunk
+
+        return Response(generate(), mimetype="application/octet-stream")
+
+    @app.route("/size-buffered")
+    def buffered():
+        return b"0123456789"
+
+    @app.route("/size-head", methods=["HEAD"])
+    def head():
+        # As relayed from a destination: headers of the GET representation, no body
+        return Response(status=200, headers={"Content-Length": "1234"})
+
+    return app
+
+
+def test_streamed_response_size_counted_after_last_byte():
+    """
+    Test that a streamed body is not consumed by the metrics hook and is measured once sent.
+    """
+    produced = []
+    client = create_streaming_app(produced).test_client()
+    before_sum, before_count = recorded("/size-stream")
+
+    response = client.get("/size-stream", buffered=False)
+    assert len(produced) < 3  # The test client only starts the iterator
+    assert recorded("/size-stream") == (before_sum, before_count)
+
+    assert response.get_data() == b"first,second,third"
+    response.close()
+    assert recorded("/size-stream") == (before_sum + 18, before_count + 1)
+
+
+def test_known_response_size_taken_from_content_length():
+    """
+    Test that a body with Content-Length is recorded without iterating it.
+    """
+    client = create_streaming_app([]).test_client()
+    before_sum, before_count = recorded("/size-buffered")
+
+    response = client.get("/size-buffered")
+    assert response.status_code == 200
+    assert recorded("/size-buffered") == (before_sum + 10, before_count + 1)
+
+
+def test_head_response_size_is_zero():
+    """
+    Test that a HEAD response is recorded as 0 bytes whatever its Content-Length.
+    """
+    client = create_streaming_app([]).test_client()
+    before_sum, before_count = recorded("/size-head", "HEAD")
+
+    response = client.head("/size-head")
+    assert response.headers["Content-Length"] == "1234"
+    assert recorded("/size-head", "HEAD") == (before_sum, before_count + 1)
@@ -0,0 +1,111 @@
+import re
+import logging
+import pytest
+from flask import Flask
+from dracan.validators.path_validator import UriMatcher, create_path_validator
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_URIS = ["/", "/health", "/data"]
+ALLOWED_URI_PATTERNS = [
+    "^/api/.*",
+    "^/public/[A-Za-z0-9_-]+",
+    r"^/static\.v1/.*",
+    "^/exports.*",
+    "^/v[0-9]+/items$",
+    "(?i)^/CASE/",
+    r"^/(a)/\1$",
+]
+
+PATHS = [
+    "/",
+    "/health",
+    "/healthz",
+    "/data/",
+    "/api",
+    "/api/",
+    "/api/users/1",
+    "/apiv2",
+    "/public/file_1",
+    "/public/",
+    "/static.v1/app.js",
+    "/staticXv1/app.js",
+    "/exports",
+    "/exports2024",
+    "/v2/items",
+    "/v2/items/1",
+    "/case/x",
+    "/a/a",
+    "/a/b",
+    "/other",
+]
+
+
+def legacy_match(path):
+    """Allow decision of the previous list / re.match loop implementation."""
+    if path in ALLOWED_URIS:
+        return True
+    return any(re.match(pattern, path) for pattern in ALLOWED_URI_PATTERNS)
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_uri_matcher_agrees_with_legacy_matching(path):
+    """
+    Test that the compiled matcher allows exactly what the list / regex loop allowed.
+    """
+    matcher = UriMatcher(ALLOWED_URIS, ALLOWED_URI_PATTERNS)
+    assert (matcher.match(path) is not None) is legacy_match(path)
+
+
+def test_uri_matcher_reports_matching_rule():
+    """
+    Test that the matcher reports which rule allowed the path.
+    """
+    matcher = UriMatcher(ALLOWED_URIS, ALLOWED_URI_PATTERNS)
+    assert matcher.match("/health") == "/health"
+    assert matcher.match("/api/users") == "^/api/.*"
+    assert matcher.match("/public/abc") == "^/public/[A-Za-z0-9_-]+"
+    assert matcher.match("/v10/items") == "^/v[0-9]+/items$"
+    assert matcher.match("/a/a") == r"^/(a)/\1$"
+
+
+def test_uri_matcher_uses_trie_for_literal_prefixes():
+    """
+    Test that literal prefix patterns go to the trie and the rest to one combined regex.
+    """
+    matcher = UriMatcher(ALLOWED_URIS, ALLOWED_URI_PATTERNS)
+    assert len(matcher.prefixes) == 2
+    assert matcher.rules == [
+        "^/public/[A-Za-z0-9_-]+",
+        "^/exports.*",
+        "^/v[0-9]+/items$",
+    ]
+    assert len(matcher.separate) == 2
+
+
+def test_invalid_pattern_fails_at_startup():
+    """
+    Test that an invalid regex is reported when the validator is created.
+    """
+    with pytest.raises(re.error):
+        UriMatcher([], ["^/broken/(.*"])
+
+
+def test_path_validator_forbidden_uri():
+    """
+    Test that a path matching no rule is rejected with 403.
+    """
+    app = Flask(__name__)
+    rules_config = {
+        "uri_validation_enabled": True,
+        "allowed_uris": ALLOWED_URIS,
+        "allowed_uri_patterns": ALLOWED_URI_PATTERNS,
+    }
+    validate_path = create_path_validator(rules_config, logger)
+
+    with app.test_request_context("/api/x"):
+        assert validate_path() == (True, None)
+    with app.test_request_context("/other"):
+        is_valid, response = validate_path()
+        assert is_valid is False
+        assert response[1] == 403
@@ -0,0 +1,208 @@
+import pytest
+import requests
+from flask import Flask
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+from dracan.core.proxy import handle_proxy
+from dracan.core.upstream import UpstreamClient
+from dracan.middleware.payload_limiter import apply_payload_limit
+from dracan.validators.json_validator import create_json_validator
+from tests.upstream_mock import UpstreamHandler, destination, serve_app, stop_server
+
+MAX_PAYLOAD_SIZE = 64
+
+
+class CountingHandler(UpstreamHandler):
+    """Upstream draining the body and counting the requests it received."""
+
+    hits = 0
+
+    def do_POST(self):
+        CountingHandler.hits += 1
+        if self.read_body() is None:
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+
+pytestmark = pytest.mark.parametrize("upstream", [CountingHandler], indirect=True)
+
+
+def create_proxy_app(upstream, validate_request):
+    """Create a proxy app enforcing the payload limit."""
+    app = Flask(__name__)
+    config = destination(upstream, "/")
+    client = UpstreamClient()
+    apply_payload_limit(
+        app, {"payload_limiting_enabled": True, "max_payload_size": MAX_PAYLOAD_SIZE}
+    )
+
+    @app.route("/<path:sub>", methods=["POST"])
+    def proxy_route(sub):
+        return handle_proxy(config, validate_request, sub=sub, client=client)
+
+    return app
+
+
+def serve_proxy(upstream, validate_request):
+    """Run a proxy app enforcing the payload limit on a free port and return the server."""
+    return serve_app(create_proxy_app(upstream, validate_request))
+
+
+@pytest.fixture(scope="module")
+def proxy_url(upstream):
+    """
+    Fixture to start a proxy app enforcing the payload limit.
+    """
+    server = serve_proxy(upstream, lambda: (True, None))
+    yield f"http://127.0.0.1:{server.server_port}"
+    stop_server(server)
+
+
+@pytest.fixture(scope="module")
+def validating_proxy_url(upstream):
+    """
+    Fixture to start a proxy app enforcing the payload limit with JSON validation, which
+    reads the whole body before it is forwarded.
+    """
+    app = Flask(__name__)
+    rules_config = {
+        "json_validation_enabled": True,
+        "json_schema": {"type": "object", "required": ["name"]},
+    }
+    with app.app_context():
+        validate_json = create_json_validator(rules_config, app.logger)
+    server = serve_proxy(upstream, validate_json)
+    yield f"http://127.0.0.1:{server.server_port}"
+    stop_server(server)
+
+
+def test_content_length_rejected_before_forwarding(proxy_url):
+    """
+    Test that a too large Content-Length is answered with 413 without reaching the upstream.
+    """
+    hits = CountingHandler.hits
+    response = requests.post(
+        f"{proxy_url}/data", data=b"x" * (MAX_PAYLOAD_SIZE + 1), timeout=5
+    )
+    assert response.status_code == 413
+    assert response.json() == {
+        "error": f"Payload size exceeds the limit of {MAX_PAYLOAD_SIZE} bytes"
+    }
+    assert CountingHandler.hits == hits
+
+
+def test_chunked_body_within_limit_is_forwarded(proxy_url):
+    """
+    Test that chunked bodies below the limit still pass.
+    """
+    response = requests.post(
+        f"{proxy_url}/data", data=iter([b"x" * 32, b"y" * 32]), timeout=5
+    )
+    assert response.status_code == 200
+    assert response.content == b"ok"
+
+
+def test_chunked_body_over_limit_is_aborted(proxy_url):
+    """
+    Test that a chunked body is counted while streamed and aborted with 413 past the limit.
+    """
+    response = requests.post(
+        f"{proxy_url}/data",
+        data=iter([b"x" * 48, b"y" * (MAX_PAYLOAD_SIZE - 47)]),
+        timeout=5,
+    )
+    assert response.status_code == 413
+    assert response.json() == {
+        "error": f"Payload size exceeds the limit of {MAX_PAYLOAD_SIZE} bytes"
+    }
+
+
+@pytest.mark.parametrize(
+    "size, status",
+    [(MAX_PAYLOAD_SIZE, 200), (MAX_PAYLOAD_SIZE + 1, 413), (MAX_PAYLOAD_SIZE * 3, 413)],
+)
+def test_chunked_body_read_by_json_validation(validating_proxy_url, size, status):
+    """
+    Test that a chunked body parsed by the JSON validation is limited as well, not truncated.
+    """
+    body = b'{"name":"x"}'.ljust(size)
+    hits = CountingHandler.hits
+    response = requests.post(
+        f"{validating_proxy_url}/data",
+        data=iter([body[:32], body[32:]]),
+        headers={"Content-Type": "application/json"},
+        timeout=5,
+    )
+    assert response.status_code == status
+    if status == 413:
+        assert response.json() == {
+            "error": f"Payload size exceeds the limit of {MAX_PAYLOAD_SIZE} bytes"
+        }
+        assert CountingHandler.hits == hits
+
+
+class EndlessBody:
+    """Client body of a given size, counting the bytes the server read from it."""
+
+    def __init__(self, size):
+        self.size = size
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        remaining = self.size - self.read_bytes
+        size = remaining if size is None or size < 0 else min(size, remaining)
+        self.read_bytes += size
+        return b" " * size
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def test_oversized_chunked_body_not_read_in_full(upstream):
+    """
+    Test that JSON validation reading the whole body stops one byte past the limit.
+    """
+    app = Flask(__name__)
+    config = destination(upstream, "/")
+    apply_payload_limit(
+        app, {"payload_limiting_enabled": True, "max_payload_size": MAX_PAYLOAD_SIZE}
+    )
+    rules_config = {"json_validation_enabled": True, "json_schema": {"type": "object"}}
+    with app.app_context():
+        validate_json = create_json_validator(rules_config, app.logger)
+
+    @app.route("/<path:sub>", methods=["POST"])
+    def proxy_route(sub):
+        return handle_proxy(config, validate_json, sub=sub)
+
+    body = EndlessBody(50_000_000)
+    environ = EnvironBuilder(
+        path="/data",
+        method="POST",
+        headers={"Content-Type": "application/json", "Transfer-Encoding": "chunked"},
+    ).get_environ()
+    environ.pop("CONTENT_LENGTH", None)
+    environ.update({"wsgi.input": body, "wsgi.input_terminated": True})
+
+    _, status, _ = run_wsgi_app(app, environ, buffered=True)
+    assert status.startswith("413")
+    assert body.read_bytes == MAX_PAYLOAD_SIZE + 1
+
+
+def test_rejection_goes_through_request_hooks(upstream):
+    """
+    Test that a too large Content-Length is answered after the before-request hooks ran and
+    the after-request hooks (metrics, request log) see the 413.
+    """
+    app = create_proxy_app(upstream, lambda: (True, None))
+    seen = []
+    app.after_request(lambda response: seen.append(response.status_code) or response)
+
+    hits = CountingHandler.hits
+    response = app.test_client().post("/data", data=b"x" * (MAX_PAYLOAD_SIZE + 1))
+    assert response.status_code == 413
+    assert response.headers["Connection"] == "close"
+    assert seen == [413]
+    assert CountingHandler.hits == hits
@@ -0,0 +1,87 @@
+import pytest
+from flask import Flask
+from dracan.core.pipeline import create_validation_pipeline
+from dracan.core.proxy import handle_proxy
+from dracan.core.upstream import UpstreamClient
+from dracan.utils.metrics import (
+    PHASE_LATENCY,
+    VALIDATION_LATENCY,
+    observe_validation_stage,
+    register_phase_timing,
+)
+from tests.upstream_mock import UpstreamHandler, destination
+
+
+class OkHandler(UpstreamHandler):
+    """Upstream answering every GET with a small body."""
+
+    def do_GET(self):
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+pytestmark = pytest.mark.parametrize("upstream", [OkHandler], indirect=True)
+
+
+def observations(histogram):
+    """Number of observations recorded by a labelled histogram."""
+    return sum(bucket.get() for bucket in histogram._buckets)
+
+
+def create_timed_app(upstream):
+    """Create a proxy app with phase timing and the Server-Timing header enabled."""
+    app = Flask(__name__)
+    register_phase_timing(app, server_timing=True)
+    config = destination(upstream)
+    rules_config = {"method_validation_enabled": True, "allowed_methods": ["GET"]}
+    validate_request = create_validation_pipeline(
+        rules_config, app.logger, observer=observe_validation_stage
+    )
+    client = UpstreamClient()
+
+    @app.route("/<path:sub>", methods=["GET"])
+    def proxy_route(sub):
+        return handle_proxy(config, validate_request, sub=sub, client=client)
+
+    return app
+
+
+def test_server_timing_header(upstream):
+    """
+    Test that validation and upstream phases measured before the response are reported.
+    """
+    client = create_timed_app(upstream).test_client()
+    response = client.get("/data")
+    assert response.status_code == 200
+
+    entries = dict(
+        entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", ")
+    )
+    assert set(entries) == {
+        "validation_method",
+        "upstream_connect",
+        "upstream_ttfb",
+        "upstream_body",
+    }
+    assert all(float(duration) >= 0 for duration in entries.values())
+
+
+def test_phase_histograms_recorded(upstream):
+    """
+    Test that every phase, including the response write, reaches its histogram.
+    """
+    client = create_timed_app(upstream).test_client()
+    phases = ("upstream_ttfb", "upstream_body", "response_write")
+    before = {phase: observations(PHASE_LATENCY.labels(phase=phase)) for phase in phases}
+    before_validation = observations(VALIDATION_LATENCY.labels(stage="method"))
+
+    response = client.get("/data")
+    response.close()
+
+    for phase in phases:
+        assert observations(PHASE_LATENCY.labels(phase=phase)) == before[phase] + 1
+    assert observations(VALIDATION_LATENCY.labels(stage="method")) == before_validation + 1
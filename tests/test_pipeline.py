@@ -0,0 +1,69 @@
+import logging
+from flask import Flask
+from dracan.core.pipeline import ValidationPipeline, create_validation_pipeline
+
+logger = logging.getLogger(__name__)
+
+RULES_CONFIG = {
+    "method_validation_enabled": True,
+    "allowed_methods": ["GET", "POST"],
+    "payload_limiting_enabled": True,
+    "max_payload_size": 16,
+    "uri_validation_enabled": True,
+    "allowed_uris": ["/data"],
+    "header_validation_enabled": False,
+    "json_validation_enabled": True,
+    "json_schema": {"type": "object", "required": ["name"]},
+}
+
+
+def test_pipeline_contains_only_enabled_stages_in_cost_order():
+    """
+    Test that disabled stages are left out and the rest run cheapest first.
+    """
+    pipeline = create_validation_pipeline(RULES_CONFIG, logger)
+    assert pipeline.stage_names == ["method", "payload", "path", "json"]
+
+    pipeline = create_validation_pipeline(RULES_CONFIG, logger, {"path", "json"})
+    assert pipeline.stage_names == ["path", "json"]
+
+
+def test_pipeline_short_circuits_on_first_failure():
+    """
+    Test that the first failing stage answers and later stages are skipped.
+    """
+    app = Flask(__name__)
+    pipeline = create_validation_pipeline(RULES_CONFIG, logger)
+
+    # Oversized body on a forbidden path: the cheaper payload check answers
+    with app.test_request_context("/other", method="POST", data=b"x" * 32):
+        is_valid, response = pipeline()
+        assert is_valid is False
+        assert response[1] == 413
+        assert response[0].get_json() == {
+            "error": "Payload size exceeds the limit of 16 bytes"
+        }
+
+    with app.test_request_context("/other", method="POST", json={"name": "x"}):
+        assert pipeline()[1][1] == 403
+
+    with app.test_request_context("/data", method="POST", json={"id": 1}):
+        assert pipeline()[1][1] == 400
+
+    with app.test_request_context("/data", method="POST", json={"name": "x"}):
+        assert pipeline() == (True, None)
+
+
+def test_pipeline_observer_receives_stage_timings():
+    """
+    Test that the optional observer is called once per executed stage.
+    """
+    timings = []
+    pipeline = ValidationPipeline(
+        [("first", lambda: (True, None)), ("second", lambda: (False, "denied"))],
+        observer=lambda stage, seconds: timings.append((stage, seconds)),
+    )
+
+    assert pipeline() == (False, "denied")
+    assert [stage for stage, _ in timings] == ["first", "second"]
+    assert all(seconds >= 0 for _, seconds in timings)
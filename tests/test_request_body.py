@@ -0,0 +1,133 @@
+import json
+import pytest
+import requests
+from flask import Flask
+from dracan.core.proxy import handle_proxy
+from dracan.core.upstream import UpstreamClient
+from dracan.validators.json_validator import create_json_validator
+from tests.upstream_mock import UpstreamHandler, destination, serve_app, stop_server
+
+
+class EchoHandler(UpstreamHandler):
+    """Upstream echoing back the raw body and framing headers it received."""
+
+    def do_POST(self):
+        body = self.read_body()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("X-Received-Length", self.headers.get("Content-Length", ""))
+        self.send_header(
+            "X-Received-Transfer-Encoding", self.headers.get("Transfer-Encoding", "")
+        )
+        self.send_header("X-Received-Connection", self.headers.get("Connection", ""))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PUT = do_POST
+
+
+pytestmark = pytest.mark.parametrize("upstream", [EchoHandler], indirect=True)
+
+
+def create_proxy_app(upstream, validate_json):
+    """Create a minimal proxy app forwarding every POST/PUT to the echo upstream."""
+    app = Flask(__name__)
+    config = destination(upstream, "/")
+    client = UpstreamClient()
+
+    @app.route("/<path:sub>", methods=["POST", "PUT"])
+    def proxy_route(sub):
+        return handle_proxy(config, validate_json, sub=sub, client=client)
+
+    return app
+
+
+@pytest.fixture(scope="module")
+def proxy_url(upstream):
+    """
+    Fixture to start a proxy app without JSON validation.
+    """
+    server = serve_app(create_proxy_app(upstream, lambda: (True, None)))
+    yield f"http://127.0.0.1:{server.server_port}"
+    stop_server(server)
+
+
+@pytest.fixture(scope="module")
+def validating_proxy_url(upstream):
+    """
+    Fixture to start a proxy app with JSON validation enabled.
+    """
+    app = Flask(__name__)
+    rules_config = {
+        "json_validation_enabled": True,
+        "json_schema": {"type": "object", "required": ["name"]},
+    }
+    with app.app_context():
+        validate_json = create_json_validator(rules_config, app.logger)
+    server = serve_app(create_proxy_app(upstream, validate_json))
+    yield f"http://127.0.0.1:{server.server_port}"
+    stop_server(server)
+
+
+def test_json_body_forwarded_byte_for_byte(proxy_url):
+    """
+    Test that the JSON body layout is preserved, not re-serialized.
+    """
+    body = b'{ "name" :  "John",\n  "age": 30.0 }'
+    response = requests.post(
+        f"{proxy_url}/data",
+        data=body,
+        headers={"Content-Type": "application/json", "Connection": "close"},
+        timeout=5,
+    )
+    assert response.status_code == 200
+    assert response.content == body
+    assert response.headers["X-Received-Length"] == str(len(body))
+    assert response.headers["X-Received-Connection"] != "close"
+
+
+def test_non_json_body_forwarded(proxy_url):
+    """
+    Test that non-JSON payloads go through when JSON validation does not need them.
+    """
+    body = b"plain text payload"
+    response = requests.put(
+        f"{proxy_url}/upload",
+        data=body,
+        headers={"Content-Type": "text/plain"},
+        timeout=5,
+    )
+    assert response.status_code == 200
+    assert response.content == body
+
+
+def test_chunked_body_forwarded(proxy_url):
+    """
+    Test that a chunked upload is streamed to the upstream with chunked encoding.
+    """
+    chunks = [b"first,", b"second,", b"third"]
+    response = requests.post(
+        f"{proxy_url}/upload",
+        data=iter(chunks),
+        headers={"Content-Type": "application/octet-stream"},
+        timeout=5,
+    )
+    assert response.status_code == 200
+    assert response.content == b"".join(chunks)
+    assert response.headers["X-Received-Transfer-Encoding"] == "chunked"
+
+
+def test_validated_body_forwarded_unchanged(validating_proxy_url):
+    """
+    Test that a body read by the JSON validator is forwarded from cache, unchanged.
+    """
+    body = json.dumps({"name": "Jane", "extra": [1, 2]}, indent=4).encode()
+    response = requests.post(
+        f"{validating_proxy_url}/data",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        timeout=5,
+    )
+    assert response.status_code == 200
+    assert response.content == body
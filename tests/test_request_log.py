@@ -0,0 +1,64 @@
+import logging
+import pytest
+from flask import Flask
+from dracan.utils.request_log import register_request_logging
+
+
+def create_test_app(sample_rate):
+    app = Flask(__name__)
+    app.logger.setLevel(logging.INFO)
+    register_request_logging(app, sample_rate)
+
+    @app.route("/ok")
+    def ok():
+        return "ok"
+
+    @app.route("/denied")
+    def denied():
+        return "denied", 403
+
+    return app
+
+
+def summary_lines(caplog):
+    return [r for r in caplog.records if r.getMessage().startswith("request ")]
+
+
+def test_one_summary_line_per_request(caplog):
+    """
+    Test that each request produces exactly one structured summary line.
+    """
+    app = create_test_app(1.0)
+    with caplog.at_level(logging.INFO, logger=app.logger.name):
+        app.test_client().get("/ok")
+
+    records = summary_lines(caplog)
+    assert len(records) == 1
+    assert records[0].levelno == logging.INFO
+    assert 'method=GET path="/ok" status=200' in records[0].getMessage()
+
+
+@pytest.mark.parametrize("path, expected", [("/ok", 0), ("/denied", 1)])
+def test_failures_are_never_sampled_out(caplog, path, expected):
+    """
+    Test that a zero sample rate drops successful requests but always logs failures.
+    """
+    app = create_test_app(0.0)
+    with caplog.at_level(logging.INFO, logger=app.logger.name):
+        app.test_client().get(path)
+
+    records = summary_lines(caplog)
+    assert len(records) == expected
+    assert all(r.levelno == logging.WARNING for r in records)
+
+
+def test_summary_is_not_formatted_when_level_disabled(caplog):
+    """
+    Test that nothing is logged for successful requests when INFO is disabled.
+    """
+    app = create_test_app(1.0)
+    app.logger.setLevel(logging.WARNING)
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        app.test_client().get("/ok")
+
+    assert summary_lines(caplog) == []
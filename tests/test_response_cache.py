@@ -0,0 +1,378 @@
+import time
+import pytest
+from threading import Thread
+from flask import Flask
+from werkzeug.datastructures import Headers
+from dracan.core.proxy import handle_proxy, relay_upstream_response
+from dracan.core.response_cache import (
+    ResponseCache,
+    SingleFlight,
+    cache_key,
+    freshness_lifetime,
+)
+from tests.upstream_mock import UpstreamHandler, destination
+
+
+def headers(**values):
+    """Werkzeug Headers from keyword arguments, underscores becoming dashes."""
+    return Headers([(name.replace("_", "-"), value) for name, value in values.items()])
+
+
+def test_cache_key_sorts_query():
+    """
+    Test that the order of query parameters does not change the key.
+    """
+    assert cache_key("/a", "b=2&a=1") == cache_key("/a", "a=1&b=2") == "/a?a=1&b=2"
+    assert cache_key("/a", "") == "/a"
+
+
+def test_freshness_lifetime():
+    """
+    Test the lifetime taken from Cache-Control, Expires and Age.
+    """
+    assert freshness_lifetime(headers(Cache_Control="max-age=60"), {}) == 60
+    assert freshness_lifetime(headers(Cache_Control="max-age=60, s-maxage=10"), {}) == 10
+    assert freshness_lifetime(headers(Cache_Control="max-age=60", Age="50"), {}) == 10
+    assert (
+        freshness_lifetime(
+            headers(
+                Date="Mon, 01 Jan 2024 00:00:00 GMT",
+                Expires="Mon, 01 Jan 2024 00:00:30 GMT",
+            ),
+            {},
+        )
+        == 30
+    )
+    assert freshness_lifetime(headers(), {}, default_ttl=5) == 5
+    assert freshness_lifetime(headers(Expires="0"), {}, default_ttl=5) == 0
+
+
+def test_uncacheable_responses():
+    """
+    Test that private, no-store, cookie and authorized responses are not stored.
+    """
+    for values in (
+        {"Cache_Control": "max-age=60, private"},
+        {"Cache_Control": "no-store"},
+        {"Cache_Control": "max-age=60", "Set_Cookie": "a=1"},
+    ):
+        assert freshness_lifetime(headers(**values), {}) == 0
+
+    authorized = {"Authorization": "Bearer x"}
+    assert freshness_lifetime(headers(Cache_Control="max-age=60"), authorized) == 0
+    assert freshness_lifetime(headers(Cache_Control="public, max-age=60"), authorized) == 60
+
+
+def test_vary_keys_variants():
+    """
+    Test that responses with Vary are stored per value of the named request headers.
+    """
+    cache = ResponseCache(max_bytes=1 << 20, max_entry_bytes=1024)
+    response_headers = headers(Vary="Accept-Language", Content_Length="2")
+    cache.store("/a", headers(Accept_Language="en"), 200, response_headers, b"en", 60)
+    cache.store("/a", headers(Accept_Language="pl"), 200, response_headers, b"pl", 60)
+
+    assert cache.lookup("/a", headers(Accept_Language="pl")).body == b"pl"
+    assert cache.lookup("/a", headers(Accept_Language="en")).body == b"en"
+    assert cache.lookup("/a", headers(Accept_Language="de")) is None
+
+    cache.store("/b", {}, 200, headers(Vary="*"), b"x", 60)
+    assert cache.lookup("/b", {}) is None
+
+
+def test_lru_eviction_by_size():
+    """
+    Test that the least recently used entries are evicted to stay within max_bytes.
+    """
+    probe = ResponseCache(max_bytes=1 << 20, max_entry_bytes=1024)
+    entry_size = probe.store("/x", {}, 200, headers(), b"x" * 100, 60).size
+    cache = ResponseCache(max_bytes=entry_size * 2, max_entry_bytes=1024)
+    for path in ("/a", "/b"):
+        cache.store(path, {}, 200, headers(), b"x" * 100, 60)
+    cache.lookup("/a", {})  # /b becomes the least recently used
+    cache.store("/c", {}, 200, headers(), b"x" * 100, 60)
+
+    assert cache.lookup("/b", {}) is None
+    assert cache.lookup("/a", {}) is not None
+    assert cache.lookup("/c", {}) is not None
+    assert cache.size == entry_size * 2
+
+
+def test_expired_entries(monkeypatch):
+    """
+    Test that entries are no longer served after their lifetime and report their age.
+    """
+    clock = [1000.0]
+    monkeypatch.setattr("dracan.core.response_cache.time.monotonic", lambda: clock[0])
+    cache = ResponseCache(max_bytes=1 << 20, max_entry_bytes=1024)
+    cache.store("/a", {}, 200, headers(Age="3"), b"body", 10)
+
+    clock[0] += 5
+    assert cache.lookup("/a", {}).response().headers["Age"] == "8"
+    clock[0] += 6
+    assert cache.lookup("/a", {}) is None
+    assert not cache.entries and cache.size == 0
+
+
+class CountingHandler(UpstreamHandler):
+    """Upstream counting the requests it receives."""
+
+    calls = 0
+
+    def do_GET(self):
+        CountingHandler.calls += 1
+        body = f"call {CountingHandler.calls}".encode()
+        self.send_response(200)
+        if not self.path.startswith("/private"):
+            self.send_header("Cache-Control", "max-age=60")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.mark.parametrize("upstream", [CountingHandler], indirect=True)
+def test_cached_responses_skip_upstream(upstream):
+    """
+    Test that fresh responses are served from the cache without reaching the destination.
+    """
+    proxy_config = destination(upstream)
+    app = Flask(__name__)
+    cache = ResponseCache(max_bytes=1 << 20, max_entry_bytes=1024)
+
+    @app.route("/<path:sub>", methods=["GET", "POST"])
+    def proxy_route(sub):
+        return handle_proxy(proxy_config, lambda: (True, None), sub=sub, cache=cache)
+
+    client = app.test_client()
+    CountingHandler.calls = 0
+    first = client.get("/data?b=2&a=1").get_data(as_text=True)
+    second = client.get("/data?a=1&b=2")
+    assert second.get_data(as_text=True) == first == "call 1"
+    assert "Age" in second.headers
+    assert CountingHandler.calls == 1
+
+    # Client asked for a fresh copy, private responses are never stored
+    client.get("/data?a=1&b=2", headers={"Cache-Control": "no-cache"})
+    client.get("/private")
+    client.get("/private")
+    assert CountingHandler.calls == 4
+
+
+def test_coalesce_shares_leader_outcome():
+    """
+    Test that a waiting request gets the stored response or the error of the leading one.
+    """
+    cache = ResponseCache(1 << 20, 1024, flights=SingleFlight(timeout=5))
+    flight, entry, error = cache.coalesce("/a", headers())
+    assert flight is not None and entry is None
+
+    outcomes = []
+    waiter = Thread(target=lambda: outcomes.append(cache.coalesce("/a", headers())))
+    waiter.start()
+    cache.store("/a", headers(), 200, headers(), b"shared", 60)
+    cache.flights.finish("/a", flight)
+    waiter.join()
+    assert outcomes[0][0] is None and outcomes[0][1].body == b"shared"
+
+    flight, _, _ = cache.coalesce("/b", headers())
+    waiter = Thread(target=lambda: outcomes.append(cache.coalesce("/b", headers())))
+    waiter.start()
+    cache.flights.finish("/b", flight, ConnectionError("refused"))
+    waiter.join()
+    assert isinstance(outcomes[1][2], ConnectionError)
+    assert not cache.flights.flights
+
+
+def test_coalesce_timeout():
+    """
+    Test that a waiting request is sent on its own once the timeout elapsed.
+    """
+    cache = ResponseCache(1 << 20, 1024, flights=SingleFlight(timeout=0.05))
+    cache.coalesce("/a", headers())
+    assert cache.coalesce("/a", headers()) == (None, None, None)
+
+
+class SlowHandler(UpstreamHandler):
+    """Slow upstream counting the requests it receives."""
+
+    calls = 0
+
+    def do_GET(self):
+        SlowHandler.calls += 1
+        time.sleep(0.3)
+        body = b"slow"
+        self.send_response(200)
+        self.send_header("Cache-Control", "max-age=60")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.mark.parametrize("upstream", [SlowHandler], indirect=True)
+def test_concurrent_misses_send_one_request(upstream):
+    """
+    Test that concurrent identical GETs through the proxy reach the destination once.
+    """
+    proxy_config = destination(upstream)
+    app = Flask(__name__)
+    cache = ResponseCache(1 << 20, 1024, flights=SingleFlight(timeout=5))
+
+    @app.route("/<path:sub>")
+    def proxy_route(sub):
+        return handle_proxy(proxy_config, lambda: (True, None), sub=sub, cache=cache)
+
+    def fetch():
+        response = app.test_client().get("/popular")
+        bodies.append(response.get_data())
+
+    bodies = []
+    threads = [Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert bodies == [b"slow"] * 5
+    assert SlowHandler.calls == 1
+
+
+class LargeHandler(UpstreamHandler):
+    """Slow upstream answering a body too large to relay, counting the requests it receives."""
+
+    calls = 0
+
+    def do_GET(self):
+        LargeHandler.calls += 1
+        time.sleep(0.3)
+        body = b"x" * 64
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.mark.parametrize("upstream", [LargeHandler], indirect=True)
+def test_coalesced_requests_share_leader_error_status(upstream):
+    """
+    Test that requests waiting for a failing identical request get the same error response.
+    """
+    proxy_config = destination(upstream)
+    app = Flask(__name__)
+    cache = ResponseCache(1 << 20, 1024, flights=SingleFlight(timeout=5))
+
+    @app.route("/<path:sub>")
+    def proxy_route(sub):
+        return handle_proxy(
+            proxy_config,
+            lambda: (True, None),
+            sub=sub,
+            cache=cache,
+            relay_response=lambda response: relay_upstream_response(
+                response, max_buffered_size=16
+            ),
+        )
+
+    def fetch():
+        response = app.test_client().get("/large")
+        outcomes.append((response.status_code, response.json))
+
+    outcomes = []
+    threads = [Thread(target=fetch) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert LargeHandler.calls == 1
+    assert outcomes == [
+        (502, {"error": "Upstream response exceeds the limit of 16 bytes"})
+    ] * 5
+
+
+def test_fresh_entry_answers_conditional_request():
+    """
+    Test that a fresh entry answers a matching If-None-Match or If-Modified-Since with 304.
+    """
+    cache = ResponseCache(1 << 20, 1024)
+    response_headers = headers(
+        ETag='"v1"', Last_Modified="Mon, 01 Jan 2024 00:00:00 GMT", Content_Length="4"
+    )
+    entry = cache.store("/a", headers(), 200, response_headers, b"body", 60)
+
+    app = Flask(__name__)
+    for request_headers, status in (
+        ({"If-None-Match": '"v1"'}, 304),
+        ({"If-None-Match": '"v2"'}, 200),
+        ({"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}, 304),
+        ({"If-Modified-Since": "Sun, 31 Dec 2023 00:00:00 GMT"}, 200),
+    ):
+        with app.test_request_context("/a", headers=request_headers) as context:
+            assert entry.response(context.request).status_code == status
+
+
+def test_stale_entry_is_revalidated(monkeypatch):
+    """
+    Test that expired entries with a validator are kept and refreshed by a 304 answer.
+    """
+    clock = [1000.0]
+    monkeypatch.setattr("dracan.core.response_cache.time.monotonic", lambda: clock[0])
+    cache = ResponseCache(1 << 20, 1024)
+    response_headers = headers(ETag='"v1"', Cache_Control="max-age=10", Content_Length="4")
+    cache.store("/a", headers(), 200, response_headers, b"body", 10)
+
+    clock[0] += 11
+    stale = cache.lookup("/a", headers())
+    assert not stale.fresh
+    assert stale.validators() == {"If-None-Match": '"v1"'}
+
+    refreshed = cache.revalidated(
+        "/a", headers(), stale, headers(Cache_Control="max-age=60", Content_Length="0")
+    )
+    assert refreshed.fresh and refreshed.body == b"body"
+    assert refreshed.headers["Content-Length"] == "4"
+    assert cache.lookup("/a", headers()) is refreshed
+
+
+class ValidatingHandler(UpstreamHandler):
+    """Upstream answering If-None-Match with 304 and counting full responses."""
+
+    full_responses = 0
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        ValidatingHandler.full_responses += 1
+        body = b"resource"
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.mark.parametrize("upstream", [ValidatingHandler], indirect=True)
+def test_revalidation_through_proxy(upstream):
+    """
+    Test that unchanged resources are revalidated with the destination without a body transfer.
+    """
+    proxy_config = destination(upstream)
+    app = Flask(__name__)
+    cache = ResponseCache(1 << 20, 1024)
+
+    @app.route("/<path:sub>")
+    def proxy_route(sub):
+        return handle_proxy(proxy_config, lambda: (True, None), sub=sub, cache=cache)
+
+    client = app.test_client()
+    first = client.get("/resource")
+    second = client.get("/resource")
+    not_modified = client.get("/resource", headers={"If-None-Match": '"v1"'})
+
+    assert first.data == second.data == b"resource"
+    assert second.status_code == 200
+    assert not_modified.status_code == 304 and not_modified.data == b""
+    assert ValidatingHandler.full_responses == 1
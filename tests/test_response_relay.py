@@ -0,0 +1,142 @@
+import gzip
+import pytest
+from flask import Flask
+from dracan.core.proxy import (
+    relay_upstream_response,
+    filter_hop_by_hop_headers,
+    UpstreamResponseTooLarge,
+)
+from dracan.core.upstream import UpstreamClient
+from tests.upstream_mock import UpstreamHandler
+
+BIG_BODY = b"x" * (256 * 1024)
+GZIP_BODY = gzip.compress(b'{"status": "compressed"}')
+
+
+class RelayUpstreamHandler(UpstreamHandler):
+    """Upstream serving bodies used to exercise the response relay."""
+
+    def do_GET(self):
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Connection", "X-Upstream-Hop")
+            self.send_header("X-Upstream-Hop", "drop-me")
+            self.send_header("Set-Cookie", "a=1")
+            self.send_header("Set-Cookie", "b=2")
+            self.end_headers()
+            for offset in range(0, len(BIG_BODY), 10000):
+                chunk = BIG_BODY[offset : offset + 10000]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+
+        body = GZIP_BODY if self.path == "/gzip" else BIG_BODY
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if self.path == "/gzip":
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+relay_upstream = pytest.mark.parametrize(
+    "upstream", [RelayUpstreamHandler], indirect=True
+)
+
+
+@pytest.fixture(scope="module")
+def upstream_url(upstream):
+    """
+    Fixture for the URL of the relay upstream.
+    """
+    return f"http://127.0.0.1:{upstream.server_port}"
+
+
+@pytest.fixture
+def client():
+    upstream_client = UpstreamClient()
+    yield upstream_client
+    upstream_client.close()
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_filter_hop_by_hop_headers():
+    """
+    Test that standard and Connection-nominated hop-by-hop headers are dropped.
+    """
+    headers = [
+        ("Content-Type", "application/json"),
+        ("Connection", "keep-alive, X-Custom"),
+        ("Keep-Alive", "timeout=5"),
+        ("Transfer-Encoding", "chunked"),
+        ("X-Custom", "1"),
+        ("Content-Length", "10"),
+    ]
+    assert filter_hop_by_hop_headers(headers) == [
+        ("Content-Type", "application/json"),
+        ("Content-Length", "10"),
+    ]
+
+
+@relay_upstream
+def test_streamed_relay_of_chunked_body(app, client, upstream_url):
+    """
+    Test that a chunked upstream body is relayed unchanged through a streaming response.
+    """
+    upstream_response = client.get(f"{upstream_url}/chunked", stream=True)
+    with app.test_request_context():
+        response = relay_upstream_response(
+            upstream_response, stream=True, chunk_size=4096
+        )
+        assert response.is_streamed
+        assert "Transfer-Encoding" not in response.headers
+        assert "X-Upstream-Hop" not in response.headers
+        assert response.headers.getlist("Set-Cookie") == ["a=1", "b=2"]
+        assert b"".join(response.response) == BIG_BODY
+
+
+@relay_upstream
+def test_streamed_relay_keeps_content_encoding(app, client, upstream_url):
+    """
+    Test that compressed bodies are relayed as received, matching their headers.
+    """
+    upstream_response = client.get(
+        f"{upstream_url}/gzip", headers={"Accept-Encoding": "gzip"}, stream=True
+    )
+    with app.test_request_context():
+        response = relay_upstream_response(upstream_response, stream=True)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Content-Length"] == str(len(GZIP_BODY))
+        assert b"".join(response.response) == GZIP_BODY
+
+
+@relay_upstream
+def test_buffered_relay(app, client, upstream_url):
+    """
+    Test that buffered mode returns the full body with a matching Content-Length.
+    """
+    upstream_response = client.get(f"{upstream_url}/big", stream=True)
+    with app.test_request_context():
+        response = relay_upstream_response(upstream_response)
+        assert not response.is_streamed
+        assert response.get_data() == BIG_BODY
+        assert response.headers["Content-Length"] == str(len(BIG_BODY))
+
+
+@relay_upstream
+def test_buffered_relay_limit(app, client, upstream_url):
+    """
+    Test that bodies larger than the buffer limit are refused, with or without Content-Length.
+    """
+    for path in ("/big", "/chunked"):
+        upstream_response = client.get(f"{upstream_url}{path}", stream=True)
+        with app.test_request_context():
+            with pytest.raises(UpstreamResponseTooLarge):
+                relay_upstream_response(upstream_response, max_buffered_size=1024)
@@ -0,0 +1,62 @@
+import pytest
+from dracan.utils.route_trie import RouteTrie, split_path
+
+
+@pytest.fixture
+def trie():
+    trie = RouteTrie()
+    trie.insert("/users", "users")
+    trie.insert("/users/<id>", "user")
+    trie.insert("/users/me", "me")
+    trie.insert("/users/<int:id>/orders/<order_id>", "order")
+    trie.insert("/files/<path:rest>", "files")
+    trie.insert_prefix("/api/", "api")
+    return trie
+
+
+def test_split_path():
+    """
+    Test that paths are split into segments, keeping a trailing empty segment.
+    """
+    assert split_path("/") == [""]
+    assert split_path("/api/users") == ["api", "users"]
+    assert split_path("/api/") == ["api", ""]
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/users", "users"),
+        ("/users/42", "user"),
+        ("/users/me", "me"),
+        ("/users/", None),
+        ("/users/42/orders/7", "order"),
+        ("/users/42/orders", None),
+        ("/files/a/b/c.txt", "files"),
+        ("/files", None),
+        ("/api/", "api"),
+        ("/api/v1/items", "api"),
+        ("/api", None),
+        ("/other", None),
+    ],
+)
+def test_route_trie_match(trie, path, expected):
+    """
+    Test template, literal-over-placeholder and prefix matching.
+    """
+    assert trie.match(path) == expected
+
+
+def test_route_trie_size(trie):
+    """
+    Test that the trie counts registered routes.
+    """
+    assert len(trie) == 6
+
+
+def test_prefix_must_end_with_slash():
+    """
+    Test that prefixes not ending on a segment boundary are refused.
+    """
+    with pytest.raises(ValueError):
+        RouteTrie().insert_prefix("/api", "api")
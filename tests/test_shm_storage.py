@@ -0,0 +1,157 @@
+import os
+import time
+import multiprocessing
+import pytest
+from threading import Thread
+from flask import Flask
+from dracan.middleware.limiter import create_limiter
+from dracan.middleware.shm_storage import SharedMemoryStorage, SLOT, HEADER
+
+
+@pytest.fixture
+def table_uri(tmp_path):
+    return f"shm://{tmp_path / 'rate-limit'}?slots=1024&stripes=16"
+
+
+def test_fixed_window_counters(table_uri):
+    """
+    Test counting, expiry, clearing and resetting of keys.
+    """
+    storage = SharedMemoryStorage(table_uri)
+
+    assert storage.get("a") == 0
+    assert storage.incr("a", 60) == 1
+    assert storage.incr("a", 60, amount=2) == 3
+    assert storage.get("a") == 3
+    assert time.time() < storage.get_expiry("a") <= time.time() + 60
+
+    assert storage.incr("b", 1) == 1
+    time.sleep(1.1)
+    assert storage.get("b") == 0
+    assert storage.incr("b", 1) == 1  # Expired window starts over
+
+    storage.clear("a")
+    assert storage.get("a") == 0
+    assert storage.reset() == 1
+    assert storage.get("b") == 0
+
+
+def test_table_size_is_bounded(tmp_path):
+    """
+    Test that more keys than slots evict old ones instead of growing the table.
+    """
+    path = tmp_path / "rate-limit"
+    storage = SharedMemoryStorage(f"shm://{path}?slots=64&stripes=4")
+
+    for index in range(1000):
+        storage.incr(f"key-{index}", 60)
+
+    assert storage.get("key-999") == 1
+    assert os.path.getsize(path) == HEADER.size + 64 * SLOT.size
+
+
+def hit_many(uri, count):
+    storage = SharedMemoryStorage(uri)
+    for _ in range(count):
+        storage.incr("shared", 60)
+
+
+def test_counters_are_shared_across_processes(table_uri):
+    """
+    Test that concurrent increments from several processes are all counted.
+    """
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=hit_many, args=(table_uri, 250)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert SharedMemoryStorage(table_uri).get("shared") == 1000
+
+
+def test_counters_are_shared_across_threads(table_uri):
+    """
+    Test that concurrent increments from several threads of one process are all counted.
+    """
+    storage = SharedMemoryStorage(table_uri)
+    threads = [
+        Thread(target=lambda: [storage.incr("shared", 60) for _ in range(250)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert storage.get("shared") == 1000
+
+
+def test_storages_on_one_file_share_thread_locks(table_uri):
+    """
+    Test that storages opened on the same file in one process, as by Flask-Limiter and the
+    GCRA store, exclude each other's threads.
+    """
+    storages = [SharedMemoryStorage(table_uri), SharedMemoryStorage(table_uri)]
+    assert storages[0].thread_locks is storages[1].thread_locks
+
+    threads = [
+        Thread(target=lambda s=storage: [s.incr("shared", 60) for _ in range(250)])
+        for storage in storages * 2
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert storages[0].get("shared") == 1000
+
+
+def create_limited_app(monkeypatch, storage_uri, storage_options=None):
+    monkeypatch.setenv("RATE_LIMIT_STORAGE_URI", storage_uri)
+    app = Flask(__name__)
+    create_limiter(
+        app, {"limiting_enabled": True, "rate_limit": "3 per minute"}, storage_options
+    )
+
+    @app.route("/")
+    def index():
+        return "ok"
+
+    return app
+
+
+def test_limit_is_shared_between_workers(monkeypatch, table_uri):
+    """
+    Test that two apps (as two gunicorn workers) enforce one limit together.
+    """
+    workers = [create_limited_app(monkeypatch, table_uri) for _ in range(2)]
+
+    statuses = [workers[i % 2].test_client().get("/").status_code for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+
+def test_limit_with_redis_stand_in(monkeypatch):
+    """
+    Test the optional Redis backend against an in-process Redis stand-in.
+    """
+    redis = pytest.importorskip("redis")
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # Lua scripting used by the limits Redis storage
+
+    server = fakeredis.FakeServer()
+    workers = [
+        create_limited_app(
+            monkeypatch,
+            "redis://localhost",
+            {
+                "connection_pool": redis.ConnectionPool(
+                    connection_class=fakeredis.FakeRedisConnection, server=server
+                )
+            },
+        )
+        for _ in range(2)
+    ]
+
+    statuses = [workers[i % 2].test_client().get("/").status_code for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
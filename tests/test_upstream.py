@@ -0,0 +1,137 @@
+import pytest
+import time
+from prometheus_client import REGISTRY
+from dracan.core.upstream import UpstreamClient
+from tests.upstream_mock import UpstreamHandler
+
+
+class KeepAliveHandler(UpstreamHandler):
+    """Minimal HTTP/1.1 handler keeping connections open between requests."""
+
+    def do_GET(self):
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Set-Cookie", "session=leak; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+pytestmark = pytest.mark.parametrize("upstream", [KeepAliveHandler], indirect=True)
+
+
+@pytest.fixture(scope="module")
+def upstream_url(upstream):
+    """
+    Fixture for the URL of the keep-alive upstream.
+    """
+    return f"http://127.0.0.1:{upstream.server_port}"
+
+
+def pool_metric(name, url):
+    """Read the current value of an upstream pool metric for the given upstream."""
+    upstream = url.split("//", 1)[1]
+    return REGISTRY.get_sample_value(name, {"upstream": upstream}) or 0
+
+
+def test_connections_are_reused(upstream_url):
+    """
+    Test that consecutive requests go over a single keep-alive connection.
+    """
+    client = UpstreamClient(pool_size=2, idle_timeout=60)
+    created = pool_metric("upstream_pool_connections_created_total", upstream_url)
+    reused = pool_metric("upstream_pool_connections_reused_total", upstream_url)
+
+    try:
+        for _ in range(5):
+            response = client.get(upstream_url)
+            assert response.status_code == 200
+
+        assert (
+            pool_metric("upstream_pool_connections_created_total", upstream_url)
+            == created + 1
+        )
+        assert (
+            pool_metric("upstream_pool_connections_reused_total", upstream_url)
+            == reused + 4
+        )
+        assert pool_metric("upstream_pool_connections_in_use", upstream_url) == 0
+        assert pool_metric("upstream_pool_connections_idle", upstream_url) == 1
+    finally:
+        client.close()
+
+    assert pool_metric("upstream_pool_connections_idle", upstream_url) == 0
+
+
+def test_idle_gauge_over_pool_capacity(upstream_url):
+    """
+    Test that connections discarded by a full pool are not counted as idle.
+    """
+    client = UpstreamClient(pool_size=1, idle_timeout=60)
+
+    try:
+        # Five connections in use at once, only one fits back into the pool
+        responses = [client.get(upstream_url, stream=True) for _ in range(5)]
+        assert pool_metric("upstream_pool_connections_in_use", upstream_url) == 5
+        for response in responses:
+            assert response.content  # Read in full, the connection goes back to the pool
+
+        assert pool_metric("upstream_pool_connections_in_use", upstream_url) == 0
+        assert pool_metric("upstream_pool_connections_idle", upstream_url) == 1
+    finally:
+        client.close()
+
+    assert pool_metric("upstream_pool_connections_idle", upstream_url) == 0
+
+
+def test_max_requests_per_connection(upstream_url):
+    """
+    Test that a connection is retired after serving max_requests requests.
+    """
+    client = UpstreamClient(pool_size=2, idle_timeout=60, max_requests=2)
+    created = pool_metric("upstream_pool_connections_created_total", upstream_url)
+
+    try:
+        for _ in range(4):
+            assert client.get(upstream_url).status_code == 200
+
+        assert (
+            pool_metric("upstream_pool_connections_created_total", upstream_url)
+            == created + 2
+        )
+    finally:
+        client.close()
+
+
+def test_idle_connections_are_dropped(upstream_url):
+    """
+    Test that keep-alive connections idle for longer than idle_timeout are not reused.
+    """
+    client = UpstreamClient(pool_size=2, idle_timeout=0.2)
+    created = pool_metric("upstream_pool_connections_created_total", upstream_url)
+
+    try:
+        assert client.get(upstream_url).status_code == 200
+        time.sleep(0.3)
+        assert client.get(upstream_url).status_code == 200
+
+        assert (
+            pool_metric("upstream_pool_connections_created_total", upstream_url)
+            == created + 2
+        )
+    finally:
+        client.close()
+
+
+def test_upstream_cookies_are_not_persisted(upstream_url):
+    """
+    Test that the shared session never stores cookies set by the upstream.
+    """
+    client = UpstreamClient()
+    try:
+        response = client.get(upstream_url)
+        assert "session=leak" in response.headers["Set-Cookie"]
+        assert len(client.session.cookies) == 0
+    finally:
+        client.close()
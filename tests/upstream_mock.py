@@ -0,0 +1,69 @@
+from threading import Thread
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from werkzeug.serving import make_server
+
+
+class UpstreamHandler(BaseHTTPRequestHandler):
+    """
+    Base of the request handlers serving as destination in tests: HTTP/1.1 keep-alive
+    connections, no access log.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self):
+        """
+        Read the request body, sent with Content-Length or chunked.
+        :return: The body, or None if a chunked body ended before its last chunk.
+        """
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        body = b""
+        while True:
+            line = self.rfile.readline().strip()
+            if not line:
+                return None  # Body aborted by the proxy
+            size = int(line, 16)
+            body += self.rfile.read(size)
+            self.rfile.readline()
+            if size == 0:
+                return body
+
+
+def start_upstream(handler):
+    """
+    Start a threaded destination serving the handler class on a free port.
+    :return: The running server, stopped with stop_server().
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_app(app):
+    """
+    Run a Flask app on a free port, e.g. a proxy in front of a test destination.
+    :return: The running server, stopped with stop_server().
+    """
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_server(server):
+    """Stop a server started by start_upstream() or serve_app() and release its port."""
+    server.shutdown()
+    server.server_close()
+
+
+def destination(server, path=""):
+    """
+    proxy_config pointing at a running test destination.
+    """
+    return {
+        "destination": {"host": "127.0.0.1", "port": server.server_port, "path": path}
+    }